@@ -0,0 +1,214 @@
+"""Measure the per-event cost of parsing EFA departures.
+
+Builds a board of synthetic stopEvents in the shape of the VRR departure
+monitor and parses it several times, as consecutive polls would (the
+planned times repeat, some estimated times change). Reports the cost per
+stop event of:
+
+* time-baseline: dt_util.parse_datetime plus astimezone, as before the
+  memoized parser
+* time-cold: parse_local_time with an empty cache on every poll
+* time-warm: parse_local_time across polls
+* parse-legacy: the whole event parsed the way VRRProvider.parse_departure
+  used to, building its type mapping and extractor closures per event
+* parse_departure: VRRProvider.parse_departure with its prebuilt parser
+* sort-slice: every event parsed, filtered by type, sorted and cut to the
+  limit, as the sensor used to
+* parse_departures: VRRProvider.parse_departures keeping the earliest
+  departures in a bounded heap
+* to_dict x3: serializing the parsed board for three consumers
+
+It also reports the memory held per parsed departure.
+
+Usage (from the repository root, with requirements_test.txt installed):
+
+    python benchmarks/departure_parse.py --events 300 --polls 20
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from homeassistant.util import dt as dt_util  # noqa: E402
+
+from custom_components.vrr.parsers import parse_departure_generic, parse_local_time  # noqa: E402
+from custom_components.vrr.providers.vrr import VRRProvider  # noqa: E402
+
+PRODUCT_CLASSES = (0, 1, 2, 4, 5, 6, 13)
+
+
+def synthesize(events: int, seed: int = 1) -> list:
+    """Build a departure board of events stop events starting now."""
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    board = []
+    for number in range(events):
+        planned = start + timedelta(seconds=30 * number)
+        event = {
+            "location": {"id": "de:05111:18235:1:1", "name": "Düsseldorf Hbf"},
+            "departureTimePlanned": planned.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "transportation": {
+                "number": f"U{70 + number % 9}",
+                "description": "Düsseldorf Hbf - Duisburg Hbf",
+                "destination": {"name": f"Ziel {number % 23}"},
+                "product": {"class": PRODUCT_CLASSES[number % len(PRODUCT_CLASSES)]},
+            },
+            "platform": {"name": str(number % 12 + 1)},
+            "realtimeStatus": ["MONITORED"],
+        }
+        if rng.random() < 0.8:
+            event["departureTimeEstimated"] = (planned + timedelta(minutes=rng.randint(0, 4))).strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            )
+        board.append(event)
+    return board
+
+
+def next_poll(board: list, rng: random.Random) -> list:
+    """Return the board of the next poll: same planned times, some estimates changed."""
+    polled = []
+    for event in board:
+        event = dict(event)
+        if "departureTimeEstimated" in event and rng.random() < 0.1:
+            planned = datetime.fromisoformat(event["departureTimePlanned"])
+            event["departureTimeEstimated"] = (planned + timedelta(minutes=rng.randint(0, 6))).strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            )
+        polled.append(event)
+    return polled
+
+
+def times_baseline(board: list, tz) -> None:
+    """Parse and convert the times of a board the way parse_departure_generic used to."""
+    for event in board:
+        planned = dt_util.parse_datetime(event["departureTimePlanned"])
+        estimated_str = event.get("departureTimeEstimated")
+        estimated = dt_util.parse_datetime(estimated_str) if estimated_str else planned
+        planned.astimezone(tz)
+        estimated.astimezone(tz)
+
+
+def times_memoized(board: list, tz) -> None:
+    """Parse and convert the times of a board with parse_local_time."""
+    for event in board:
+        parse_local_time(event["departureTimePlanned"], tz)
+        estimated_str = event.get("departureTimeEstimated")
+        if estimated_str:
+            parse_local_time(estimated_str, tz)
+
+
+def legacy_vrr_parse(stop: dict, tz, now: datetime):
+    """Parse a VRR stop event the way VRRProvider.parse_departure did before its parser was prebuilt."""
+
+    def determine_transport_type(transportation: dict) -> str:
+        product_class = transportation.get("product", {}).get("class", 0)
+        type_mapping = {
+            0: "train",
+            1: "train",
+            2: "subway",
+            3: "subway",
+            4: "tram",
+            5: "bus",
+            6: "bus",
+            7: "bus",
+            8: "bus",
+            9: "ferry",
+            10: "taxi",
+            11: "bus",
+            13: "train",
+            15: "train",
+            16: "train",
+        }
+        return type_mapping.get(product_class, "unknown")
+
+    return parse_departure_generic(
+        stop,
+        tz,
+        now,
+        get_transport_type_fn=determine_transport_type,
+        get_platform_fn=lambda s: (s.get("platform", {}).get("name") or s.get("platformName", "")),
+        get_realtime_fn=lambda s, est, plan: "MONITORED" in s.get("realtimeStatus", []),
+    )
+
+
+def sort_slice(provider, board: list, tz, now: datetime, types: set, limit: int) -> list:
+    """Parse a whole board, filter it by type, sort it and cut it to the limit."""
+    departures = []
+    for event in board:
+        departure = provider.parse_departure(event, tz, now)
+        if departure and departure.transportation_type in types:
+            departures.append(departure)
+    departures.sort(key=lambda departure: departure.departure_time_obj)
+    return departures[:limit]
+
+
+def serialize(departures: list, consumers: int = 3) -> None:
+    """Convert every departure to its attribute dict once per consumer."""
+    for _ in range(consumers):
+        for departure in departures:
+            departure.to_dict()
+
+
+def bytes_per_departure(provider, board: list, tz, now: datetime) -> float:
+    """Return the memory held per parsed departure, with the timestamp cache already warm."""
+    [provider.parse_departure(event, tz, now) for event in board]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    departures = [provider.parse_departure(event, tz, now) for event in board]
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return held / len(departures)
+
+
+def measure(name: str, run, polls: list, clear_cache: bool = False) -> None:
+    """Print the median cost per stop event of run over all polls."""
+    timings = []
+    for board in polls:
+        if clear_cache:
+            parse_local_time.cache_clear()
+        start = time.perf_counter()
+        run(board)
+        timings.append((time.perf_counter() - start) / len(board))
+    print(f"{name:<16} median {statistics.median(timings) * 1e6:7.2f} µs/event  min {min(timings) * 1e6:7.2f} µs/event")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=300, help="Stop events per board")
+    parser.add_argument("--polls", type=int, default=20, help="Consecutive polls parsed")
+    parser.add_argument("--limit", type=int, default=10, help="Departures kept by the batch parsers")
+    args = parser.parse_args()
+
+    rng = random.Random(2)
+    polls = [synthesize(args.events)]
+    for _ in range(args.polls - 1):
+        polls.append(next_poll(polls[-1], rng))
+
+    tz = dt_util.get_time_zone("Europe/Berlin")
+    now = dt_util.now()
+    provider = VRRProvider(None)
+    types = {"bus", "tram", "subway"}
+
+    measure("time-baseline", lambda board: times_baseline(board, tz), polls)
+    measure("time-cold", lambda board: times_memoized(board, tz), polls, clear_cache=True)
+    parse_local_time.cache_clear()
+    measure("time-warm", lambda board: times_memoized(board, tz), polls)
+    measure("parse-legacy", lambda board: [legacy_vrr_parse(event, tz, now) for event in board], polls)
+    measure("parse_departure", lambda board: [provider.parse_departure(event, tz, now) for event in board], polls)
+    measure("sort-slice", lambda board: sort_slice(provider, board, tz, now, types, args.limit), polls)
+    measure("parse_departures", lambda board: provider.parse_departures(board, tz, now, types, args.limit), polls)
+    parsed = [[provider.parse_departure(event, tz, now) for event in board] for board in polls]
+    measure("to_dict x3", lambda departures: serialize(departures), parsed)
+    print(f"{'memory':<16} {bytes_per_departure(provider, polls[0], tz, now):7.0f} bytes/departure")
+
+
+if __name__ == "__main__":
+    main()
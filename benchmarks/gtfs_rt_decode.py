@@ -0,0 +1,185 @@
+"""Compare protobuf and JSON decoding of the NTA GTFS-RT TripUpdates feed.
+
+Reports payload size, decode time (decode + stop_id index) and peak memory
+for both formats of the same feed, and for the streaming JSON decode that
+only keeps the stops served by the hub (--stops of them).
+
+Usage (from the repository root, with requirements_test.txt installed):
+
+    # Record the feed in both formats (needs an NTA API key)
+    python benchmarks/gtfs_rt_decode.py --record YOUR_API_KEY --out /tmp/tripupdates
+
+    # Benchmark a recorded feed
+    python benchmarks/gtfs_rt_decode.py --pb /tmp/tripupdates.pb --json /tmp/tripupdates.json
+
+    # Benchmark a synthetic feed of 5000 trips
+    python benchmarks/gtfs_rt_decode.py --synthesize 5000
+
+    # Streaming JSON decode for 20 watched stops
+    python benchmarks/gtfs_rt_decode.py --pb /tmp/tripupdates.pb --stops 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import urllib.request
+
+from google.protobuf import json_format
+from google.transit import gtfs_realtime_pb2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from custom_components.vrr.const import API_BASE_URL_NTA_GTFSR  # noqa: E402
+from custom_components.vrr.const import NTA_FEED_STREAM_CHUNK_SIZE  # noqa: E402
+from custom_components.vrr.gtfs_rt import FeedSnapshot, async_decode_json_feed  # noqa: E402
+
+
+def record(api_key: str, out: str) -> None:
+    """Download the TripUpdates feed as protobuf and JSON."""
+    for suffix, query in (("pb", ""), ("json", "?format=json")):
+        request = urllib.request.Request(
+            f"{API_BASE_URL_NTA_GTFSR}/v2/TripUpdates{query}", headers={"x-api-key": api_key}
+        )
+        with urllib.request.urlopen(request, timeout=30) as response:
+            payload = response.read()
+        with open(f"{out}.{suffix}", "wb") as file:
+            file.write(payload)
+        print(f"Recorded {len(payload):,} bytes to {out}.{suffix}")
+
+
+def synthesize(trips: int) -> bytes:
+    """Build a protobuf feed with the shape of the NTA feed (about 20 stops per trip)."""
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = "2.0"
+    feed.header.timestamp = int(time.time())
+    for trip_number in range(trips):
+        entity = feed.entity.add()
+        entity.id = f"T{trip_number}"
+        trip_update = entity.trip_update
+        trip_update.trip.trip_id = f"{trip_number}_{trip_number % 97}"
+        trip_update.trip.route_id = f"{trip_number % 300}_{trip_number % 7}"
+        for sequence in range(20):
+            stop_time_update = trip_update.stop_time_update.add()
+            stop_time_update.stop_sequence = sequence
+            stop_time_update.stop_id = f"8220DB{(trip_number * 7 + sequence * 13) % 4000:06d}"
+            stop_time_update.departure.delay = (trip_number + sequence) % 300
+            stop_time_update.departure.time = feed.header.timestamp + sequence * 120
+    return feed.SerializeToString()
+
+
+def to_json(payload: bytes) -> bytes:
+    """Convert a protobuf feed to the JSON representation used by the API."""
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.ParseFromString(payload)
+    return json.dumps(json_format.MessageToDict(feed, preserving_proto_field_name=True)).encode()
+
+
+def decode_protobuf(payload: bytes) -> FeedSnapshot:
+    """Decode a protobuf payload the way GTFSRealtimeFeedHub does."""
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.ParseFromString(payload)
+    return FeedSnapshot.from_feed_message(feed, time.monotonic())
+
+
+def decode_json(payload: bytes) -> FeedSnapshot:
+    """Decode a JSON payload the way GTFSRealtimeFeedHub does."""
+    return FeedSnapshot.from_entities(json.loads(payload).get("entity", []), time.monotonic())
+
+
+class BytesStream:
+    """Serve a recorded payload in chunks like the aiohttp.StreamReader of a response."""
+
+    def __init__(self, payload: bytes):
+        self._payload = memoryview(payload)
+        self._pos = 0
+
+    async def read(self, size: int = NTA_FEED_STREAM_CHUNK_SIZE) -> bytes:
+        chunk = bytes(self._payload[self._pos : self._pos + size])
+        self._pos += len(chunk)
+        return chunk
+
+
+def decode_json_stream(payload: bytes, stop_ids: frozenset) -> FeedSnapshot:
+    """Decode a JSON payload chunk by chunk the way GTFSRealtimeFeedHub does."""
+    return asyncio.run(async_decode_json_feed(BytesStream(payload), stop_ids))
+
+
+def watched_stops(payload: bytes, count: int) -> frozenset:
+    """Return the first count stop_ids of a protobuf feed."""
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.ParseFromString(payload)
+    stop_ids = []
+    for entity in feed.entity:
+        for stop_time_update in entity.trip_update.stop_time_update:
+            if stop_time_update.stop_id not in stop_ids:
+                stop_ids.append(stop_time_update.stop_id)
+            if len(stop_ids) == count:
+                return frozenset(stop_ids)
+    return frozenset(stop_ids)
+
+
+def measure(name: str, decode, payload: bytes, runs: int) -> None:
+    """Print size, decode time and peak memory for one format."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        decode(payload)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    snapshot = decode(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{name:<11} {len(payload):>12,} B  "
+        f"decode median {statistics.median(timings) * 1000:8.1f} ms  "
+        f"min {min(timings) * 1000:8.1f} ms  "
+        f"peak {peak / 1024 / 1024:8.1f} MiB  "
+        f"({snapshot.entity_count} entities, {snapshot.stop_count} stops)"
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pb", help="Recorded protobuf feed")
+    parser.add_argument("--json", help="Recorded JSON feed (derived from --pb if omitted)")
+    parser.add_argument("--synthesize", type=int, metavar="TRIPS", help="Benchmark a synthetic feed")
+    parser.add_argument("--record", metavar="API_KEY", help="Record the live feed instead of benchmarking")
+    parser.add_argument("--out", default="tripupdates", help="File prefix for --record")
+    parser.add_argument("--runs", type=int, default=5, help="Decode runs per format")
+    parser.add_argument("--stops", type=int, default=5, help="Watched stops of the streaming JSON decode")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.out)
+        return
+
+    if args.pb:
+        with open(args.pb, "rb") as file:
+            pb_payload = file.read()
+    elif args.synthesize:
+        pb_payload = synthesize(args.synthesize)
+    else:
+        parser.error("one of --pb, --synthesize or --record is required")
+
+    if args.json:
+        with open(args.json, "rb") as file:
+            json_payload = file.read()
+    else:
+        json_payload = to_json(pb_payload)
+
+    measure("protobuf", decode_protobuf, pb_payload, args.runs)
+    measure("json", decode_json, json_payload, args.runs)
+    stop_ids = watched_stops(pb_payload, args.stops)
+    measure("json-stream", lambda payload: decode_json_stream(payload, stop_ids), json_payload, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,36 @@
 import logging
+from typing import Any
 
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.core import HomeAssistant, ServiceCall, callback
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.start import async_at_started
 
 from .const import (
+    CONF_ADAPTIVE_POLLING,
     CONF_DEPARTURES,
+    CONF_HEDGED_REQUESTS,
+    CONF_MAX_SCAN_INTERVAL,
     CONF_NTA_API_KEY,
     CONF_PROVIDER,
     CONF_SCAN_INTERVAL,
     CONF_STATION_ID,
     CONF_TRAFIKLAB_API_KEY,
+    CONF_TRANSPORTATION_TYPES,
     DEFAULT_DEPARTURES,
+    DEFAULT_MAX_SCAN_INTERVAL,
     DEFAULT_SCAN_INTERVAL,
     DOMAIN,
     PROVIDER_NTA_IE,
     PROVIDER_TRAFIKLAB_SE,
 )
+from .http_session import async_close_session
 from .sensor import VRRDataUpdateCoordinator
+from .warm_start import DepartureSnapshotStore
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -63,6 +73,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     departures = entry.options.get(CONF_DEPARTURES, entry.data.get(CONF_DEPARTURES, DEFAULT_DEPARTURES))
     scan_interval = entry.options.get(CONF_SCAN_INTERVAL, entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL))
+    adaptive_polling = entry.options.get(CONF_ADAPTIVE_POLLING, False)
+    max_scan_interval = entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
+    hedged_requests = entry.options.get(CONF_HEDGED_REQUESTS, False)
+    transportation_types = entry.options.get(CONF_TRANSPORTATION_TYPES, entry.data.get(CONF_TRANSPORTATION_TYPES))
 
     coordinator = VRRDataUpdateCoordinator(
         hass,
@@ -74,24 +88,41 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         scan_interval,
         config_entry=entry,
         api_key=api_key,
+        adaptive_polling=adaptive_polling,
+        max_scan_interval=max_scan_interval,
+        hedged_requests=hedged_requests,
+        transportation_types=transportation_types,
     )
 
     # Store coordinator before first refresh
     coordinator_key = f"{entry.entry_id}_coordinator"
     hass.data[DOMAIN][coordinator_key] = coordinator
 
-    # Do initial refresh - this can raise ConfigEntryNotReady
-    try:
-        await coordinator.async_config_entry_first_refresh()
-    except Exception as err:
-        # Cleanup coordinator resources before removing from hass.data
+    # Continue today's quota accounting from before a restart or reload
+    await coordinator.async_restore_api_calls()
+
+    coordinator.snapshot_store = DepartureSnapshotStore(hass, entry.entry_id)
+    snapshot = await coordinator.snapshot_store.async_load()
+
+    if snapshot is not None:
+        # Warm start: bring the entities up with the stored board and refresh in the background
+        _LOGGER.debug("Restored %d stored departures for %s", len(snapshot["stopEvents"]), entry.title)
+        await coordinator.async_update_board(snapshot)
+        coordinator.async_set_updated_data(snapshot)
+        _async_schedule_first_refresh(hass, entry, coordinator)
+    else:
+        # Do initial refresh - this can raise ConfigEntryNotReady
         try:
-            await coordinator.async_shutdown()
-        except Exception as shutdown_err:
-            _LOGGER.warning("Error during coordinator shutdown after failed setup: %s", shutdown_err)
-        # Remove coordinator from hass.data if setup fails
-        hass.data[DOMAIN].pop(coordinator_key, None)
-        raise ConfigEntryNotReady(f"Failed to initialize VRR API: {err}") from err
+            await coordinator.async_config_entry_first_refresh()
+        except Exception as err:
+            # Cleanup coordinator resources before removing from hass.data
+            try:
+                await coordinator.async_shutdown()
+            except Exception as shutdown_err:
+                _LOGGER.warning("Error during coordinator shutdown after failed setup: %s", shutdown_err)
+            # Remove coordinator from hass.data if setup fails
+            hass.data[DOMAIN].pop(coordinator_key, None)
+            raise ConfigEntryNotReady(f"Failed to initialize VRR API: {err}") from err
 
     await hass.config_entries.async_forward_entry_setups(entry, ["sensor", "binary_sensor"])
 
@@ -135,6 +166,30 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+@callback
+def _async_schedule_first_refresh(
+    hass: HomeAssistant, entry: ConfigEntry, coordinator: VRRDataUpdateCoordinator
+) -> None:
+    """Run the first refresh of a warm-started coordinator in the background at its phase.
+
+    The delay is computed once Home Assistant has started, when every config
+    entry has registered with the poll scheduler.
+    """
+
+    @callback
+    def _async_refresh(_now: Any) -> None:
+        entry.async_create_background_task(hass, coordinator.async_refresh(), f"{DOMAIN} refresh {entry.title}")
+
+    @callback
+    def _async_started(_hass: HomeAssistant) -> None:
+        scheduler = coordinator.poll_scheduler
+        delay = scheduler.first_refresh_delay(coordinator.scheduler_key, coordinator.poll_interval)
+        _LOGGER.debug("First refresh of %s in %.0f s", entry.title, delay)
+        entry.async_on_unload(async_call_later(hass, delay, _async_refresh))
+
+    entry.async_on_unload(async_at_started(hass, _async_started))
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload Public Transport DE config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, ["sensor", "binary_sensor"])
@@ -151,6 +206,13 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             except Exception as e:
                 _LOGGER.warning("Error during coordinator shutdown: %s", e)
 
+    # Close the shared HTTP session once no other entry is loaded
+    if not any(
+        other.entry_id != entry.entry_id and other.state is ConfigEntryState.LOADED
+        for other in hass.config_entries.async_entries(DOMAIN)
+    ):
+        await async_close_session(hass)
+
     # Unregister services and cleanup if no more entries
     if not hass.config_entries.async_entries(DOMAIN):
         # Remove services
@@ -161,3 +223,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.info("VRR integration fully unloaded")
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored departure snapshot of a deleted config entry."""
+    await DepartureSnapshotStore(hass, entry.entry_id).async_remove()
@@ -0,0 +1,78 @@
+"""Persistent daily API call counters.
+
+Each coordinator counts its API calls per day to enforce
+API_RATE_LIMIT_PER_DAY. The counters of all config entries are kept in one
+homeassistant.helpers.storage.Store, so a restart or an entry reload does
+not reset the quota accounting. Writes are batched with async_delay_save
+instead of touching the disk on every call.
+"""
+
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    API_COUNTER_SAVE_DELAY,
+    API_COUNTER_STORAGE_KEY,
+    API_COUNTER_STORAGE_VERSION,
+    DATA_API_COUNTERS,
+    DOMAIN,
+)
+
+
+class ApiCallCounters:
+    """Daily API call counters of all config entries, persisted in .storage."""
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the counters.
+
+        Args:
+            hass: Home Assistant instance
+        """
+        self._store: Store = Store(hass, API_COUNTER_STORAGE_VERSION, API_COUNTER_STORAGE_KEY)
+        self._counters: Dict[str, Dict[str, Any]] = {}
+
+    async def async_load(self) -> None:
+        """Load the stored counters."""
+        data = await self._store.async_load()
+        if isinstance(data, dict) and isinstance(data.get("counters"), dict):
+            self._counters = data["counters"]
+
+    def get(self, entry_id: str) -> Optional[Tuple[int, date]]:
+        """Return the stored call count and its day for a config entry.
+
+        Returns:
+            Tuple of (calls, day), or None if nothing valid is stored
+        """
+        counter = self._counters.get(entry_id)
+        if not isinstance(counter, dict):
+            return None
+        try:
+            return int(counter["calls"]), date.fromisoformat(counter["date"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @callback
+    def async_update(self, entry_id: str, calls: int, day: date) -> None:
+        """Record the call count of a config entry and schedule a batched save."""
+        self._counters[entry_id] = {"calls": calls, "date": day.isoformat()}
+        self._store.async_delay_save(self._data_to_save, API_COUNTER_SAVE_DELAY)
+
+    def _data_to_save(self) -> Dict[str, Any]:
+        """Return the counters to store, dropping those of past days."""
+        today = date.today().isoformat()
+        return {"counters": {entry_id: c for entry_id, c in self._counters.items() if c.get("date") == today}}
+
+
+async def async_get_api_counters(hass: HomeAssistant) -> ApiCallCounters:
+    """Return the shared API call counters, loading them from storage on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    counters = domain_data.get(DATA_API_COUNTERS)
+    if counters is None:
+        counters = ApiCallCounters(hass)
+        await counters.async_load()
+        # Another entry may have loaded the counters while we were waiting
+        counters = domain_data.setdefault(DATA_API_COUNTERS, counters)
+    return counters
@@ -0,0 +1,144 @@
+"""Circuit breaker per provider endpoint.
+
+When a provider API is down, every coordinator would still spend three
+attempts and their backoff sleeps on each poll. One CircuitBreaker per
+provider endpoint, stored in hass.data[DOMAIN], is shared by all
+coordinators of that provider:
+
+* closed: requests pass. CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive
+  failed requests (all attempts timed out, failed to connect or got 5xx /
+  429) open the breaker.
+* open: requests fail fast with CircuitOpenError and the coordinators keep
+  serving their last departures, marked as stale.
+* half-open: CIRCUIT_BREAKER_RECOVERY_TIMEOUT seconds after opening, a
+  single request is let through as a probe (with one attempt). Its success
+  closes the breaker; a failure opens it again. Other requests keep failing
+  fast while the probe is in flight.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+    DATA_CIRCUIT_BREAKERS,
+    DOMAIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open state machine for one endpoint."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout: float = CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+    ):
+        """Initialize a closed breaker.
+
+        Args:
+            name: Endpoint name used in log messages (the provider id)
+            failure_threshold: Consecutive failed requests that open the breaker
+            recovery_timeout: Seconds the breaker stays open before a probe is sent
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.rejected_count = 0
+        self.open_count = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now.
+
+        Moves an open breaker to half-open once the recovery timeout has
+        passed; the caller allowed in then sends the probe.
+        """
+        if self.state == STATE_OPEN and time.monotonic() - (self._opened_at or 0) >= self.recovery_timeout:
+            _LOGGER.debug("%s circuit breaker half-open, sending probe request", self.name)
+            self.state = STATE_HALF_OPEN
+            self._probing = False
+
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+
+        self.rejected_count += 1
+        return False
+
+    @property
+    def probing(self) -> bool:
+        """Return True while the half-open probe request is in flight."""
+        return self.state == STATE_HALF_OPEN and self._probing
+
+    def record_success(self) -> None:
+        """Record a request that reached the endpoint; closes the breaker."""
+        if self.state != STATE_CLOSED:
+            _LOGGER.info("%s API is reachable again, closing circuit breaker", self.name)
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Record a failed request; opens the breaker at the threshold or after a failed probe."""
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN or (self.state == STATE_CLOSED and self.failures >= self.failure_threshold):
+            _LOGGER.warning(
+                "%s API failed %d times in a row, pausing requests for %d s",
+                self.name,
+                self.failures,
+                self.recovery_timeout,
+            )
+            self.state = STATE_OPEN
+            self.open_count += 1
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self) -> None:
+        """Give up the probe without a result (e.g. the request was cancelled)."""
+        self._probing = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the breaker state for diagnostics."""
+        probe_in = None
+        if self.state == STATE_OPEN and self._opened_at is not None:
+            probe_in = max(0.0, round(self._opened_at + self.recovery_timeout - time.monotonic(), 1))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "failure_threshold": self.failure_threshold,
+            "open_count": self.open_count,
+            "rejected_count": self.rejected_count,
+            "probe_in": probe_in,
+        }
+
+
+@callback
+def async_get_circuit_breaker(hass: HomeAssistant, endpoint: str) -> CircuitBreaker:
+    """Return the circuit breaker of an endpoint, creating it on first use."""
+    breakers: Dict[str, CircuitBreaker] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_CIRCUIT_BREAKERS, {})
+    breaker = breakers.get(endpoint)
+    if breaker is None:
+        breaker = breakers[endpoint] = CircuitBreaker(endpoint)
+    return breaker
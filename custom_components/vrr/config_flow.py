@@ -17,7 +17,10 @@ from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import (
+    CONF_ADAPTIVE_POLLING,
     CONF_DEPARTURES,
+    CONF_HEDGED_REQUESTS,
+    CONF_MAX_SCAN_INTERVAL,
     CONF_NTA_API_KEY,
     CONF_NTA_API_KEY_SECONDARY,
     CONF_PROVIDER,
@@ -27,8 +30,10 @@ from .const import (
     CONF_TRANSPORTATION_TYPES,
     CONF_USE_PROVIDER_LOGO,
     DEFAULT_DEPARTURES,
+    DEFAULT_MAX_SCAN_INTERVAL,
     DEFAULT_SCAN_INTERVAL,
     DOMAIN,
+    HEDGED_REQUEST_PROVIDERS,
     PROVIDER_HVV,
     PROVIDER_KVV,
     PROVIDER_NTA_IE,
@@ -38,6 +43,7 @@ from .const import (
     TRANSPORTATION_TYPES,
 )
 from .providers import get_provider
+from .rate_limiter import async_get_rate_limiter
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -357,6 +363,8 @@ class VRRConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):  # type: ignore[c
             api_key_secondary=self._api_key_secondary,
         )
         if provider_instance:
+            # Stop searches share the rate limit of the provider's departure requests
+            provider_instance.rate_limiter = async_get_rate_limiter(self.hass, self._provider, self._api_key)
             try:
                 results = await provider_instance.search_stops(search_term)
                 # Store in cache
@@ -1015,18 +1023,23 @@ class VRROptionsFlowHandler(config_entries.OptionsFlow):
             CONF_USE_PROVIDER_LOGO,
             self.config_entry.data.get(CONF_USE_PROVIDER_LOGO, False),
         )
+        current_adaptive_polling = self.config_entry.options.get(CONF_ADAPTIVE_POLLING, False)
+        current_max_scan_interval = self.config_entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
+
+        fields = {
+            vol.Optional(CONF_DEPARTURES, default=current_departures): vol.All(int, vol.Range(min=1, max=20)),
+            vol.Optional(CONF_SCAN_INTERVAL, default=current_scan_interval): vol.All(int, vol.Range(min=30, max=3600)),
+            vol.Optional(CONF_TRANSPORTATION_TYPES, default=current_transport_types): cv.multi_select(
+                TRANSPORTATION_TYPES
+            ),
+            vol.Optional(CONF_USE_PROVIDER_LOGO, default=current_use_logo): bool,
+            vol.Optional(CONF_ADAPTIVE_POLLING, default=current_adaptive_polling): bool,
+            vol.Optional(CONF_MAX_SCAN_INTERVAL, default=current_max_scan_interval): vol.All(
+                int, vol.Range(min=60, max=3600)
+            ),
+        }
+        if self.config_entry.data.get(CONF_PROVIDER, PROVIDER_VRR) in HEDGED_REQUEST_PROVIDERS:
+            current_hedged_requests = self.config_entry.options.get(CONF_HEDGED_REQUESTS, False)
+            fields[vol.Optional(CONF_HEDGED_REQUESTS, default=current_hedged_requests)] = bool
 
-        schema = vol.Schema(
-            {
-                vol.Optional(CONF_DEPARTURES, default=current_departures): vol.All(int, vol.Range(min=1, max=20)),
-                vol.Optional(CONF_SCAN_INTERVAL, default=current_scan_interval): vol.All(
-                    int, vol.Range(min=30, max=3600)
-                ),
-                vol.Optional(CONF_TRANSPORTATION_TYPES, default=current_transport_types): cv.multi_select(
-                    TRANSPORTATION_TYPES
-                ),
-                vol.Optional(CONF_USE_PROVIDER_LOGO, default=current_use_logo): bool,
-            }
-        )
-
-        return self.async_show_form(step_id="init", data_schema=schema)
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(fields))
@@ -3,6 +3,8 @@ DEFAULT_PLACE = "Düsseldorf"
 DEFAULT_NAME = "Elbruchstrasse"
 DEFAULT_DEPARTURES = 10
 DEFAULT_SCAN_INTERVAL = 60
+DEFAULT_MAX_SCAN_INTERVAL = 900  # Ceiling of the adaptive polling interval
+ADAPTIVE_POLLING_IMMINENT_MINUTES = 10  # Departures this close keep the shortest adaptive interval
 
 # Configuration keys
 CONF_PROVIDER = "provider"  # NEU
@@ -14,6 +16,9 @@ CONF_TRAFIKLAB_API_KEY = "trafiklab_api_key"  # For Trafiklab API
 CONF_NTA_API_KEY = "nta_api_key"  # For NTA Ireland API (Primary Key)
 CONF_NTA_API_KEY_SECONDARY = "nta_api_key_secondary"  # For NTA Ireland API (Secondary Key, optional)
 CONF_USE_PROVIDER_LOGO = "use_provider_logo"  # Show provider logo instead of transport icon
+CONF_ADAPTIVE_POLLING = "adaptive_polling"  # Derive the polling interval from upcoming departures
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"  # Ceiling for the adaptive polling interval
+CONF_HEDGED_REQUESTS = "hedged_requests"  # Send a second departure request when the first one is slow
 
 # Provider
 PROVIDER_VRR = "vrr"
@@ -35,6 +40,102 @@ API_BASE_URL_KVV = "https://projekte.kvv-efa.de/sl3-alone/XSLT_DM_REQUEST"
 API_BASE_URL_HVV = "https://hvv.efa.de/efa/XML_DM_REQUEST"
 API_BASE_URL_TRAFIKLAB = "https://realtime-api.trafiklab.se/v1"
 API_BASE_URL_NTA_GTFSR = "https://api.nationaltransport.ie/gtfsr"
+
+# Shared registry of departure requests in flight (see single_flight.py)
+DATA_SINGLE_FLIGHT = "single_flight"
+# Shared token-bucket rate limiters per provider and API key (see rate_limiter.py)
+DATA_RATE_LIMITERS = "rate_limiters"
+
+# Persistent daily API call counters (see api_counter.py)
+DATA_API_COUNTERS = "api_counters"
+API_COUNTER_STORAGE_KEY = f"{DOMAIN}.api_counters"
+API_COUNTER_STORAGE_VERSION = 1
+API_COUNTER_SAVE_DELAY = 30  # Seconds to batch counter updates before writing them
+
+# Warm-start snapshot of the last departure board per entry (see warm_start.py)
+WARM_START_STORAGE_VERSION = 1
+WARM_START_SAVE_DELAY = 60  # Seconds to batch snapshot updates before writing them
+
+# Central poll scheduler spreading coordinators over their interval (see scheduler.py)
+DATA_POLL_SCHEDULER = "poll_scheduler"
+POLL_SCHEDULER_WINDOW = 3600  # Seconds of request history kept for the smoothness statistics
+POLL_SCHEDULER_BUCKET = 10  # Seconds per bucket of the smoothness statistics
+
+# Resilient HTTP transport used by all providers (see transport.py)
+HTTP_TIMEOUT = 10  # Seconds per attempt
+HTTP_MAX_ATTEMPTS = 3
+HTTP_BACKOFF_BASE = 1.0  # Seconds; attempt n waits up to base * 2**n
+HTTP_BACKOFF_MAX = 10.0  # Seconds; upper bound of a single backoff (and of Retry-After)
+HTTP_MIN_ATTEMPT_TIME = 2.0  # Seconds of remaining deadline needed to start another attempt
+
+# Integration-owned HTTP session for the transit APIs (see http_session.py)
+DATA_HTTP_SESSION = "http_session"
+HTTP_CONNECTION_LIMIT = 20  # Open connections over all hosts
+HTTP_CONNECTION_LIMIT_PER_HOST = 4  # Parallel connections to a single API host
+HTTP_DNS_CACHE_TTL = 300  # Seconds resolved host addresses are reused
+HTTP_KEEPALIVE_TIMEOUT = 90  # Seconds idle connections are kept, longer than the default polling interval
+
+# Response time percentiles per provider endpoint and hedged requests (see latency.py)
+DATA_LATENCY_TRACKERS = "latency_trackers"
+LATENCY_WINDOW = 200  # Recent response times kept per endpoint
+HEDGE_PERCENTILE = 90  # A hedged request starts once the first one is slower than this percentile
+HEDGE_MIN_SAMPLES = 20  # Response times needed before requests are hedged
+HEDGE_MIN_DELAY = 0.5  # Seconds; a hedged request never starts earlier
+HEDGED_REQUEST_PROVIDERS = [PROVIDER_VRR, PROVIDER_KVV, PROVIDER_HVV]  # EFA departure monitors
+
+# CPU-heavy decode stages run in the executor when they are large (see offload.py)
+DATA_OFFLOADER = "offloader"
+OFFLOAD_INLINE_BUDGET = 0.005  # Seconds a stage may block the event loop
+OFFLOAD_MIN_SIZE = 262144  # Bytes from which a stage runs in the executor before its cost is known
+OFFLOAD_COST_SMOOTHING = 0.2  # Weight of the latest run in the per-byte cost estimate
+
+# Per-refresh performance metrics of each coordinator (see metrics.py)
+REFRESH_METRICS_WINDOW = 100  # Recent refreshes kept for the p50/p95 figures
+
+# Departure timestamps parsed and converted to local time, memoized (see parsers.py)
+DEPARTURE_TIME_CACHE_SIZE = 4096  # Distinct (timestamp, timezone) pairs kept; a large board has a few hundred
+
+# Entities skip writing a state identical to the last one (see state_writes.py)
+STATE_WRITE_MAX_AGE = 300  # Seconds after which an unchanged state is written again to refresh last_updated
+
+# Time budget of one coordinator refresh: a fraction of its polling interval, within bounds
+REFRESH_BUDGET_FRACTION = 0.5
+REFRESH_BUDGET_MIN = 10
+REFRESH_BUDGET_MAX = 45
+
+# Circuit breaker per provider endpoint (see circuit_breaker.py)
+DATA_CIRCUIT_BREAKERS = "circuit_breakers"
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 3  # Consecutive failed requests that open the breaker
+CIRCUIT_BREAKER_RECOVERY_TIMEOUT = 120  # Seconds before a half-open probe request is sent
+
+# GTFS-RT feed hub (shared by all NTA config entries using the same API key)
+DATA_NTA_FEED_HUBS = "nta_feed_hubs"
+NTA_FEED_MAX_AGE = 30  # Seconds a downloaded TripUpdates snapshot is reused
+NTA_FEED_FORMAT_PROTOBUF = "protobuf"
+NTA_FEED_FORMAT_JSON = "json"
+NTA_FEED_PROTOBUF_RETRY_AFTER = 600  # Seconds on the JSON fallback before protobuf is tried again
+NTA_FEED_STREAM_CHUNK_SIZE = 65536  # Bytes of the JSON feed read at a time
+NTA_FEED_MAX_VALUE_SIZE = 4194304  # Characters a single JSON entity may buffer before the feed is rejected
+
+# Mapping für VRR (EFA product classes)
+VRR_TRANSPORTATION_TYPES = {
+    0: "train",  # High-speed trains (ICE, IC, EC)
+    1: "train",  # Regional trains (RE, RB)
+    2: "subway",  # U-Bahn (subway/metro)
+    3: "subway",  # U-Bahn variant
+    4: "tram",  # Tram/Streetcar
+    5: "bus",  # City bus
+    6: "bus",  # Regional bus
+    7: "bus",  # Express bus
+    8: "bus",  # Night bus
+    9: "ferry",  # Ferry/Ship
+    10: "taxi",  # Taxi
+    11: "bus",  # Other/Special transport
+    13: "train",  # Regionalzug (RE)
+    15: "train",  # InterCity (IC)
+    16: "train",  # InterCityExpress (ICE)
+}
+
 # Mapping für KVV
 KVV_TRANSPORTATION_TYPES = {
     1: "train",  # S-Bahn
@@ -54,6 +155,10 @@ HVV_TRANSPORTATION_TYPES = {
     # ... ergänzen je nach Bedarf und API
 }
 
+# Means-of-transport classes of the EFA departure monitor; classes whose type is not
+# enabled are excluded in the request (excludedMeans=checkbox&exclMOT_<class>=1)
+EFA_MEANS_OF_TRANSPORT = tuple(range(20))
+
 # Mapping für Trafiklab (Sweden)
 TRAFIKLAB_TRANSPORTATION_TYPES = {
     "BUS": "bus",
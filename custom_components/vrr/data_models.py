@@ -4,10 +4,15 @@ This module defines standardized data structures that all providers
 (VRR, KVV, HVV, Trafiklab) map their API responses to.
 """
 
-from dataclasses import dataclass
-from datetime import datetime
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, tzinfo
 from enum import Enum
-from typing import Any, Optional
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, List, Optional
+
+from .const import DEPARTURE_TIME_CACHE_SIZE
 
 
 class UnifiedTransportType(str, Enum):
@@ -23,29 +28,117 @@ class UnifiedTransportType(str, Enum):
     UNKNOWN = "unknown"
 
 
-@dataclass
+@lru_cache(maxsize=DEPARTURE_TIME_CACHE_SIZE)
+def _format_time(timestamp: float, tz: tzinfo) -> str:
+    """Return an epoch timestamp as HH:MM in a timezone (memoized, like parse_local_time)."""
+    local = datetime.fromtimestamp(timestamp, tz)
+    return f"{local.hour:02d}:{local.minute:02d}"
+
+
+def _intern(value: Any) -> Any:
+    """Return the interned copy of a string; other values are returned unchanged."""
+    return sys.intern(value) if type(value) is str else value
+
+
+@dataclass(frozen=True, slots=True)
 class UnifiedDeparture:
     """Unified departure data structure for Home Assistant.
 
     All providers map their API responses to this structure,
     ensuring consistent data format in Home Assistant.
+
+    Departures are immutable and compact: times are stored as epoch seconds
+    with the provider's timezone, and line, destination and platform
+    strings are interned, so the same line on a board shares one string.
+    The HH:MM fields and departure_time_obj are computed when read, and the
+    dictionary of to_dict() is built once and then shared by all callers.
     """
 
     line: str
     destination: str
-    departure_time: str  # HH:MM format
-    planned_time: str  # HH:MM format
+    departure_timestamp: float  # Estimated departure, epoch seconds
+    planned_timestamp: float  # Planned departure, epoch seconds
+    tz: tzinfo  # Timezone of the formatted times
     delay: int  # minutes
     platform: Optional[str]
     transportation_type: str
     is_realtime: bool
     minutes_until_departure: int
-    departure_time_obj: datetime  # For internal sorting
     description: Optional[str] = None  # Optional line description
     agency: Optional[str] = None  # Optional agency/operator name (for GTFS)
+    _dict: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_local_times(
+        cls,
+        line: str,
+        destination: str,
+        departure_time_obj: datetime,
+        planned_time_obj: datetime,
+        delay: int,
+        platform: Optional[str],
+        transportation_type: str,
+        is_realtime: bool,
+        minutes_until_departure: int,
+        description: Optional[str] = None,
+        agency: Optional[str] = None,
+    ) -> "UnifiedDeparture":
+        """Create a departure from its (estimated) departure and planned local times.
+
+        Args:
+            line: Line number
+            destination: Destination name
+            departure_time_obj: Estimated departure in the provider's timezone
+            planned_time_obj: Planned departure in the provider's timezone
+            delay: Delay in minutes
+            platform: Platform or track
+            transportation_type: Unified transportation type
+            is_realtime: True if the departure has realtime data
+            minutes_until_departure: Minutes from now until the departure
+            description: Optional line description
+            agency: Optional agency/operator name
+
+        Returns:
+            UnifiedDeparture with interned strings
+        """
+        return cls(
+            line=_intern(line),
+            destination=_intern(destination),
+            departure_timestamp=departure_time_obj.timestamp(),
+            planned_timestamp=planned_time_obj.timestamp(),
+            tz=departure_time_obj.tzinfo,
+            delay=delay,
+            platform=_intern(platform),
+            transportation_type=transportation_type,
+            is_realtime=is_realtime,
+            minutes_until_departure=minutes_until_departure,
+            description=description,
+            agency=agency,
+        )
+
+    @property
+    def departure_time_obj(self) -> datetime:
+        """Return the estimated departure in the provider's timezone."""
+        return datetime.fromtimestamp(self.departure_timestamp, self.tz)
+
+    @property
+    def departure_time(self) -> str:
+        """Return the estimated departure in HH:MM format."""
+        return _format_time(self.departure_timestamp, self.tz)
+
+    @property
+    def planned_time(self) -> str:
+        """Return the planned departure in HH:MM format."""
+        return _format_time(self.planned_timestamp, self.tz)
 
     def to_dict(self) -> dict:
-        """Convert to dictionary for Home Assistant attributes."""
+        """Convert to dictionary for Home Assistant attributes.
+
+        The dictionary is built on the first call and returned by every
+        later call; callers must not modify it.
+        """
+        if self._dict is not None:
+            return self._dict
         result = {
             "line": self.line,
             "destination": self.destination,
@@ -61,9 +154,72 @@ class UnifiedDeparture:
             result["description"] = self.description
         if self.agency:
             result["agency"] = self.agency
+        object.__setattr__(self, "_dict", result)
         return result
 
 
+@dataclass
+class DepartureBoard:
+    """Departures of one refresh, parsed and aggregated once for all entities.
+
+    The coordinator builds the board from its raw data during each refresh
+    (see VRRDataUpdateCoordinator.async_update_board); the departure sensor
+    and the delay binary sensor only read it.
+    """
+
+    departures: List[UnifiedDeparture]  # Earliest departures of the enabled types, sorted
+    departure_dicts: List[dict]  # departures converted with to_dict()
+    events_in: int = 0  # Stop events in the response
+    delayed_count: int = 0
+    on_time_count: int = 0
+    total_delay: int = 0  # minutes
+    max_delay: int = 0  # minutes
+    delays: List[int] = field(default_factory=list)  # Delays of the delayed departures in order
+
+    @classmethod
+    def from_departures(cls, departures: List[UnifiedDeparture], events_in: int = 0) -> "DepartureBoard":
+        """Aggregate the delays of sorted departures in one pass.
+
+        Args:
+            departures: Parsed, filtered and sorted departures
+            events_in: Stop events they were parsed from
+
+        Returns:
+            DepartureBoard of the departures
+        """
+        board = cls(departures=departures, departure_dicts=[], events_in=events_in)
+        for departure in departures:
+            delay = departure.delay
+            if delay > 0:
+                board.delayed_count += 1
+                board.total_delay += delay
+                board.delays.append(delay)
+                board.max_delay = max(board.max_delay, delay)
+            else:
+                board.on_time_count += 1
+            board.departure_dicts.append(departure.to_dict())
+        return board
+
+    @property
+    def average_delay(self) -> float:
+        """Return the average delay of the delayed departures in minutes, rounded to one decimal."""
+        return round(self.total_delay / self.delayed_count, 1) if self.delayed_count else 0
+
+    @property
+    def earliest_departure(self) -> Optional[str]:
+        """Return the earliest departure time in HH:MM format."""
+        if not self.departures:
+            return None
+        return min(self.departures, key=attrgetter("departure_timestamp")).departure_time
+
+    @property
+    def latest_departure(self) -> Optional[str]:
+        """Return the latest departure time in HH:MM format."""
+        if not self.departures:
+            return None
+        return max(self.departures, key=attrgetter("departure_timestamp")).departure_time
+
+
 @dataclass
 class UnifiedStop:
     """Unified stop data structure for stop search results.
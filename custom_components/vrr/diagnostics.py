@@ -7,9 +7,16 @@ from typing import Any
 from homeassistant.components.diagnostics import async_redact_data
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers import entity_registry as er
 
-from .const import DOMAIN
+from .circuit_breaker import CircuitBreaker
+from .const import DATA_HTTP_SESSION, DATA_OFFLOADER, DOMAIN
+from .http_session import TransitSession
+from .latency import LatencyTracker
+from .metrics import RefreshMetrics
+from .offload import Offloader
+from .rate_limiter import RateLimiter
+from .scheduler import PollScheduler
+from .transport import ResilientTransport
 
 TO_REDACT = {
     "station_id",
@@ -21,26 +28,8 @@ TO_REDACT = {
 async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
     """Return diagnostics for a config entry."""
 
-    # Get coordinator from hass.data
-    coordinator = None
-
-    # First try to get from entity registry
-    entity_registry = er.async_get(hass)
-    entities = er.async_entries_for_config_entry(entity_registry, entry.entry_id)
-
-    for entity in entities:
-        if entity.platform == DOMAIN:
-            entity_obj = hass.data.get("entity_components", {}).get("sensor")
-            if entity_obj:
-                for ent in entity_obj.entities:
-                    if ent.unique_id == entity.unique_id:
-                        coordinator = ent.coordinator
-                        break
-
-    # Fallback: try to get coordinator directly from hass.data (useful for tests)
-    if not coordinator:
-        coordinator_key = f"{entry.entry_id}_coordinator"
-        coordinator = hass.data.get(DOMAIN, {}).get(coordinator_key)
+    # The coordinator is shared by all entities of the entry
+    coordinator = hass.data.get(DOMAIN, {}).get(f"{entry.entry_id}_coordinator")
 
     diagnostics_data = {
         "entry": {
@@ -58,11 +47,51 @@ async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigE
                 coordinator.last_update_success_time.isoformat() if coordinator.last_update_success_time else None
             ),
             "update_interval": str(coordinator.update_interval),
+            "adaptive_polling": coordinator.adaptive_polling is not None,
+            "hedged_requests": getattr(coordinator.provider_instance, "hedge_requests", False) is True,
             "api_calls_today": coordinator._api_calls_today,
             "last_api_reset": coordinator._last_api_reset.isoformat(),
             "departures_limit": coordinator.departures_limit,
+            "stale": coordinator.stale,
+            "refresh_budget": coordinator.refresh_budget,
+            "deadline_misses": coordinator.deadline_misses,
         }
 
+        refresh_metrics = getattr(coordinator, "refresh_metrics", None)
+        if isinstance(refresh_metrics, RefreshMetrics):
+            diagnostics_data["refresh_metrics"] = refresh_metrics.as_dict()
+
+        poll_scheduler = getattr(coordinator, "poll_scheduler", None)
+        if isinstance(poll_scheduler, PollScheduler):
+            diagnostics_data["poll_scheduler"] = {
+                "phase": round(poll_scheduler.phase(coordinator.scheduler_key), 3),
+                **poll_scheduler.as_dict(),
+            }
+
+        rate_limiter = getattr(coordinator.provider_instance, "rate_limiter", None)
+        if isinstance(rate_limiter, RateLimiter):
+            diagnostics_data["rate_limiter"] = rate_limiter.as_dict()
+
+        circuit_breaker = getattr(coordinator.provider_instance, "circuit_breaker", None)
+        if isinstance(circuit_breaker, CircuitBreaker):
+            diagnostics_data["circuit_breaker"] = circuit_breaker.as_dict()
+
+        transport = getattr(coordinator.provider_instance, "transport", None)
+        if isinstance(transport, ResilientTransport):
+            diagnostics_data["transport"] = transport.metrics.as_dict()
+
+        latency_tracker = getattr(coordinator.provider_instance, "latency_tracker", None)
+        if isinstance(latency_tracker, LatencyTracker):
+            diagnostics_data["latency"] = latency_tracker.as_dict()
+
+        offloader = hass.data.get(DOMAIN, {}).get(DATA_OFFLOADER)
+        if isinstance(offloader, Offloader):
+            diagnostics_data["offload"] = offloader.as_dict()
+
+        transit_session = hass.data.get(DOMAIN, {}).get(DATA_HTTP_SESSION)
+        if isinstance(transit_session, TransitSession):
+            diagnostics_data["http_session"] = transit_session.as_dict()
+
         # Add sample of last data (anonymized)
         if coordinator.data:
             stop_events = coordinator.data.get("stopEvents", [])
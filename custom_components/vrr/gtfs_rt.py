@@ -0,0 +1,841 @@
+"""Shared GTFS-Realtime TripUpdates feed for the NTA provider.
+
+The NTA API only offers the national TripUpdates feed, so every stop needs
+the complete multi-megabyte download. All NTA config entries using the same
+API key share one GTFSRealtimeFeedHub stored in hass.data[DOMAIN]. The hub
+downloads and decodes the feed at most once per NTA_FEED_MAX_AGE seconds and
+hands each coordinator the slice for its stop. The requests of a download
+are counted by the hub's transport and by the caller that triggered it.
+
+The feed is requested as GTFS-RT protobuf and decoded with the
+gtfs-realtime-bindings FeedMessage. The JSON variant of the feed is several
+times larger and slower to decode; it is only used as a fallback when the
+bindings are missing or a protobuf payload cannot be decoded. After an
+undecodable payload the hub tries protobuf again once it has been on JSON
+for NTA_FEED_PROTOBUF_RETRY_AFTER seconds. The JSON feed
+is decoded entity by entity while it is downloaded, and only the
+stop_time_updates of the stops served by the hub are kept, so its memory use
+grows with the matches instead of the feed size.
+
+Downloads are revalidated with ETag / Last-Modified. If the server answers
+"304 Not Modified" or the feed header carries the same timestamp as the
+current snapshot, the snapshot is kept as is, and so are the stop event
+payloads already handed out to the coordinators.
+"""
+
+import asyncio
+import codecs
+import json
+import logging
+import re
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import aiohttp
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .circuit_breaker import async_get_circuit_breaker
+from .const import (
+    API_BASE_URL_NTA_GTFSR,
+    DATA_NTA_FEED_HUBS,
+    DOMAIN,
+    NTA_FEED_FORMAT_JSON,
+    NTA_FEED_FORMAT_PROTOBUF,
+    NTA_FEED_MAX_AGE,
+    NTA_FEED_MAX_VALUE_SIZE,
+    NTA_FEED_PROTOBUF_RETRY_AFTER,
+    NTA_FEED_STREAM_CHUNK_SIZE,
+    PROVIDER_NTA_IE,
+)
+from .http_cache import ConditionalRequestCache
+from .latency import async_get_latency_tracker
+from .offload import STAGE_PROTOBUF_DECODE, STAGE_STOP_EVENTS, async_get_offloader
+from .rate_limiter import async_get_rate_limiter
+from .transport import RESPONSE_BYTES, ResilientTransport, TransportMetrics
+
+try:
+    from google.protobuf.message import DecodeError
+    from google.transit import gtfs_realtime_pb2
+except ImportError:  # pragma: no cover - gtfs-realtime-bindings is a manifest requirement
+    gtfs_realtime_pb2 = None
+    DecodeError = ValueError
+
+_LOGGER = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class FeedSnapshot:
+    """One decoded TripUpdates feed download.
+
+    The snapshot indexes every stop_time_update by stop_id once, so looking up
+    a stop costs O(matches) instead of a scan over the whole feed.
+    """
+
+    def __init__(
+        self,
+        stop_index: Dict[str, List[Tuple[Any, Any]]],
+        entity_count: int,
+        fetched_at: float,
+        from_protobuf: bool = False,
+        feed_timestamp: Optional[int] = None,
+        stop_ids: Optional[FrozenSet[str]] = None,
+    ):
+        """Initialize the snapshot.
+
+        Use from_entities(), from_feed_message() or async_decode_json_feed() to
+        build a snapshot from a feed.
+
+        Args:
+            stop_index: Mapping of stop_id to (trip, stop_time_update) pairs
+            entity_count: Number of entities in the feed
+            fetched_at: time.monotonic() timestamp of the download
+            from_protobuf: True if the index holds protobuf messages instead of dicts
+            feed_timestamp: header.timestamp of the feed (POSIX seconds), if present
+            stop_ids: The only stops indexed, or None if all stops are indexed
+        """
+        self.entity_count = entity_count
+        self.fetched_at = fetched_at
+        self.from_protobuf = from_protobuf
+        self.feed_timestamp = feed_timestamp
+        self.stop_ids = stop_ids
+        self._stop_index = stop_index
+        self._payloads: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
+    @classmethod
+    def from_entities(
+        cls, entities: List[Any], fetched_at: float, feed_timestamp: Optional[int] = None
+    ) -> "FeedSnapshot":
+        """Build a snapshot from the 'entity' list of a GTFS-RT JSON feed."""
+        return cls(_build_stop_index(entities), len(entities), fetched_at, feed_timestamp=feed_timestamp)
+
+    @classmethod
+    def from_feed_message(cls, feed: Any, fetched_at: float) -> "FeedSnapshot":
+        """Build a snapshot from a decoded gtfs_realtime_pb2.FeedMessage."""
+        feed_timestamp = feed.header.timestamp if feed.header.HasField("timestamp") else None
+        return cls(
+            _build_stop_index_protobuf(feed),
+            len(feed.entity),
+            fetched_at,
+            from_protobuf=True,
+            feed_timestamp=feed_timestamp,
+        )
+
+    @property
+    def age(self) -> float:
+        """Return the age of the snapshot in seconds."""
+        return time.monotonic() - self.fetched_at
+
+    @property
+    def stop_count(self) -> int:
+        """Return the number of distinct stop_ids in the snapshot."""
+        return len(self._stop_index)
+
+    def covers(self, stop_ids: Iterable[str]) -> bool:
+        """Return True if the snapshot indexed the departures of all given stops."""
+        return self.stop_ids is None or self.stop_ids.issuperset(stop_ids)
+
+    def stop_events(self, stop_id: str, max_departures: int) -> List[Dict[str, Any]]:
+        """Return the departures of one stop in stopEvents format.
+
+        Args:
+            stop_id: GTFS stop_id to extract
+            max_departures: Maximum number of stop events to return
+
+        Returns:
+            List of stop events (same structure as EFA stopEvents)
+        """
+        now = dt_util.now()
+        stop_events: List[Dict[str, Any]] = []
+
+        for trip, stop_time_update in self._stop_index.get(stop_id, ()):
+            if self.from_protobuf:
+                trip, stop_time_update = _trip_to_dict(trip), _stop_time_update_to_dict(stop_time_update)
+            stop_event = _build_stop_event(trip, stop_time_update, stop_id, now)
+            if stop_event is None:
+                continue
+
+            stop_events.append(stop_event)
+            if len(stop_events) >= max_departures:
+                break
+
+        _LOGGER.debug(
+            "NTA: Found %d departures for stop %s in %d entities", len(stop_events), stop_id, self.entity_count
+        )
+        return stop_events
+
+    def match_count(self, stop_id: str) -> int:
+        """Return the number of indexed stop_time_updates of one stop."""
+        return len(self._stop_index.get(stop_id, ()))
+
+    def cached_stop_events_payload(self, stop_id: str, max_departures: int) -> Optional[Dict[str, Any]]:
+        """Return the stopEvents payload of one stop if it was built already."""
+        return self._payloads.get((stop_id, max_departures))
+
+    def store_stop_events_payload(
+        self, stop_id: str, max_departures: int, stop_events: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Store the stop events of one stop as its payload, unless another caller stored one first.
+
+        The payload is built once per snapshot: repeated requests for an
+        unchanged snapshot return the same object, so coordinators can tell
+        that nothing changed with an identity check.
+
+        Returns:
+            The stored payload
+        """
+        return self._payloads.setdefault((stop_id, max_departures), {"stopEvents": stop_events})
+
+
+def _feed_timestamp_from_json(json_data: Dict[str, Any]) -> Optional[int]:
+    """Return header.timestamp of a GTFS-RT JSON feed (int64 values are strings)."""
+    header = json_data.get("header")
+    if not isinstance(header, dict):
+        return None
+    try:
+        return int(header["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _peek_feed_timestamp(payload: bytes) -> Optional[int]:
+    """Read header.timestamp of a protobuf feed without decoding its entities.
+
+    FeedMessage.header is field 1 and serialized first, so only the leading
+    length-delimited record has to be parsed.
+
+    Returns:
+        The feed timestamp, or None if it cannot be read cheaply
+    """
+    # Tag of field 1 with wire type 2 (length-delimited)
+    if gtfs_realtime_pb2 is None or not payload or payload[0] != 0x0A:
+        return None
+
+    length = 0
+    shift = 0
+    pos = 1
+    while True:
+        if pos >= len(payload) or shift > 63:
+            return None
+        byte = payload[pos]
+        pos += 1
+        length |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+        shift += 7
+
+    if pos + length > len(payload):
+        return None
+
+    header = gtfs_realtime_pb2.FeedHeader()
+    try:
+        header.ParseFromString(payload[pos : pos + length])
+    except DecodeError:
+        return None
+    return header.timestamp if header.HasField("timestamp") else None
+
+
+def _build_stop_index(entities: List[Any]) -> Dict[str, List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+    """Index the stop_time_updates of all trips by stop_id in one pass.
+
+    Only the first stop_time_update of a trip is indexed for each stop, and
+    trips keep their feed order within a stop.
+
+    Returns:
+        Mapping of stop_id to a list of (trip, stop_time_update) pairs
+    """
+    index: Dict[str, List[Tuple[Dict[str, Any], Dict[str, Any]]]] = {}
+    for entity in entities:
+        _index_entity(index, entity)
+    return index
+
+
+def _index_entity(
+    index: Dict[str, List[Tuple[Dict[str, Any], Dict[str, Any]]]],
+    entity: Any,
+    stop_ids: Optional[FrozenSet[str]] = None,
+) -> None:
+    """Add the stop_time_updates of one JSON entity to a stop index.
+
+    Args:
+        index: Mapping of stop_id to (trip, stop_time_update) pairs to extend
+        entity: One element of the feed's 'entity' list
+        stop_ids: Only index these stops (all stops if None)
+    """
+    if not isinstance(entity, dict):
+        return
+
+    trip_update = entity.get("trip_update")
+    if not isinstance(trip_update, dict):
+        return
+
+    stop_time_updates = trip_update.get("stop_time_update")
+    if not isinstance(stop_time_updates, list) or len(stop_time_updates) == 0:
+        return
+
+    trip = trip_update.get("trip", {})
+    if not isinstance(trip, dict):
+        return
+
+    seen_stop_ids = set()
+    for stop_time_update in stop_time_updates:
+        if not isinstance(stop_time_update, dict):
+            continue
+        stop_id = stop_time_update.get("stop_id")
+        if not stop_id or stop_id in seen_stop_ids or (stop_ids is not None and stop_id not in stop_ids):
+            continue
+        seen_stop_ids.add(stop_id)
+        index.setdefault(stop_id, []).append((trip, stop_time_update))
+
+
+class _JSONStream:
+    """Decode the values of a JSON document one by one while it is downloaded.
+
+    Only the undecoded rest of the current chunk and the value being decoded
+    are buffered, never the whole document.
+    """
+
+    def __init__(self, stream: aiohttp.StreamReader):
+        """Initialize the reader.
+
+        Args:
+            stream: Body of the response
+        """
+        self._stream = stream
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    async def _async_fill(self) -> bool:
+        """Append the next chunk of the stream to the buffer.
+
+        Returns:
+            False at the end of the stream
+
+        Raises:
+            ValueError: If a single value grows beyond NTA_FEED_MAX_VALUE_SIZE
+        """
+        if self._eof:
+            return False
+        chunk = await self._stream.read(NTA_FEED_STREAM_CHUNK_SIZE)
+        if not chunk:
+            self._eof = True
+            self._buffer += self._text_decoder.decode(b"", final=True)
+            return False
+
+        # Drop the decoded part before appending
+        self._buffer = self._buffer[self._pos :]
+        self._pos = 0
+        if len(self._buffer) > NTA_FEED_MAX_VALUE_SIZE:
+            raise ValueError("JSON feed contains a value that is too large")
+        self._buffer += self._text_decoder.decode(chunk)
+        return True
+
+    async def async_peek(self) -> str:
+        """Return the next character after whitespace without consuming it ('' at the end)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not await self._async_fill():
+                return ""
+
+    async def async_expect(self, characters: str) -> str:
+        """Consume the next character, which must be one of the given ones.
+
+        Raises:
+            ValueError: If another character or the end of the document follows
+        """
+        character = await self.async_peek()
+        if not character or character not in characters:
+            raise ValueError(f"Expected one of {characters!r} in JSON feed, got {character!r}")
+        self._pos += 1
+        return character
+
+    async def async_value(self) -> Any:
+        """Decode and consume the next complete JSON value.
+
+        Raises:
+            ValueError: If the document is not valid JSON
+        """
+        await self.async_peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # The value may continue in the next chunk
+                if await self._async_fill():
+                    continue
+                raise
+            if end == len(self._buffer) and isinstance(value, (int, float)) and await self._async_fill():
+                # A number at the end of the buffer may have more digits in the next chunk
+                continue
+            self._pos = end
+            return value
+
+
+async def async_decode_json_feed(
+    stream: aiohttp.StreamReader, stop_ids: Optional[FrozenSet[str]] = None
+) -> FeedSnapshot:
+    """Decode a GTFS-RT JSON feed while it is downloaded.
+
+    Entities are decoded one at a time and dropped after their
+    stop_time_updates for the given stops have been indexed.
+
+    Args:
+        stream: Body of the TripUpdates response
+        stop_ids: Only keep these stops (all stops if None)
+
+    Returns:
+        Snapshot of the given stops
+
+    Raises:
+        ValueError: If the body is not a valid JSON feed
+    """
+    reader = _JSONStream(stream)
+    index: Dict[str, List[Tuple[Dict[str, Any], Dict[str, Any]]]] = {}
+    entity_count = 0
+    feed_timestamp: Optional[int] = None
+
+    await reader.async_expect("{")
+    if await reader.async_peek() == "}":
+        await reader.async_expect("}")
+    else:
+        while True:
+            key = await reader.async_value()
+            await reader.async_expect(":")
+            if key == "entity" and await reader.async_peek() == "[":
+                await reader.async_expect("[")
+                if await reader.async_peek() == "]":
+                    await reader.async_expect("]")
+                else:
+                    while True:
+                        _index_entity(index, await reader.async_value(), stop_ids)
+                        entity_count += 1
+                        if await reader.async_expect(",]") == "]":
+                            break
+            else:
+                value = await reader.async_value()
+                if key == "header":
+                    feed_timestamp = _feed_timestamp_from_json({"header": value})
+            if await reader.async_expect(",}") == "}":
+                break
+
+    return FeedSnapshot(index, entity_count, time.monotonic(), feed_timestamp=feed_timestamp, stop_ids=stop_ids)
+
+
+def _build_stop_index_protobuf(feed: Any) -> Dict[str, List[Tuple[Any, Any]]]:
+    """Index the stop_time_updates of a FeedMessage by stop_id in one pass.
+
+    Same rules as _build_stop_index(), but reads the protobuf message directly
+    and keeps the (trip, stop_time_update) messages without converting them.
+    """
+    index: Dict[str, List[Tuple[Any, Any]]] = {}
+
+    for entity in feed.entity:
+        if not entity.HasField("trip_update"):
+            continue
+
+        trip_update = entity.trip_update
+        trip = trip_update.trip
+        seen_stop_ids = set()
+        for stop_time_update in trip_update.stop_time_update:
+            stop_id = stop_time_update.stop_id
+            if not stop_id or stop_id in seen_stop_ids:
+                continue
+            seen_stop_ids.add(stop_id)
+            index.setdefault(stop_id, []).append((trip, stop_time_update))
+
+    return index
+
+
+def _decode_feed_message(payload: bytes) -> FeedSnapshot:
+    """Decode a protobuf feed and index it (does not touch Home Assistant state).
+
+    Raises:
+        DecodeError: If the payload is not a valid FeedMessage
+    """
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.ParseFromString(payload)
+    return FeedSnapshot.from_feed_message(feed, time.monotonic())
+
+
+def _trip_to_dict(trip: Any) -> Dict[str, Any]:
+    """Convert a TripDescriptor message to the fields used by _build_stop_event."""
+    return {"trip_id": trip.trip_id, "route_id": trip.route_id}
+
+
+def _stop_time_event_to_dict(event: Any) -> Dict[str, Any]:
+    """Convert a StopTimeEvent message to a dict with only the fields that are set."""
+    result: Dict[str, Any] = {}
+    if event.HasField("delay"):
+        result["delay"] = event.delay
+    if event.HasField("time"):
+        result["time"] = event.time
+    return result
+
+
+def _stop_time_update_to_dict(stop_time_update: Any) -> Dict[str, Any]:
+    """Convert a StopTimeUpdate message to the fields used by _build_stop_event."""
+    relationship = gtfs_realtime_pb2.TripUpdate.StopTimeUpdate.ScheduleRelationship.Name(
+        stop_time_update.schedule_relationship
+    )
+    result: Dict[str, Any] = {
+        "stop_id": stop_time_update.stop_id,
+        "schedule_relationship": relationship,
+    }
+    if stop_time_update.HasField("departure"):
+        result["departure"] = _stop_time_event_to_dict(stop_time_update.departure)
+    if stop_time_update.HasField("arrival"):
+        result["arrival"] = _stop_time_event_to_dict(stop_time_update.arrival)
+    return result
+
+
+def _build_stop_event(
+    trip: Dict[str, Any], stop_time_update: Dict[str, Any], stop_id: str, now: datetime
+) -> Optional[Dict[str, Any]]:
+    """Convert a GTFS-RT trip/stop_time_update pair to the stopEvents format.
+
+    Returns:
+        Stop event dictionary, or None if the stop is canceled or skipped
+    """
+    schedule_relationship = stop_time_update.get("schedule_relationship", "SCHEDULED")
+    if schedule_relationship in ["CANCELED", "SKIPPED"]:
+        return None
+
+    route_id = trip.get("route_id", "")
+    trip_id = trip.get("trip_id", "")
+
+    # Extract route info from route_id (without GTFS Static)
+    # Route IDs in NTA often contain the route number
+    route_short_name = route_id.split("_")[0] if route_id else ""
+
+    # Default route type to bus (3), detect Luas (tram) from route_id
+    route_type = 3
+    if route_short_name and route_short_name.lower() in ["red", "green", "luas"]:
+        route_type = 0
+
+    # Get delay (in seconds)
+    departure = stop_time_update.get("departure") or {}
+    arrival = stop_time_update.get("arrival") or {}
+    delay_seconds = departure.get("delay") or arrival.get("delay") or 0
+
+    # Use route_id as destination placeholder (without GTFS Static)
+    destination = route_short_name or "Unknown"
+
+    # POSIX timestamp from departure, falling back to arrival
+    event_time = departure.get("time") or arrival.get("time")
+    planned_time = now
+    if event_time:
+        try:
+            planned_time = datetime.fromtimestamp(int(event_time), tz=now.tzinfo)
+        except (TypeError, ValueError, OSError, OverflowError):
+            planned_time = now
+    estimated_time = planned_time + timedelta(seconds=delay_seconds)
+
+    platform = stop_time_update.get("platform_code") or stop_time_update.get("platform") or ""
+
+    return {
+        "departureTimePlanned": planned_time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "departureTimeEstimated": estimated_time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "transportation": {
+            "number": route_short_name,
+            "description": "",
+            "destination": {"name": destination},
+            "product": {"class": route_type},
+        },
+        "platform": {"name": platform},
+        "realtimeStatus": ["MONITORED"] if delay_seconds != 0 else [],
+        "route_id": route_id,
+        "trip_id": trip_id,
+        "stop_id": stop_time_update.get("stop_id", stop_id),
+        "delay_seconds": delay_seconds,
+    }
+
+
+class GTFSRealtimeFeedHub:
+    """Download the TripUpdates feed once and share it between all NTA stops."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api_key: str,
+        api_key_secondary: Optional[str] = None,
+        max_age: float = NTA_FEED_MAX_AGE,
+        feed_format: Optional[str] = None,
+    ):
+        """Initialize the feed hub.
+
+        Args:
+            hass: Home Assistant instance
+            api_key: NTA Primary API key
+            api_key_secondary: NTA Secondary API key (optional fallback)
+            max_age: Seconds a downloaded snapshot is reused
+            feed_format: NTA_FEED_FORMAT_PROTOBUF or NTA_FEED_FORMAT_JSON
+                (defaults to protobuf when gtfs-realtime-bindings is available)
+        """
+        if feed_format is None:
+            feed_format = NTA_FEED_FORMAT_PROTOBUF if gtfs_realtime_pb2 is not None else NTA_FEED_FORMAT_JSON
+        self.hass = hass
+        self.api_key = api_key
+        self.api_key_secondary = api_key_secondary
+        self.max_age = max_age
+        self.feed_format = feed_format
+        # time.monotonic() at which protobuf is tried again after falling back to JSON
+        self._protobuf_retry_at: Optional[float] = None
+        self.download_count = 0
+        self._snapshot: Optional[FeedSnapshot] = None
+        self._http_cache = ConditionalRequestCache()
+        # Longer timeout than the departure APIs: the feed is several megabytes
+        self.transport = ResilientTransport(hass, "NTA", timeout=15)
+        self._lock = asyncio.Lock()
+        self._stop_ids: Dict[str, int] = {}
+
+    @property
+    def stop_ids(self) -> List[str]:
+        """Return the stop_ids currently served by this hub."""
+        return list(self._stop_ids)
+
+    def add_stop(self, stop_id: str) -> None:
+        """Register a stop that reads from this hub."""
+        self._stop_ids[stop_id] = self._stop_ids.get(stop_id, 0) + 1
+
+    def remove_stop(self, stop_id: str) -> None:
+        """Unregister a stop that reads from this hub."""
+        count = self._stop_ids.get(stop_id, 0) - 1
+        if count > 0:
+            self._stop_ids[stop_id] = count
+        else:
+            self._stop_ids.pop(stop_id, None)
+
+    async def async_get_snapshot(
+        self,
+        deadline: Optional[float] = None,
+        stop_id: Optional[str] = None,
+        metrics: Optional[TransportMetrics] = None,
+    ) -> Optional[FeedSnapshot]:
+        """Return a snapshot of the feed, downloading it only if it is outdated.
+
+        Concurrent callers wait for the same download instead of starting their own.
+
+        Args:
+            deadline: time.monotonic() by which a download must be finished
+            stop_id: Stop the snapshot must cover (a JSON snapshot only holds the
+                stops registered at the time of its download)
+            metrics: Counters of the caller; a download started for this call
+                adds its requests, bytes and latencies to them
+        """
+        snapshot = self._snapshot
+        if self._is_current(snapshot, stop_id):
+            return snapshot
+
+        async with self._lock:
+            # Another stop may have refreshed the feed while we were waiting
+            snapshot = self._snapshot
+            if self._is_current(snapshot, stop_id):
+                return snapshot
+
+            start = self.transport.metrics.copy() if metrics is not None else None
+            try:
+                snapshot = await self._async_download(deadline)
+            finally:
+                if metrics is not None:
+                    metrics.add_since(self.transport.metrics, start)
+            if snapshot is None:
+                return None
+
+            self._snapshot = snapshot
+            return snapshot
+
+    async def async_get_stop_events(
+        self,
+        stop_id: str,
+        max_departures: int,
+        deadline: Optional[float] = None,
+        metrics: Optional[TransportMetrics] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Return the departures of one stop from the shared feed.
+
+        Args:
+            stop_id: GTFS stop_id
+            max_departures: Maximum number of stop events to return
+            deadline: time.monotonic() by which a download must be finished
+            metrics: Counters of the caller, see async_get_snapshot
+
+        Returns:
+            Dictionary with 'stopEvents' key, or None if the feed is unavailable
+        """
+        snapshot = await self.async_get_snapshot(deadline, stop_id, metrics)
+        if snapshot is None:
+            return None
+        payload = snapshot.cached_stop_events_payload(stop_id, max_departures)
+        if payload is not None:
+            return payload
+        # Busy stops of a protobuf snapshot convert many messages, see offload.py
+        stop_events = await async_get_offloader(self.hass).async_run(
+            STAGE_STOP_EVENTS, snapshot.match_count(stop_id), snapshot.stop_events, stop_id, max_departures
+        )
+        return snapshot.store_stop_events_payload(stop_id, max_departures, stop_events)
+
+    def _is_current(self, snapshot: Optional[FeedSnapshot], stop_id: Optional[str]) -> bool:
+        """Return True if a snapshot is recent enough and covers the stop."""
+        if snapshot is None or snapshot.age >= self.max_age:
+            return False
+        return stop_id is None or snapshot.covers((stop_id,))
+
+    async def _async_download(self, deadline: Optional[float] = None) -> Optional[FeedSnapshot]:
+        """Download and decode the TripUpdates feed.
+
+        Args:
+            deadline: time.monotonic() by which the download must be finished
+
+        Returns:
+            A new snapshot of the feed, the current one if the feed has not
+            changed, or None on error
+        """
+        url = f"{API_BASE_URL_NTA_GTFSR}/v2/TripUpdates"
+        api_key = self.api_key
+
+        # Runs at most three times: once more after switching to the secondary
+        # key and once more after falling back to the JSON feed
+        while True:
+            if self._protobuf_retry_at is not None and time.monotonic() >= self._protobuf_retry_at:
+                _LOGGER.debug("Trying the NTA protobuf feed again")
+                self._protobuf_retry_at = None
+                self.feed_format = NTA_FEED_FORMAT_PROTOBUF
+                self._http_cache.clear()
+            headers = {
+                "User-Agent": "Mozilla/5.0 (compatible; HomeAssistant NTA Integration)",
+                "x-api-key": api_key,
+            }
+            # Revalidate the current snapshot instead of downloading it again,
+            # unless stops were added since it was decoded
+            cached = self._http_cache.payload(url)
+            if cached is not None and cached.covers(self._stop_ids):
+                headers.update(self._http_cache.request_headers(url))
+            # The API serves protobuf unless JSON is requested explicitly
+            json_format = self.feed_format == NTA_FEED_FORMAT_JSON
+            # A JSON download keeps the registered stops only (all while none are registered)
+            stop_ids = frozenset(self._stop_ids) or None
+            self.download_count += 1
+
+            response = await self.transport.request(
+                url,
+                params={"format": "json"} if json_format else {},
+                headers=headers,
+                response_format=partial(async_decode_json_feed, stop_ids=stop_ids) if json_format else RESPONSE_BYTES,
+                # The feed download counts against the rate limit of the API key it uses
+                rate_limiter=async_get_rate_limiter(self.hass, PROVIDER_NTA_IE, api_key),
+                circuit_breaker=async_get_circuit_breaker(self.hass, PROVIDER_NTA_IE),
+                deadline=deadline,
+                latency_tracker=async_get_latency_tracker(self.hass, PROVIDER_NTA_IE),
+            )
+
+            if response.status == 401 and self.api_key_secondary and api_key == self.api_key:
+                _LOGGER.info("NTA Primary API key failed (401), trying Secondary key...")
+                api_key = self.api_key_secondary
+                continue
+
+            if response.not_modified:
+                snapshot = self._http_cache.payload(url)
+                if snapshot is None:
+                    _LOGGER.warning("NTA API returned 304 without a cached snapshot")
+                    return None
+                _LOGGER.debug("NTA TripUpdates feed not modified, keeping current snapshot")
+                snapshot.fetched_at = time.monotonic()
+                return snapshot
+
+            if not response.ok:
+                return None
+
+            if json_format:
+                snapshot = response.data
+                _LOGGER.debug(
+                    "NTA API returned %d entities, kept %d of %d stops",
+                    snapshot.entity_count,
+                    snapshot.stop_count,
+                    len(self._stop_ids),
+                )
+                snapshot = self._unchanged_snapshot(snapshot.feed_timestamp) or snapshot
+            else:
+                payload = response.data
+                snapshot = self._unchanged_snapshot(_peek_feed_timestamp(payload))
+                if snapshot is None:
+                    try:
+                        snapshot = await self._async_decode_protobuf(payload)
+                    except DecodeError as e:
+                        _LOGGER.warning("NTA API returned invalid protobuf, falling back to JSON: %s", e)
+                        self.feed_format = NTA_FEED_FORMAT_JSON
+                        self._protobuf_retry_at = time.monotonic() + NTA_FEED_PROTOBUF_RETRY_AFTER
+                        self._http_cache.clear()
+                        continue
+
+            self._http_cache.store(url, response.headers, snapshot)
+            return snapshot
+
+    def _unchanged_snapshot(self, feed_timestamp: Optional[int]) -> Optional[FeedSnapshot]:
+        """Return the current snapshot if a download carries the same feed timestamp.
+
+        The snapshot is marked as fresh again, so its index and the stop event
+        payloads built from it are reused instead of being rebuilt.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or feed_timestamp is None or snapshot.feed_timestamp != feed_timestamp:
+            return None
+        if not snapshot.covers(self._stop_ids):
+            return None
+
+        _LOGGER.debug("NTA TripUpdates feed timestamp %s unchanged, keeping current snapshot", feed_timestamp)
+        snapshot.fetched_at = time.monotonic()
+        return snapshot
+
+    async def _async_decode_protobuf(self, payload: bytes) -> FeedSnapshot:
+        """Decode a protobuf TripUpdates payload into a snapshot.
+
+        A full feed is decoded in the executor to keep the event loop responsive.
+
+        Raises:
+            DecodeError: If the payload is not a valid FeedMessage
+        """
+        snapshot = await async_get_offloader(self.hass).async_run(
+            STAGE_PROTOBUF_DECODE, len(payload), _decode_feed_message, payload
+        )
+        _LOGGER.debug(
+            "NTA API returned %d entities in %d bytes (shared by %d stops)",
+            snapshot.entity_count,
+            len(payload),
+            len(self._stop_ids),
+        )
+        return snapshot
+
+
+@callback
+def async_get_feed_hub(
+    hass: HomeAssistant, api_key: str, api_key_secondary: Optional[str] = None
+) -> GTFSRealtimeFeedHub:
+    """Return the feed hub for an API key, creating it on first use."""
+    hubs: Dict[str, GTFSRealtimeFeedHub] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_NTA_FEED_HUBS, {})
+    hub = hubs.get(api_key)
+    if hub is None:
+        hub = GTFSRealtimeFeedHub(hass, api_key, api_key_secondary)
+        hubs[api_key] = hub
+    elif api_key_secondary and not hub.api_key_secondary:
+        hub.api_key_secondary = api_key_secondary
+    return hub
+
+
+@callback
+def async_release_feed_hub(hass: HomeAssistant, hub: GTFSRealtimeFeedHub, stop_id: str) -> None:
+    """Unregister a stop from its hub and drop the hub once no stop uses it."""
+    hub.remove_stop(stop_id)
+    if hub.stop_ids:
+        return
+
+    hubs = hass.data.get(DOMAIN, {}).get(DATA_NTA_FEED_HUBS, {})
+    if hubs.get(hub.api_key) is hub:
+        hubs.pop(hub.api_key)
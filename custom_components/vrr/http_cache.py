@@ -0,0 +1,79 @@
+"""Conditional GET support (ETag / Last-Modified revalidation).
+
+Providers remember the validators of the last successful response for each
+request URL together with the payload they returned for it. The next request
+sends If-None-Match / If-Modified-Since, and a "304 Not Modified" answer is
+served from the cached payload without downloading or decoding anything.
+
+The cached payload object is returned unchanged, so callers can detect an
+unchanged response with an identity check and reuse their last result.
+"""
+
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+
+class ConditionalRequestCache:
+    """Validators and payloads of the last response per request URL."""
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self._entries: Dict[str, Tuple[Optional[str], Optional[str], Any]] = {}
+
+    def request_headers(self, key: str) -> Dict[str, str]:
+        """Return the revalidation headers for a request.
+
+        Args:
+            key: Cache key (usually the request URL)
+
+        Returns:
+            Dictionary with If-None-Match / If-Modified-Since, empty if nothing is cached
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return {}
+
+        etag, last_modified, _ = entry
+        headers: Dict[str, str] = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def store(self, key: str, response_headers: Optional[Mapping[str, Any]], payload: Any) -> None:
+        """Remember the validators of a response and the payload built from it.
+
+        Responses without ETag or Last-Modified cannot be revalidated and are
+        not cached.
+
+        Args:
+            key: Cache key (usually the request URL)
+            response_headers: Headers of the HTTP response
+            payload: Result returned to the caller for this response
+        """
+        etag = _header(response_headers, "ETag")
+        last_modified = _header(response_headers, "Last-Modified")
+        if etag is None and last_modified is None:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = (etag, last_modified, payload)
+
+    def payload(self, key: str) -> Any:
+        """Return the cached payload for a "304 Not Modified" response, or None."""
+        entry = self._entries.get(key)
+        return entry[2] if entry is not None else None
+
+    def clear(self) -> None:
+        """Forget all cached responses."""
+        self._entries.clear()
+
+
+def _header(headers: Optional[Mapping[str, Any]], name: str) -> Optional[str]:
+    """Return a response header as string, or None if it is missing."""
+    if headers is None:
+        return None
+    try:
+        value = headers.get(name)
+    except AttributeError:
+        return None
+    return value if isinstance(value, str) and value else None
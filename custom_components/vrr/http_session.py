@@ -0,0 +1,107 @@
+"""HTTP client session owned by the integration.
+
+Home Assistant's shared session uses a generic connector: the default
+15 s keep-alive closes our connections between two polls, so nearly
+every departure request pays for a new DNS lookup and TLS handshake.
+The integration only talks to a handful of upstream hosts (the EFA
+servers on efa.de / vrr.de, trafiklab.se and nationaltransport.ie), so
+it owns one session with a connector tuned for them:
+
+* HTTP_CONNECTION_LIMIT_PER_HOST caps the parallel connections to a
+  single host, HTTP_CONNECTION_LIMIT all of them together.
+* Resolved addresses are cached for HTTP_DNS_CACHE_TTL seconds.
+* Idle connections are kept for HTTP_KEEPALIVE_TIMEOUT seconds, longer
+  than the default polling interval, so the next poll reuses them.
+
+The session is created on first use, shared by all config entries and
+closed when the last entry is unloaded or Home Assistant stops.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import aiohttp
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.util import ssl as ssl_util
+
+from .const import (
+    DATA_HTTP_SESSION,
+    DOMAIN,
+    HTTP_CONNECTION_LIMIT,
+    HTTP_CONNECTION_LIMIT_PER_HOST,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TransitSession:
+    """The aiohttp session and its connector, with a close listener."""
+
+    def __init__(self, hass: HomeAssistant):
+        """Create the connector and the session.
+
+        Args:
+            hass: Home Assistant instance
+        """
+        self.connector = aiohttp.TCPConnector(
+            limit=HTTP_CONNECTION_LIMIT,
+            limit_per_host=HTTP_CONNECTION_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            enable_cleanup_closed=True,
+            ssl=ssl_util.get_default_context(),
+        )
+        self.session = aiohttp.ClientSession(connector=self.connector)
+        self._unsub_close = hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, self._async_handle_close)
+
+    async def _async_handle_close(self, event: Event) -> None:
+        """Close the session when Home Assistant stops."""
+        self._unsub_close = None
+        await self.session.close()
+
+    async def async_close(self) -> None:
+        """Close the session and its connector."""
+        if self._unsub_close is not None:
+            self._unsub_close()
+            self._unsub_close = None
+        if not self.session.closed:
+            await self.session.close()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the connector settings and pool usage for diagnostics."""
+        return {
+            "closed": self.session.closed,
+            "limit": self.connector.limit,
+            "limit_per_host": self.connector.limit_per_host,
+            "dns_cache_ttl": HTTP_DNS_CACHE_TTL,
+            "keepalive_timeout": HTTP_KEEPALIVE_TIMEOUT,
+            "open_connections": sum(len(connections) for connections in self.connector._conns.values()),
+        }
+
+
+@callback
+def async_get_transit_session(hass: HomeAssistant) -> TransitSession:
+    """Return the integration's session holder, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    transit_session: Optional[TransitSession] = domain_data.get(DATA_HTTP_SESSION)
+    if transit_session is None or transit_session.session.closed:
+        transit_session = domain_data[DATA_HTTP_SESSION] = TransitSession(hass)
+        _LOGGER.debug("Created HTTP session for the transit APIs")
+    return transit_session
+
+
+@callback
+def async_get_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the aiohttp session used for all transit API requests."""
+    return async_get_transit_session(hass).session
+
+
+async def async_close_session(hass: HomeAssistant) -> None:
+    """Close the integration's session if it was created."""
+    transit_session: Optional[TransitSession] = hass.data.get(DOMAIN, {}).pop(DATA_HTTP_SESSION, None)
+    if transit_session is not None:
+        await transit_session.async_close()
+        _LOGGER.debug("Closed HTTP session for the transit APIs")
@@ -0,0 +1,76 @@
+"""Response time percentiles per provider endpoint.
+
+Every response the transport receives is recorded in the LatencyTracker of
+its endpoint, stored in hass.data[DOMAIN] and shared by all coordinators of
+that provider. The percentiles are shown in the diagnostics and drive
+hedged requests: with hedging enabled, the transport starts a second,
+identical request once the first one has taken longer than the
+HEDGE_PERCENTILE of the recent response times (see transport.py).
+"""
+
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_LATENCY_TRACKERS, DOMAIN, HEDGE_MIN_DELAY, HEDGE_MIN_SAMPLES, HEDGE_PERCENTILE, LATENCY_WINDOW
+from .metrics import nearest_rank
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Sliding window of the response times of one endpoint."""
+
+    def __init__(self, name: str, window: int = LATENCY_WINDOW):
+        """Initialize an empty window.
+
+        Args:
+            name: Endpoint name (the provider id)
+            window: Number of recent response times kept
+        """
+        self.name = name
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    @property
+    def count(self) -> int:
+        """Return the number of response times in the window."""
+        return len(self._samples)
+
+    def record(self, latency: float) -> None:
+        """Record a response time in seconds."""
+        self._samples.append(latency)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Return the nearest-rank percentile of the window in seconds, or None if it is empty."""
+        return nearest_rank(self._samples, percent)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Return the seconds after which a hedged request is started.
+
+        Returns:
+            The HEDGE_PERCENTILE response time (at least HEDGE_MIN_DELAY), or
+            None while fewer than HEDGE_MIN_SAMPLES response times are known
+        """
+        if len(self._samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(HEDGE_MIN_DELAY, self.percentile(HEDGE_PERCENTILE))
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the percentiles in milliseconds for diagnostics."""
+        result: Dict[str, Any] = {"samples": len(self._samples)}
+        for percent in (50, 90, 99):
+            value = self.percentile(percent)
+            result[f"p{percent}_ms"] = round(value * 1000) if value is not None else None
+        return result
+
+
+@callback
+def async_get_latency_tracker(hass: HomeAssistant, endpoint: str) -> LatencyTracker:
+    """Return the latency tracker of an endpoint, creating it on first use."""
+    trackers: Dict[str, LatencyTracker] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_LATENCY_TRACKERS, {})
+    tracker = trackers.get(endpoint)
+    if tracker is None:
+        tracker = trackers[endpoint] = LatencyTracker(endpoint)
+    return tracker
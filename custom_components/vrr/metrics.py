@@ -0,0 +1,186 @@
+"""Per-refresh performance metrics of a coordinator.
+
+Each VRRDataUpdateCoordinator keeps a RefreshMetrics that records, for
+every refresh:
+
+* the request latency (seconds from sending the departure request to the
+  decoded response, including retries and rate limit waits),
+* the bytes received and the time spent reading and decoding the body,
+* the retries and the circuit breaker state after the request,
+* the time spent parsing the departure board (see
+  VRRDataUpdateCoordinator.board), and the number of stop events received
+  and departures kept.
+
+Requests and decoding are measured as the difference of the transport
+counters before and after the refresh. A refresh that shared the request
+of another coordinator (see single_flight.py) therefore records no bytes.
+The last values are exposed as diagnostic sensors (disabled by default),
+updated after every refresh even when the departures did not change. The
+diagnostics show p50/p95 over the last REFRESH_METRICS_WINDOW refreshes.
+"""
+
+import math
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional
+
+from homeassistant.core import CALLBACK_TYPE, callback
+
+from .const import REFRESH_METRICS_WINDOW
+
+if TYPE_CHECKING:
+    from .transport import TransportMetrics
+
+METRIC_REQUEST_LATENCY = "request_latency"
+METRIC_BYTES_RECEIVED = "bytes_received"
+METRIC_DECODE_TIME = "decode_time"
+METRIC_PARSE_TIME = "parse_time"
+METRIC_EVENTS_IN = "events_in"
+METRIC_EVENTS_OUT = "events_out"
+METRIC_RETRIES = "retries"
+
+# Metrics measured in seconds, shown in milliseconds
+TIME_METRICS = (METRIC_REQUEST_LATENCY, METRIC_DECODE_TIME, METRIC_PARSE_TIME)
+NUMERIC_METRICS = TIME_METRICS + (METRIC_BYTES_RECEIVED, METRIC_EVENTS_IN, METRIC_EVENTS_OUT, METRIC_RETRIES)
+
+
+def nearest_rank(samples: Iterable[float], percent: float) -> Optional[float]:
+    """Return the nearest-rank percentile of the samples, or None if there are none."""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class RefreshStart(NamedTuple):
+    """Clock and transport counters at the start of a refresh."""
+
+    started: float
+    bytes_received: int
+    decode_time: float
+    retries: int
+
+
+class RefreshMetrics:
+    """Rolling window of the performance figures of one coordinator's refreshes."""
+
+    def __init__(self, window: int = REFRESH_METRICS_WINDOW):
+        """Initialize empty windows.
+
+        Args:
+            window: Number of recent refreshes kept per metric
+        """
+        self.refreshes = 0
+        self.breaker_state: Optional[str] = None
+        self.last: Dict[str, float] = {}
+        self._samples: Dict[str, Deque[float]] = {name: deque(maxlen=window) for name in NUMERIC_METRICS}
+        self._listeners: List[Callable[[], None]] = []
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call update_callback whenever new figures were recorded.
+
+        Returns:
+            Function removing the listener
+        """
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    def _notify(self) -> None:
+        """Call all listeners."""
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def start_refresh(self, transport_metrics: Optional["TransportMetrics"]) -> RefreshStart:
+        """Return the state to measure a refresh against.
+
+        Args:
+            transport_metrics: Counters of the provider's transport, if any
+        """
+        if transport_metrics is None:
+            return RefreshStart(time.monotonic(), 0, 0.0, 0)
+        return RefreshStart(
+            time.monotonic(),
+            transport_metrics.bytes_received,
+            transport_metrics.decode_time,
+            transport_metrics.retries,
+        )
+
+    def finish_refresh(
+        self,
+        start: RefreshStart,
+        transport_metrics: Optional["TransportMetrics"],
+        breaker_state: Optional[str] = None,
+    ) -> None:
+        """Record the request figures of a finished refresh.
+
+        Args:
+            start: Value returned by start_refresh() for this refresh
+            transport_metrics: Counters of the provider's transport, if any
+            breaker_state: State of the endpoint's circuit breaker after the request
+        """
+        self.refreshes += 1
+        self.breaker_state = breaker_state
+        self._record(METRIC_REQUEST_LATENCY, time.monotonic() - start.started)
+        if transport_metrics is not None:
+            self._record(METRIC_BYTES_RECEIVED, transport_metrics.bytes_received - start.bytes_received)
+            self._record(METRIC_DECODE_TIME, transport_metrics.decode_time - start.decode_time)
+            self._record(METRIC_RETRIES, transport_metrics.retries - start.retries)
+        self._notify()
+
+    def record_parse(self, duration: float, events_in: int, events_out: int) -> None:
+        """Record the parsing of a refresh's departures.
+
+        Args:
+            duration: Seconds spent parsing, filtering and sorting
+            events_in: Stop events in the response
+            events_out: Departures kept after filtering and the limit
+        """
+        self._record(METRIC_PARSE_TIME, duration)
+        self._record(METRIC_EVENTS_IN, events_in)
+        self._record(METRIC_EVENTS_OUT, events_out)
+        self._notify()
+
+    def _record(self, name: str, value: float) -> None:
+        """Record one value of a metric."""
+        self.last[name] = value
+        self._samples[name].append(value)
+
+    def value(self, name: str) -> Optional[float]:
+        """Return the last value of a metric (milliseconds for times), or None if not measured yet."""
+        value = self.last.get(name)
+        if value is None:
+            return None
+        return _display(name, value)
+
+    def percentile(self, name: str, percent: float) -> Optional[float]:
+        """Return a percentile of a metric's window (milliseconds for times), or None if it is empty."""
+        value = nearest_rank(self._samples[name], percent)
+        if value is None:
+            return None
+        return _display(name, value)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return p50/p95 of every metric for diagnostics."""
+        result: Dict[str, Any] = {"refreshes": self.refreshes, "breaker_state": self.breaker_state}
+        for name in NUMERIC_METRICS:
+            key = f"{name}_ms" if name in TIME_METRICS else name
+            result[key] = {
+                "last": self.value(name),
+                "p50": self.percentile(name, 50),
+                "p95": self.percentile(name, 95),
+            }
+        return result
+
+
+def _display(name: str, value: float) -> float:
+    """Convert a metric value to its displayed unit."""
+    if name in TIME_METRICS:
+        return round(value * 1000, 1)
+    return value
@@ -0,0 +1,172 @@
+"""Run CPU-heavy decode stages off the event loop when they are large.
+
+Decoding the NTA TripUpdates feed or a large EFA response, building the stop
+events of an NTA stop or parsing the departures of a response can block Home
+Assistant's event loop for hundreds of milliseconds on small hosts. The
+Offloader, shared in hass.data[DOMAIN], runs such a stage either inline or
+in the executor (hass.async_add_executor_job):
+
+* Each stage learns its cost per byte from previous runs (moving average).
+  A run is sent to the executor when its predicted time exceeds
+  OFFLOAD_INLINE_BUDGET; smaller payloads stay inline, which avoids the
+  thread hand-over for the common small responses.
+* Until a stage has been measured, payloads from OFFLOAD_MIN_SIZE bytes on
+  go to the executor. Stages sized by item count instead of bytes stay
+  inline until their first run has measured the cost per item.
+
+Every run reports its time, and the diagnostics show the statistics of each
+stage.
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_OFFLOADER, DOMAIN, OFFLOAD_COST_SMOOTHING, OFFLOAD_INLINE_BUDGET, OFFLOAD_MIN_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+STAGE_JSON_DECODE = "json_decode"
+STAGE_PROTOBUF_DECODE = "protobuf_decode"
+# Stages without a payload of their own; their size is the number of items
+STAGE_STOP_EVENTS = "stop_events"
+STAGE_DEPARTURE_PARSE = "departure_parse"
+
+
+class OffloadStage:
+    """Timing statistics and the inline/executor decision of one stage."""
+
+    def __init__(self, name: str):
+        """Initialize a stage without measurements.
+
+        Args:
+            name: Stage name used in log messages and diagnostics
+        """
+        self.name = name
+        self.inline_runs = 0
+        self.executor_runs = 0
+        self.last_time: Optional[float] = None
+        self.max_time = 0.0
+        self._total_time = 0.0
+        # Seconds per byte, None until the first run
+        self._cost: Optional[float] = None
+
+    @property
+    def threshold(self) -> int:
+        """Return the payload size in bytes from which the stage runs in the executor."""
+        if not self._cost:
+            return OFFLOAD_MIN_SIZE
+        return int(OFFLOAD_INLINE_BUDGET / self._cost)
+
+    def should_offload(self, size: int) -> bool:
+        """Return True if a payload of this size should be processed in the executor."""
+        return size >= self.threshold
+
+    def record(self, size: int, duration: float, offloaded: bool) -> None:
+        """Record one run of the stage.
+
+        Args:
+            size: Payload size in bytes (or items)
+            duration: Seconds the stage itself took (without executor queueing)
+            offloaded: True if the stage ran in the executor
+        """
+        if offloaded:
+            self.executor_runs += 1
+        else:
+            self.inline_runs += 1
+        self.last_time = duration
+        self.max_time = max(self.max_time, duration)
+        self._total_time += duration
+
+        if size > 0:
+            cost = duration / size
+            if self._cost is None:
+                self._cost = cost
+            else:
+                self._cost += OFFLOAD_COST_SMOOTHING * (cost - self._cost)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the stage statistics for diagnostics."""
+        runs = self.inline_runs + self.executor_runs
+        return {
+            "inline_runs": self.inline_runs,
+            "executor_runs": self.executor_runs,
+            "last_ms": round(self.last_time * 1000, 1) if self.last_time is not None else None,
+            "average_ms": round(self._total_time / runs * 1000, 1) if runs else None,
+            "max_ms": round(self.max_time * 1000, 1),
+            "threshold_bytes": self.threshold,
+        }
+
+
+class Offloader:
+    """Run decode stages inline or in the executor, depending on their expected cost."""
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the offloader.
+
+        Args:
+            hass: Home Assistant instance
+        """
+        self.hass = hass
+        self.stages: Dict[str, OffloadStage] = {}
+
+    def stage(self, name: str) -> OffloadStage:
+        """Return the statistics of a stage, creating them on first use."""
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = OffloadStage(name)
+        return stage
+
+    async def async_run(self, name: str, size: int, func: Callable[..., _T], *args: Any) -> _T:
+        """Run one stage and record its time.
+
+        Args:
+            name: Stage name (STAGE_*)
+            size: Payload size in bytes (or items), used to predict the cost
+            func: Function doing the work; must not touch Home Assistant state
+            *args: Arguments for func
+
+        Returns:
+            The result of func; exceptions of func are raised
+        """
+        stage = self.stage(name)
+        offloaded = stage.should_offload(size)
+        if offloaded:
+            result, duration = await self.hass.async_add_executor_job(_timed, func, *args)
+        else:
+            result, duration = _timed(func, *args)
+
+        stage.record(size, duration, offloaded)
+        _LOGGER.debug(
+            "%s of %d bytes took %.1f ms (%s)",
+            name,
+            size,
+            duration * 1000,
+            "executor" if offloaded else "inline",
+        )
+        return result
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the statistics of all stages for diagnostics."""
+        return {name: stage.as_dict() for name, stage in self.stages.items()}
+
+
+def _timed(func: Callable[..., _T], *args: Any) -> Tuple[_T, float]:
+    """Call func and return its result and the seconds it took."""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+@callback
+def async_get_offloader(hass: HomeAssistant) -> Offloader:
+    """Return the shared offloader, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    offloader = domain_data.get(DATA_OFFLOADER)
+    if offloader is None:
+        offloader = domain_data[DATA_OFFLOADER] = Offloader(hass)
+    return offloader
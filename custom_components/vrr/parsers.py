@@ -1,39 +1,167 @@
-"""Common parsing utilities for all providers."""
+"""Common parsing utilities for all providers.
 
+Departure timestamps are parsed by parse_local_time(): the ISO 8601 formats
+of the APIs (2025-01-15T10:00:00Z, 2025-01-15T10:00:00+01:00) are read by
+datetime.fromisoformat, other formats fall back to dt_util.parse_datetime.
+The planned times of a stop barely change from poll to poll, so the local
+time of each (timestamp, timezone) pair is memoized in a bounded LRU cache
+of DEPARTURE_TIME_CACHE_SIZE entries.
+
+Each provider builds one DepartureParser when its module is loaded, from
+module-level functions for the transportation type, the platform and the
+realtime flag. Parsing a stop event then allocates nothing but the
+departure itself. parse_departure_generic() remains for callers that pass
+their own functions.
+"""
+
+import heapq
 import logging
 from datetime import datetime
-from typing import Any, Callable, Dict, Optional, Union
+from functools import lru_cache
+from typing import Any, Callable, Collection, Dict, Iterable, List, Mapping, Optional, Tuple, Union
 from zoneinfo import ZoneInfo
 
 from homeassistant.util import dt as dt_util
 
+from .const import DEPARTURE_TIME_CACHE_SIZE
 from .data_models import UnifiedDeparture
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def parse_departure_generic(
-    stop: Dict[str, Any],
-    tz: Union[ZoneInfo, Any],
-    now: datetime,
-    get_transport_type_fn: Callable[[Dict[str, Any]], str],
-    get_platform_fn: Callable[[Dict[str, Any]], str],
-    get_realtime_fn: Callable[[Dict[str, Any], Optional[str], Optional[str]], bool],
-) -> Optional[UnifiedDeparture]:
-    """Generic parser for departure data - shared logic across all providers.
+@lru_cache(maxsize=DEPARTURE_TIME_CACHE_SIZE)
+def parse_local_time(value: str, tz: Union[ZoneInfo, Any]) -> Optional[datetime]:
+    """Parse an ISO 8601 timestamp and convert it to a timezone (memoized).
 
     Args:
-        stop: Stop event data from API
-        tz: Timezone object (provider-specific)
-        now: Current datetime
-        get_transport_type_fn: Function to determine transportation type
-        get_platform_fn: Function to extract platform information
-        get_realtime_fn: Function to check if realtime data is available
+        value: Timestamp of an API response
+        tz: Target timezone; naive timestamps are taken as system local time
 
     Returns:
-        UnifiedDeparture object or None if parsing fails
+        The timestamp in tz, or None if it cannot be parsed
+
+    Raises:
+        ValueError: If the timestamp cannot be converted to tz
+        TypeError: If tz is not a timezone
     """
     try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        parsed = dt_util.parse_datetime(value)
+        if parsed is None:
+            return None
+    return parsed.astimezone(tz)
+
+
+# Read-only default for missing nested objects of a stop event, instead of a new {} per lookup
+EMPTY_OBJECT: Dict[str, Any] = {}
+
+TransportTypeFn = Callable[[Dict[str, Any], Dict[str, Any]], str]
+PlatformFn = Callable[[Dict[str, Any]], str]
+RealtimeFn = Callable[[Dict[str, Any], Optional[str], Optional[str]], bool]
+
+
+class DepartureParser:
+    """Departure parser of one provider, built once from its extractor functions."""
+
+    __slots__ = ("_transport_type", "_platform", "_realtime")
+
+    def __init__(self, transport_type_fn: TransportTypeFn, platform_fn: PlatformFn, realtime_fn: RealtimeFn):
+        """Initialize the parser.
+
+        Args:
+            transport_type_fn: Returns the transportation type from the stop event and its transportation
+            platform_fn: Returns the platform of the stop event
+            realtime_fn: Returns True if the stop event has realtime data, given the estimated and
+                planned time strings
+        """
+        self._transport_type = transport_type_fn
+        self._platform = platform_fn
+        self._realtime = realtime_fn
+
+    def parse(self, stop: Dict[str, Any], tz: Union[ZoneInfo, Any], now: datetime) -> Optional[UnifiedDeparture]:
+        """Parse a single departure.
+
+        Args:
+            stop: Stop event data from API
+            tz: Timezone object (provider-specific)
+            now: Current datetime
+
+        Returns:
+            UnifiedDeparture object or None if parsing fails
+        """
+        try:
+            times = self._parse_times(stop, tz)
+            if times is None:
+                return None
+            transportation = _transportation(stop)
+            return self._build(stop, transportation, self._transport_type(stop, transportation), times, now)
+        except Exception as e:
+            _LOGGER.debug("Error parsing departure: %s", e)
+            return None
+
+    def parse_many(
+        self,
+        stop_events: Iterable[Any],
+        tz: Union[ZoneInfo, Any],
+        now: datetime,
+        transportation_types: Optional[Collection[str]],
+        limit: int,
+    ) -> List[UnifiedDeparture]:
+        """Parse the earliest departures of the given types.
+
+        The kept departures live in a heap bounded to limit entries (the
+        latest on top). A stop event is only turned into a departure if its
+        type is wanted and it departs before the latest kept one, so a large
+        board costs O(n log limit) and allocates at most what is kept plus
+        what it displaces.
+
+        Args:
+            stop_events: Stop events from API
+            tz: Timezone object (provider-specific)
+            now: Current datetime
+            transportation_types: Types to keep; None keeps all
+            limit: Maximum number of departures
+
+        Returns:
+            Up to limit departures sorted by (estimated) departure time; stop
+            events departing at the same time keep their order
+        """
+        if limit <= 0:
+            return []
+        # Max-heap of (-timestamp, -position, departure): heap[0] is the latest kept departure
+        heap: List[Tuple[float, int, UnifiedDeparture]] = []
+        for position, stop in enumerate(stop_events):
+            try:
+                times = self._parse_times(stop, tz)
+                if times is None:
+                    continue
+                transportation = _transportation(stop)
+                transport_type = self._transport_type(stop, transportation)
+                if transportation_types is not None and transport_type not in transportation_types:
+                    continue
+                key = (-times[1].timestamp(), -position)
+                if len(heap) >= limit and key < heap[0][:2]:
+                    continue
+                departure = self._build(stop, transportation, transport_type, times, now)
+            except Exception as e:
+                _LOGGER.debug("Error parsing departure: %s", e)
+                continue
+            if len(heap) < limit:
+                heapq.heappush(heap, (*key, departure))
+            else:
+                heapq.heapreplace(heap, (*key, departure))
+        heap.sort(reverse=True)
+        return [departure for _, _, departure in heap]
+
+    @staticmethod
+    def _parse_times(stop: Any, tz: Union[ZoneInfo, Any]) -> Optional[Tuple[datetime, datetime, Optional[str], str]]:
+        """Return the planned and estimated local times of a stop event and their strings.
+
+        Returns:
+            (planned_local, estimated_local, estimated_str, planned_str), or None if the stop
+            event has no usable planned time
+        """
         # Validate stop data structure
         if not isinstance(stop, dict):
             _LOGGER.debug("Invalid stop data: expected dict, got %s", type(stop))
@@ -52,68 +180,120 @@ def parse_departure_generic(
             _LOGGER.debug("Invalid departureTimePlanned: expected str, got %s", type(planned_time_str))
             return None
 
-        # Parse times
-        planned_time = dt_util.parse_datetime(planned_time_str)
-        estimated_time = dt_util.parse_datetime(estimated_time_str) if estimated_time_str else planned_time
-
-        if not planned_time:
-            _LOGGER.debug("Failed to parse departureTimePlanned: %s", planned_time_str)
-            return None
-
-        # Convert to local timezone with validation
+        # Parse times and convert them to the local timezone
         try:
-            planned_local = planned_time.astimezone(tz)
-            estimated_local = estimated_time.astimezone(tz) if estimated_time else planned_local
+            planned_local = parse_local_time(planned_time_str, tz)
+            if not planned_local:
+                _LOGGER.debug("Failed to parse departureTimePlanned: %s", planned_time_str)
+                return None
+            estimated_local = planned_local
+            if estimated_time_str:
+                estimated_local = parse_local_time(estimated_time_str, tz) or planned_local
         except (ValueError, TypeError) as e:
             _LOGGER.debug("Failed to convert timezone: %s", e)
             return None
+        return planned_local, estimated_local, estimated_time_str, planned_time_str
 
-        # Calculate delay
-        delay_minutes = int((estimated_local - planned_local).total_seconds() / 60)
+    def _build(
+        self,
+        stop: Dict[str, Any],
+        transportation: Dict[str, Any],
+        transport_type: str,
+        times: Tuple[datetime, datetime, Optional[str], str],
+        now: datetime,
+    ) -> UnifiedDeparture:
+        """Build the departure of a stop event whose times were parsed."""
+        planned_local, estimated_local, estimated_time_str, planned_time_str = times
 
-        # Get transportation info with validation
-        transportation = stop.get("transportation", {})
-        if not isinstance(transportation, dict):
-            _LOGGER.debug("Invalid transportation data: expected dict, got %s", type(transportation))
-            transportation = {}
-
-        destination_obj = transportation.get("destination", {})
+        destination_obj = transportation.get("destination", EMPTY_OBJECT)
         if not isinstance(destination_obj, dict):
-            destination_obj = {}
-        destination = destination_obj.get("name", "Unknown")
-
-        line_number = str(transportation.get("number", ""))
+            destination_obj = EMPTY_OBJECT
         description = str(transportation.get("description", ""))
         agency = stop.get("agency")  # Agency name from GTFS (NTA/GTFS-DE)
 
-        # Determine transportation type using provider-specific function
-        transport_type = get_transport_type_fn(transportation)
-
-        # Get platform/track info using provider-specific function
-        platform = get_platform_fn(stop)
-
-        # Calculate minutes until departure
-        time_diff = estimated_local - now
-        minutes_until = max(0, int(time_diff.total_seconds() / 60))
-
-        # Determine if real-time data is available using provider-specific function
-        is_realtime = get_realtime_fn(stop, estimated_time_str, planned_time_str)
-
-        return UnifiedDeparture(
-            line=line_number,
-            destination=destination,
-            departure_time=estimated_local.strftime("%H:%M"),
-            planned_time=planned_local.strftime("%H:%M"),
-            delay=delay_minutes,
-            platform=platform,
-            transportation_type=transport_type,
-            is_realtime=is_realtime,
-            minutes_until_departure=minutes_until,
+        return UnifiedDeparture.from_local_times(
+            line=str(transportation.get("number", "")),
+            destination=destination_obj.get("name", "Unknown"),
             departure_time_obj=estimated_local,
+            planned_time_obj=planned_local,
+            delay=int((estimated_local - planned_local).total_seconds() / 60),
+            platform=self._platform(stop),
+            transportation_type=transport_type,
+            is_realtime=self._realtime(stop, estimated_time_str, planned_time_str),
+            minutes_until_departure=max(0, int((estimated_local - now).total_seconds() / 60)),
             description=description if description else None,
             agency=agency if agency else None,
         )
 
-    except Exception as e:
-        _LOGGER.debug("Error parsing departure: %s", e)
-        return None
+
+def _transportation(stop: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the transportation object of a stop event, or an empty one if it is invalid."""
+    transportation = stop.get("transportation", EMPTY_OBJECT)
+    if not isinstance(transportation, dict):
+        _LOGGER.debug("Invalid transportation data: expected dict, got %s", type(transportation))
+        return EMPTY_OBJECT
+    return transportation
+
+
+def product_class_type(
+    mapping: Mapping[Any, str], default_class: Any = 0, default_type: str = "unknown"
+) -> TransportTypeFn:
+    """Return a transport type function looking up transportation.product.class in a mapping.
+
+    Args:
+        mapping: Product class to transportation type
+        default_class: Class assumed if the stop event has none
+        default_type: Type of classes missing from the mapping
+    """
+
+    def transport_type(stop: Dict[str, Any], transportation: Dict[str, Any]) -> str:
+        return mapping.get(transportation.get("product", EMPTY_OBJECT).get("class", default_class), default_type)
+
+    return transport_type
+
+
+def platform_name(stop: Dict[str, Any]) -> str:
+    """Return platform.name of a stop event whose platform is an object or a plain value."""
+    platform = stop.get("platform", "")
+    if isinstance(platform, dict):
+        return platform.get("name", "")
+    return str(platform)
+
+
+def realtime_monitored(stop: Dict[str, Any], estimated: Optional[str], planned: Optional[str]) -> bool:
+    """Return True if the stop event's realtimeStatus contains MONITORED."""
+    return "MONITORED" in stop.get("realtimeStatus", ())
+
+
+def realtime_estimate_differs(stop: Dict[str, Any], estimated: Optional[str], planned: Optional[str]) -> bool:
+    """Return True if the stop event has an estimated time different from the planned one."""
+    return estimated != planned if estimated and planned else False
+
+
+def parse_departure_generic(
+    stop: Dict[str, Any],
+    tz: Union[ZoneInfo, Any],
+    now: datetime,
+    get_transport_type_fn: Callable[[Dict[str, Any]], str],
+    get_platform_fn: Callable[[Dict[str, Any]], str],
+    get_realtime_fn: Callable[[Dict[str, Any], Optional[str], Optional[str]], bool],
+) -> Optional[UnifiedDeparture]:
+    """Generic parser for departure data - shared logic across all providers.
+
+    Providers use their prebuilt DepartureParser; this builds one per call.
+
+    Args:
+        stop: Stop event data from API
+        tz: Timezone object (provider-specific)
+        now: Current datetime
+        get_transport_type_fn: Function to determine transportation type
+        get_platform_fn: Function to extract platform information
+        get_realtime_fn: Function to check if realtime data is available
+
+    Returns:
+        UnifiedDeparture object or None if parsing fails
+    """
+    parser = DepartureParser(
+        lambda _stop, transportation: get_transport_type_fn(transportation), get_platform_fn, get_realtime_fn
+    )
+    return parser.parse(stop, tz, now)
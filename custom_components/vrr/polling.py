@@ -0,0 +1,93 @@
+"""Adaptive polling interval derived from the departure board.
+
+A fixed scan_interval polls just as often at 3 am, with the next departure
+90 minutes away, as during rush hour. With adaptive polling enabled the
+coordinator asks AdaptivePollingPolicy for the next update_interval after
+every successful update, passing the DepartureBoard parsed from it:
+
+* Departures leaving within ADAPTIVE_POLLING_IMMINENT_MINUTES, or realtime
+  times that changed since the last poll, keep the interval at the
+  user-configured scan_interval (the floor).
+* A static board doubles the interval on every poll, but never waits longer
+  than a third of the time until the next departure, so it is still
+  refreshed a few times before that departure leaves.
+* An empty board backs off the same way.
+
+The interval never exceeds the configured ceiling (max_scan_interval). The
+coordinator creates a new policy when the options change, which starts
+again from the shortest interval.
+"""
+
+import logging
+import time
+from typing import Optional, Tuple
+
+from .const import ADAPTIVE_POLLING_IMMINENT_MINUTES
+from .data_models import DepartureBoard
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AdaptivePollingPolicy:
+    """Compute the next polling interval from the latest departure board."""
+
+    def __init__(self, min_interval: int, max_interval: int):
+        """Initialize the policy.
+
+        Args:
+            min_interval: Shortest interval in seconds (the user's scan_interval)
+            max_interval: Longest interval in seconds
+        """
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.interval = min_interval
+        self._signature: Optional[Tuple[Tuple[float, float], ...]] = None
+
+    def next_interval(self, board: DepartureBoard, now: Optional[float] = None) -> int:
+        """Return the interval in seconds until the next poll.
+
+        Args:
+            board: Departures parsed from the latest API response
+            now: Current time in epoch seconds (defaults to time.time())
+
+        Returns:
+            Interval in seconds between min_interval and max_interval
+        """
+        if now is None:
+            now = time.time()
+
+        signature, seconds_until_next = _board_state(board, now)
+        changed = self._signature is not None and signature != self._signature
+        self._signature = signature
+
+        if changed:
+            interval = self.min_interval
+        elif seconds_until_next is None:
+            # Empty board (e.g. overnight): back off
+            interval = self.interval * 2
+        elif seconds_until_next <= ADAPTIVE_POLLING_IMMINENT_MINUTES * 60:
+            interval = self.min_interval
+        else:
+            interval = min(self.interval * 2, int(seconds_until_next / 3))
+
+        self.interval = max(self.min_interval, min(self.max_interval, interval))
+        _LOGGER.debug(
+            "Adaptive polling: next departure in %s s, board %s, next poll in %d s",
+            seconds_until_next,
+            "changed" if changed else "unchanged",
+            self.interval,
+        )
+        return self.interval
+
+
+def _board_state(board: DepartureBoard, now: float) -> Tuple[Tuple[Tuple[float, float], ...], Optional[float]]:
+    """Return the realtime signature of a board and the seconds until its next departure.
+
+    The signature holds the planned and estimated time of every departure, so
+    any delay update or added/removed departure changes it.
+    """
+    signature = tuple((departure.planned_timestamp, departure.departure_timestamp) for departure in board.departures)
+    upcoming = [
+        departure.departure_timestamp - now for departure in board.departures if departure.departure_timestamp >= now
+    ]
+    return signature, min(upcoming) if upcoming else None
@@ -1,18 +1,31 @@
 """Base class for all public transport providers."""
 
+import heapq
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Collection, Dict, Iterable, List, Optional, Union
 from zoneinfo import ZoneInfo
 
 from homeassistant.core import HomeAssistant
 
+from ..const import EFA_MEANS_OF_TRANSPORT
 from ..data_models import UnifiedDeparture
+from ..http_cache import ConditionalRequestCache
+from ..parsers import DepartureParser
+from ..transport import ResilientTransport, TransportResponse
+
+if TYPE_CHECKING:
+    from ..circuit_breaker import CircuitBreaker
+    from ..latency import LatencyTracker
+    from ..rate_limiter import RateLimiter
 
 
 class BaseProvider(ABC):
     """Abstract base class for all public transport providers."""
 
+    # Prebuilt parser of the provider's stop events, used by parse_departures()
+    departure_parser: Optional[DepartureParser] = None
+
     def __init__(self, hass: HomeAssistant, api_key: Optional[str] = None, api_key_secondary: Optional[str] = None):
         """Initialize the provider.
 
@@ -24,6 +37,22 @@ class BaseProvider(ABC):
         self.hass = hass
         self.api_key = api_key
         self.api_key_secondary = api_key_secondary
+        # ETag / Last-Modified of the last response per URL for conditional GETs
+        self._http_cache = ConditionalRequestCache()
+        # Shared limiter for this provider and API key, set by the coordinator and config flow
+        self.rate_limiter: Optional["RateLimiter"] = None
+        # Shared breaker of this provider's endpoint, set by the coordinator
+        self.circuit_breaker: Optional["CircuitBreaker"] = None
+        # time.monotonic() by which the current refresh must be finished, set by the coordinator
+        self.deadline: Optional[float] = None
+        # Shared response times of this provider's endpoint, set by the coordinator
+        self.latency_tracker: Optional["LatencyTracker"] = None
+        # Send a hedged request when a response is slow (opt-in for EFA providers, set by the coordinator)
+        self.hedge_requests = False
+        # Transportation types shown by the sensor, set by the coordinator; None requests all
+        self.transportation_types: Optional[List[str]] = None
+        # Retries, backoff and request metrics shared by all requests of this provider
+        self.transport = ResilientTransport(hass, self.provider_name)
 
     @property
     @abstractmethod
@@ -79,6 +108,44 @@ class BaseProvider(ABC):
         """
         pass
 
+    def parse_departures(
+        self,
+        stop_events: Iterable[Any],
+        tz: Union[ZoneInfo, Any],
+        now: datetime,
+        transportation_types: Optional[Collection[str]],
+        limit: int,
+    ) -> List[UnifiedDeparture]:
+        """Parse the earliest departures of a response.
+
+        Departures of other types are dropped while parsing, and only the
+        earliest limit departures are kept in a bounded heap (see
+        DepartureParser.parse_many), so large boards cost O(n log limit).
+
+        Args:
+            stop_events: Stop event data from API
+            tz: Timezone object
+            now: Current datetime
+            transportation_types: Types to keep; None keeps all
+            limit: Maximum number of departures
+
+        Returns:
+            Up to limit departures sorted by departure time
+        """
+        if self.departure_parser is not None:
+            return self.departure_parser.parse_many(stop_events, tz, now, transportation_types, limit)
+
+        departures = (self.parse_departure(stop, tz, now) for stop in stop_events)
+        return heapq.nsmallest(
+            limit,
+            (
+                departure
+                for departure in departures
+                if departure and (transportation_types is None or departure.transportation_type in transportation_types)
+            ),
+            key=lambda departure: departure.departure_timestamp,
+        )
+
     @abstractmethod
     async def search_stops(self, search_term: str) -> List[Dict[str, Any]]:
         """Search for stops/stations.
@@ -103,6 +170,55 @@ class BaseProvider(ABC):
         """
         return {}
 
+    def _excluded_means_params(self) -> str:
+        """Return EFA query parameters excluding the means of transport the sensor does not show.
+
+        A means-of-transport class is excluded if its type (per
+        get_transport_type_mapping()) is not enabled; such departures would be
+        dropped by the sensor anyway, so the response only gets smaller.
+
+        Returns:
+            '&excludedMeans=checkbox&exclMOT_<class>=1...' or '' if nothing is excluded
+        """
+        if not self.transportation_types:
+            return ""
+        enabled = set(self.transportation_types)
+        mapping = self.get_transport_type_mapping()
+        excluded = [mot for mot in EFA_MEANS_OF_TRANSPORT if mapping.get(mot, "unknown") not in enabled]
+        if not excluded or len(excluded) == len(EFA_MEANS_OF_TRANSPORT):
+            # Excluding every class would make the request fail instead of returning nothing
+            return ""
+        return "&excludedMeans=checkbox" + "".join(f"&exclMOT_{mot}=1" for mot in excluded)
+
+    async def _async_request(self, url: str, **kwargs: Any) -> TransportResponse:
+        """Send a GET request through the provider's transport.
+
+        Every attempt is rate limited by the shared rate limiter, the request
+        fails fast while the circuit breaker is open, retries stop at the
+        deadline of the current refresh, and slow attempts are hedged if
+        enabled (if they are set).
+
+        Args:
+            url: Request URL
+            **kwargs: Further arguments for ResilientTransport.request()
+
+        Returns:
+            The final response of the transport
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            DeadlineExceededError: If the deadline ran out before a usable response
+        """
+        return await self.transport.request(
+            url,
+            rate_limiter=self.rate_limiter,
+            circuit_breaker=self.circuit_breaker,
+            deadline=self.deadline,
+            latency_tracker=self.latency_tracker,
+            hedge=self.hedge_requests,
+            **kwargs,
+        )
+
     async def cleanup(self) -> None:
         """Cleanup provider resources.
 
@@ -1,25 +1,32 @@
 """HVV (Hamburger Verkehrsverbund) provider implementation."""
 
-import asyncio
 import logging
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
 from zoneinfo import ZoneInfo
 
-import aiohttp
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-
 from ..const import API_BASE_URL_HVV, HVV_TRANSPORTATION_TYPES, PROVIDER_HVV
 from ..data_models import UnifiedDeparture
-from ..parsers import parse_departure_generic
+from ..parsers import EMPTY_OBJECT, DepartureParser, product_class_type, realtime_estimate_differs
 from .base import BaseProvider
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _platform(stop: Dict[str, Any]) -> str:
+    """Return the platform of an HVV stop event."""
+    location = stop.get("location", EMPTY_OBJECT)
+    return location.get("properties", EMPTY_OBJECT).get("platform") or location.get("platformName", "")
+
+
+_DEPARTURE_PARSER = DepartureParser(product_class_type(HVV_TRANSPORTATION_TYPES), _platform, realtime_estimate_differs)
+
+
 class HVVProvider(BaseProvider):
     """HVV (Hamburger Verkehrsverbund) provider."""
 
+    departure_parser = _DEPARTURE_PARSER
+
     @property
     def provider_id(self) -> str:
         """Return the provider identifier."""
@@ -34,6 +41,10 @@ class HVVProvider(BaseProvider):
         """Return the timezone for HVV."""
         return "Europe/Berlin"
 
+    def get_transport_type_mapping(self) -> Dict[Any, str]:
+        """Return the HVV product classes mapped to transportation types."""
+        return HVV_TRANSPORTATION_TYPES
+
     async def fetch_departures(
         self,
         station_id: Optional[str],
@@ -64,69 +75,43 @@ class HVVProvider(BaseProvider):
                 f"useRealtime=1&"
                 f"limit={departures_limit}"
             )
+        # Leave out the means of transport the sensor does not show
+        params += self._excluded_means_params()
 
         url = f"{base_url}?{params}"
-        session = async_get_clientsession(self.hass)
 
         headers = {"User-Agent": "Mozilla/5.0 (compatible; HomeAssistant HVV Integration)"}
-
-        max_retries = 3
-        for attempt in range(1, max_retries + 1):
-            try:
-                async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status == 200:
-                        try:
-                            json_data = await response.json()
-                            if not isinstance(json_data, dict):
-                                _LOGGER.warning("HVV API returned non-dict response: %s", type(json_data))
-                                return None
-
-                            if "stopEvents" not in json_data:
-                                _LOGGER.debug("HVV API response missing 'stopEvents' field")
-                                return {"stopEvents": []}
-
-                            return json_data
-                        except (ValueError, aiohttp.ContentTypeError) as e:
-                            _LOGGER.warning("HVV API returned invalid JSON: %s", e)
-                            return None
-                        except Exception as e:
-                            _LOGGER.warning("HVV API JSON parsing failed: %s", e)
-                            return None
-                    elif response.status == 404:
-                        _LOGGER.warning("HVV API endpoint not found (404)")
-                        return None
-                    elif response.status >= 500:
-                        _LOGGER.warning("HVV API server error (status %s)", response.status)
-                    else:
-                        _LOGGER.warning("HVV API returned status %s", response.status)
-
-            except asyncio.TimeoutError:
-                _LOGGER.warning("HVV API timeout on attempt %s", attempt)
-            except Exception as e:
-                _LOGGER.warning("Attempt %s failed: %s", attempt, e)
-
-            if attempt < max_retries:
-                await asyncio.sleep(2**attempt)
-
-        return None
+        # Revalidate the last response instead of downloading it again
+        headers.update(self._http_cache.request_headers(url))
+
+        response = await self._async_request(url, headers=headers)
+        if response.not_modified:
+            cached = self._http_cache.payload(url)
+            if cached is None:
+                _LOGGER.warning("HVV API returned 304 without a cached response")
+            else:
+                _LOGGER.debug("HVV API data not modified, reusing last response")
+            return cached
+        if not response.ok:
+            return None
+
+        json_data = response.data
+        if not isinstance(json_data, dict):
+            _LOGGER.warning("HVV API returned non-dict response: %s", type(json_data))
+            return None
+
+        if "stopEvents" not in json_data:
+            _LOGGER.debug("HVV API response missing 'stopEvents' field")
+            return {"stopEvents": []}
+
+        self._http_cache.store(url, response.headers, json_data)
+        return json_data
 
     def parse_departure(
         self, stop: Dict[str, Any], tz: Union[ZoneInfo, Any], now: datetime
     ) -> Optional[UnifiedDeparture]:
         """Parse a single departure from HVV API response."""
-        return parse_departure_generic(
-            stop,
-            tz,
-            now,
-            get_transport_type_fn=lambda t: HVV_TRANSPORTATION_TYPES.get(
-                t.get("product", {}).get("class", 0), "unknown"
-            ),
-            get_platform_fn=lambda s: (
-                s.get("location", {}).get("properties", {}).get("platform")
-                or s.get("location", {}).get("platformName", "")
-            ),
-            get_realtime_fn=lambda s, est, plan: est != plan if est and plan else False,
-        )
+        return _DEPARTURE_PARSER.parse(stop, tz, now)
 
     async def search_stops(self, search_term: str) -> List[Dict[str, Any]]:
         """Search for stops using HVV Stopfinder API."""
@@ -144,46 +129,34 @@ class HVVProvider(BaseProvider):
         )
 
         url = f"{api_url}?{params}"
-        session = async_get_clientsession(self.hass)
-
-        try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status == 200:
-                    try:
-                        data = await response.json()
-                    except (ValueError, aiohttp.ContentTypeError) as e:
-                        _LOGGER.error("Invalid JSON response from HVV API: %s", e)
-                        return []
-
-                    if not isinstance(data, dict):
-                        _LOGGER.error("HVV API returned non-dict response: %s", type(data))
-                        return []
-
-                    locations = data.get("locations", [])
-                    results = []
-
-                    for location in locations:
-                        if not isinstance(location, dict):
-                            continue
-
-                        disassembled_name = location.get("disassembledName", "")
-                        place = ""
-                        if "," in disassembled_name:
-                            parts = disassembled_name.rsplit(",", 1)
-                            place = parts[-1].strip() if len(parts) > 1 else ""
-
-                        result = {
-                            "id": location.get("id", ""),
-                            "name": location.get("name", ""),
-                            "place": place,
-                            "area_type": location.get("type", ""),
-                        }
-                        results.append(result)
-
-                    return results
-                else:
-                    _LOGGER.error("HVV API returned status %s", response.status)
-        except Exception as e:
-            _LOGGER.error("Error searching stops: %s", e, exc_info=True)
-
-        return []
+        response = await self._async_request(url)
+        if not response.ok:
+            return []
+
+        data = response.data
+        if not isinstance(data, dict):
+            _LOGGER.error("HVV API returned non-dict response: %s", type(data))
+            return []
+
+        locations = data.get("locations", [])
+        results = []
+
+        for location in locations:
+            if not isinstance(location, dict):
+                continue
+
+            disassembled_name = location.get("disassembledName", "")
+            place = ""
+            if "," in disassembled_name:
+                parts = disassembled_name.rsplit(",", 1)
+                place = parts[-1].strip() if len(parts) > 1 else ""
+
+            result = {
+                "id": location.get("id", ""),
+                "name": location.get("name", ""),
+                "place": place,
+                "area_type": location.get("type", ""),
+            }
+            results.append(result)
+
+        return results
@@ -0,0 +1,158 @@
+"""Token-bucket rate limiting shared per provider and API key.
+
+API_RATE_LIMIT_PER_MINUTE and API_RATE_LIMIT_PER_HOUR are enforced with one
+RateLimiter per (provider, API key), stored in hass.data[DOMAIN]. Every
+coordinator, the shared GTFS-RT feed hub and the config flow stop search
+acquire a token before sending a request. Callers that find the buckets
+empty queue in FIFO order and wait for the next token instead of running
+into HTTP 429 responses.
+
+The limits belong to an API key, so all entries using the same key share
+them. Providers without a key (the EFA departure monitors) have no account
+to share: each config entry gets its own limiter, so N stops of such a
+provider may send up to N times the per-minute and per-hour limits in
+total. The config flow stop search of a keyless provider uses one limiter
+of its own.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import API_RATE_LIMIT_PER_HOUR, API_RATE_LIMIT_PER_MINUTE, DATA_RATE_LIMITERS, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Bucket of `capacity` tokens refilled evenly over `period` seconds."""
+
+    def __init__(self, capacity: int, period: float):
+        """Initialize a full bucket.
+
+        Args:
+            capacity: Maximum number of tokens (requests per period)
+            period: Seconds to refill the bucket from empty to full
+        """
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        """Add the tokens accumulated since the last refill."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Return the seconds until a token is available (0 if one is available now)."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        """Take one token from the bucket."""
+        self._refill()
+        self.tokens -= 1
+
+
+class RateLimiter:
+    """Per-minute and per-hour token buckets for one provider and API key."""
+
+    def __init__(
+        self,
+        name: str,
+        per_minute: int = API_RATE_LIMIT_PER_MINUTE,
+        per_hour: int = API_RATE_LIMIT_PER_HOUR,
+    ):
+        """Initialize the limiter.
+
+        Args:
+            name: Name used in log messages (the provider id)
+            per_minute: Requests allowed per minute
+            per_hour: Requests allowed per hour
+        """
+        self.name = name
+        self.throttled_count = 0
+        self._buckets = (TokenBucket(per_minute, 60), TokenBucket(per_hour, 3600))
+        self._lock = asyncio.Lock()
+        self._waiting = 0
+
+    @property
+    def waiting(self) -> int:
+        """Return the number of callers queued for a token."""
+        return self._waiting
+
+    async def acquire(self) -> None:
+        """Wait for a token in all buckets and take it.
+
+        Callers are served in the order they arrived: asyncio.Lock wakes its
+        waiters in FIFO order, and the caller holding it sleeps until the
+        next token is available.
+        """
+        self._waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    delay = max(bucket.delay() for bucket in self._buckets)
+                    if delay <= 0:
+                        break
+                    self.throttled_count += 1
+                    _LOGGER.debug("%s rate limit reached, waiting %.1f s for the next request", self.name, delay)
+                    await asyncio.sleep(delay)
+
+                for bucket in self._buckets:
+                    bucket.consume()
+        finally:
+            self._waiting -= 1
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is available right away and nobody is queued.
+
+        Used for optional requests (hedges) that are skipped rather than delayed.
+
+        Returns:
+            True if a token was taken
+        """
+        if self._waiting or any(bucket.delay() > 0 for bucket in self._buckets):
+            return False
+        for bucket in self._buckets:
+            bucket.consume()
+        return True
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the limiter state for diagnostics."""
+        minute, hour = self._buckets
+        minute.delay()
+        hour.delay()
+        return {
+            "tokens_minute": round(minute.tokens, 1),
+            "tokens_hour": round(hour.tokens, 1),
+            "waiting": self._waiting,
+            "throttled_count": self.throttled_count,
+        }
+
+
+@callback
+def async_get_rate_limiter(
+    hass: HomeAssistant, provider: str, api_key: Optional[str] = None, entry_id: Optional[str] = None
+) -> RateLimiter:
+    """Return the rate limiter of a provider and API key, creating it on first use.
+
+    Args:
+        hass: Home Assistant instance
+        provider: Provider id
+        api_key: API key of the requests; entries with the same key share a limiter
+        entry_id: Config entry of the requests; without an API key each entry has its own limiter
+    """
+    limiters: Dict[Tuple[str, str], RateLimiter] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_RATE_LIMITERS, {})
+    key = (provider, f"key:{api_key}" if api_key else f"entry:{entry_id or ''}")
+    limiter = limiters.get(key)
+    if limiter is None:
+        limiter = limiters[key] = RateLimiter(provider)
+    return limiter
@@ -0,0 +1,130 @@
+"""Central poll scheduler spreading coordinators over the polling interval.
+
+Coordinators created at the same time with the same scan_interval would
+otherwise poll in lockstep, and every provider would see bursts of requests
+at the start of each interval. Each coordinator registers with the shared
+PollScheduler and gets slot i of N, which corresponds to the phase i/N of
+its interval:
+
+* The first background refresh after a warm start waits until Home
+  Assistant has started (so N is known), then phase * interval seconds.
+* After every update the coordinator's update_interval is set to the time
+  until the next point on its phase grid, epoch + phase * interval +
+  k * interval. The grid corrects itself, so slow responses do not make
+  the coordinators drift back into lockstep.
+
+The scheduler also records when requests were made and reports how evenly
+they are spread, for the diagnostics.
+"""
+
+import math
+import statistics
+from collections import deque
+from typing import Any, Deque, Dict, List
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_POLL_SCHEDULER, DOMAIN, POLL_SCHEDULER_BUCKET, POLL_SCHEDULER_WINDOW
+
+
+class PollScheduler:
+    """Assign evenly spaced poll phases to all coordinators."""
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the scheduler.
+
+        Args:
+            hass: Home Assistant instance
+        """
+        self.hass = hass
+        self._epoch = hass.loop.time()
+        self._slots: List[str] = []
+        self._requests: Deque[float] = deque()
+
+    @property
+    def slot_count(self) -> int:
+        """Return the number of registered coordinators."""
+        return len(self._slots)
+
+    def register(self, key: str) -> None:
+        """Give a coordinator the next free slot."""
+        if key not in self._slots:
+            self._slots.append(key)
+
+    def unregister(self, key: str) -> None:
+        """Release the slot of a coordinator; the others keep their order."""
+        if key in self._slots:
+            self._slots.remove(key)
+
+    def phase(self, key: str) -> float:
+        """Return the phase of a coordinator as fraction of its interval (0 <= phase < 1)."""
+        if key not in self._slots:
+            return 0.0
+        return self._slots.index(key) / len(self._slots)
+
+    def first_refresh_delay(self, key: str, interval: float) -> float:
+        """Return the seconds to wait before the first refresh of a coordinator."""
+        return self.phase(key) * interval
+
+    def next_delay(self, key: str, interval: float) -> float:
+        """Return the seconds until the next poll of a coordinator on its phase grid.
+
+        The next grid point is at least half an interval away, so the delay is
+        between 0.5 and 1.5 intervals.
+
+        Args:
+            key: Coordinator key used for register()
+            interval: Polling interval of the coordinator in seconds
+        """
+        if interval <= 0:
+            return interval
+        offset = self._epoch + self.phase(key) * interval
+        elapsed = (self.hass.loop.time() - offset) % interval
+        delay = interval - elapsed
+        if delay < interval / 2:
+            delay += interval
+        return delay
+
+    def record_request(self) -> None:
+        """Record that a coordinator started an update."""
+        now = self.hass.loop.time()
+        self._requests.append(now)
+        while self._requests and self._requests[0] < now - POLL_SCHEDULER_WINDOW:
+            self._requests.popleft()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return slot and request-rate statistics for diagnostics.
+
+        Requests of the last POLL_SCHEDULER_WINDOW seconds are counted in
+        POLL_SCHEDULER_BUCKET second buckets. A coefficient of variation near
+        0 and a peak close to the mean mean the requests are spread evenly.
+        """
+        now = self.hass.loop.time()
+        window = min(POLL_SCHEDULER_WINDOW, now - self._epoch)
+        bucket_count = max(1, math.ceil(window / POLL_SCHEDULER_BUCKET))
+        buckets = [0] * bucket_count
+        for timestamp in self._requests:
+            age = now - timestamp
+            if age < bucket_count * POLL_SCHEDULER_BUCKET:
+                buckets[min(bucket_count - 1, int(age // POLL_SCHEDULER_BUCKET))] += 1
+
+        mean = statistics.fmean(buckets)
+        return {
+            "coordinators": len(self._slots),
+            "window_seconds": round(window),
+            "bucket_seconds": POLL_SCHEDULER_BUCKET,
+            "requests": sum(buckets),
+            "requests_per_bucket_mean": round(mean, 2),
+            "requests_per_bucket_peak": max(buckets),
+            "coefficient_of_variation": round(statistics.pstdev(buckets) / mean, 2) if mean else None,
+        }
+
+
+@callback
+def async_get_poll_scheduler(hass: HomeAssistant) -> PollScheduler:
+    """Return the poll scheduler shared by all coordinators, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    scheduler = domain_data.get(DATA_POLL_SCHEDULER)
+    if scheduler is None:
+        scheduler = domain_data[DATA_POLL_SCHEDULER] = PollScheduler(hass)
+    return scheduler
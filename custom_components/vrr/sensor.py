@@ -1,29 +1,33 @@
-import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import Any, Callable, Dict, List, Optional, Union
-from zoneinfo import ZoneInfo
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-import aiohttp
-from aiohttp import ClientConnectorError
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorEntityDescription, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import issue_registry as ir
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity, DataUpdateCoordinator, UpdateFailed
 from homeassistant.util import dt as dt_util
 
+from .api_counter import ApiCallCounters, async_get_api_counters
+from .circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    async_get_circuit_breaker,
+)
 from .const import (
-    API_BASE_URL_HVV,
-    API_BASE_URL_KVV,
-    API_BASE_URL_NTA_GTFSR,
-    API_BASE_URL_TRAFIKLAB,
-    API_BASE_URL_VRR,
     API_RATE_LIMIT_PER_DAY,
+    CONF_ADAPTIVE_POLLING,
     CONF_DEPARTURES,
+    CONF_HEDGED_REQUESTS,
+    CONF_MAX_SCAN_INTERVAL,
     CONF_NTA_API_KEY,
     CONF_NTA_API_KEY_SECONDARY,
     CONF_PROVIDER,
@@ -33,28 +37,86 @@ from .const import (
     CONF_TRANSPORTATION_TYPES,
     CONF_USE_PROVIDER_LOGO,
     DEFAULT_DEPARTURES,
+    DEFAULT_MAX_SCAN_INTERVAL,
     DEFAULT_NAME,
     DEFAULT_PLACE,
     DEFAULT_SCAN_INTERVAL,
     DOMAIN,
-    HVV_TRANSPORTATION_TYPES,
-    KVV_TRANSPORTATION_TYPES,
-    NTA_TRANSPORTATION_TYPES,
+    HEDGED_REQUEST_PROVIDERS,
     PROVIDER_ENTITY_PICTURES,
-    PROVIDER_HVV,
-    PROVIDER_KVV,
     PROVIDER_NTA_IE,
     PROVIDER_TRAFIKLAB_SE,
     PROVIDER_VRR,
-    TRAFIKLAB_TRANSPORTATION_TYPES,
+    REFRESH_BUDGET_FRACTION,
+    REFRESH_BUDGET_MAX,
+    REFRESH_BUDGET_MIN,
     TRANSPORTATION_TYPES,
 )
-from .data_models import UnifiedDeparture
-from .parsers import parse_departure_generic
+from .data_models import DepartureBoard, UnifiedDeparture
+from .latency import async_get_latency_tracker
+from .metrics import (
+    METRIC_BYTES_RECEIVED,
+    METRIC_DECODE_TIME,
+    METRIC_EVENTS_IN,
+    METRIC_EVENTS_OUT,
+    METRIC_PARSE_TIME,
+    METRIC_REQUEST_LATENCY,
+    METRIC_RETRIES,
+    RefreshMetrics,
+)
+from .offload import STAGE_DEPARTURE_PARSE, async_get_offloader
+from .polling import AdaptivePollingPolicy
 from .providers import get_provider
+from .rate_limiter import async_get_rate_limiter
+from .scheduler import async_get_poll_scheduler
+from .single_flight import async_get_single_flight
+from .state_writes import StateWriteFilter, state_fingerprint
+from .transport import DeadlineExceededError, ResilientTransport, TransportMetrics
+from .warm_start import DepartureSnapshotStore
 
 _LOGGER = logging.getLogger(__name__)
 
+METRIC_BREAKER_STATE = "breaker_state"
+
+_TIME_METRIC = {
+    "native_unit_of_measurement": UnitOfTime.MILLISECONDS,
+    "device_class": SensorDeviceClass.DURATION,
+    "state_class": SensorStateClass.MEASUREMENT,
+}
+
+# Diagnostic sensors of the refresh metrics (see metrics.py), disabled by default
+REFRESH_METRIC_SENSORS: Tuple[SensorEntityDescription, ...] = (
+    SensorEntityDescription(
+        key=METRIC_REQUEST_LATENCY, name="Request latency", icon="mdi:timer-outline", **_TIME_METRIC
+    ),
+    SensorEntityDescription(
+        key=METRIC_BYTES_RECEIVED,
+        name="Bytes received",
+        icon="mdi:download-network",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensorEntityDescription(key=METRIC_DECODE_TIME, name="Decode time", icon="mdi:code-json", **_TIME_METRIC),
+    SensorEntityDescription(key=METRIC_PARSE_TIME, name="Parse time", icon="mdi:cog-outline", **_TIME_METRIC),
+    SensorEntityDescription(
+        key=METRIC_EVENTS_IN, name="Events in", icon="mdi:import", state_class=SensorStateClass.MEASUREMENT
+    ),
+    SensorEntityDescription(
+        key=METRIC_EVENTS_OUT, name="Events out", icon="mdi:export", state_class=SensorStateClass.MEASUREMENT
+    ),
+    SensorEntityDescription(
+        key=METRIC_RETRIES, name="Retries", icon="mdi:reload", state_class=SensorStateClass.MEASUREMENT
+    ),
+    SensorEntityDescription(
+        key=METRIC_BREAKER_STATE,
+        name="Circuit breaker",
+        icon="mdi:electric-switch",
+        device_class=SensorDeviceClass.ENUM,
+        options=[STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN],
+    ),
+)
+
 
 class VRRDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching VRR/KVV/HVV data from API."""
@@ -70,6 +132,10 @@ class VRRDataUpdateCoordinator(DataUpdateCoordinator):
         scan_interval: int,
         config_entry: Optional[ConfigEntry] = None,
         api_key: Optional[str] = None,
+        adaptive_polling: bool = False,
+        max_scan_interval: int = DEFAULT_MAX_SCAN_INTERVAL,
+        hedged_requests: bool = False,
+        transportation_types: Optional[List[str]] = None,
     ):
         """Initialize."""
         self.provider = provider
@@ -79,8 +145,27 @@ class VRRDataUpdateCoordinator(DataUpdateCoordinator):
         self.departures_limit = departures_limit
         self._api_calls_today = 0
         self._last_api_reset = datetime.now().date()
+        self._api_counters: Optional[ApiCallCounters] = None
+        # Last board on disk for warm starts, set up by async_setup_entry
+        self.snapshot_store: Optional[DepartureSnapshotStore] = None
         self.api_key = api_key  # For Trafiklab API or NTA API (Primary)
         self.api_key_secondary: Optional[str] = None  # For NTA API (Secondary, optional fallback)
+        self.scan_interval = scan_interval
+        self.adaptive_polling: Optional[AdaptivePollingPolicy] = None
+        # Interval before aligning it to this coordinator's phase (see scheduler.py)
+        self.poll_interval: float = scan_interval
+        # True while the last departures are served because the API is unavailable
+        self.stale = False
+        # Refreshes that ran out of their time budget (see refresh_budget)
+        self.deadline_misses = 0
+        # Latency, size, decode and parse figures of recent refreshes (see metrics.py)
+        self.refresh_metrics = RefreshMetrics()
+        # Transportation types shown by the entities, set by set_transportation_types
+        self.transportation_types: List[str] = list(TRANSPORTATION_TYPES.keys())
+        # Departures parsed from data once for all entities (see async_update_board)
+        self._board: Optional[DepartureBoard] = None
+        self._board_data: Optional[Dict[str, Any]] = None
+        self._board_key: Optional[Tuple[Any, ...]] = None
 
         # Note: config_entry parameter was added in HA 2024.11+
         # We store it ourselves for compatibility with older versions
@@ -97,8 +182,21 @@ class VRRDataUpdateCoordinator(DataUpdateCoordinator):
                 else None
             ),
         )
-        if not self.provider_instance:
+        if self.provider_instance:
+            # One limiter per provider and API key, shared by its coordinators (per entry without a key)
+            self.provider_instance.rate_limiter = async_get_rate_limiter(
+                hass, provider, api_key, config_entry.entry_id if config_entry else None
+            )
+            # One breaker per provider endpoint, shared by all coordinators
+            self.provider_instance.circuit_breaker = async_get_circuit_breaker(hass, provider)
+            # One latency tracker per provider endpoint, shared by all coordinators
+            self.provider_instance.latency_tracker = async_get_latency_tracker(hass, provider)
+            # Large responses are decoded in the executor
+            self.provider_instance.transport.offloader = async_get_offloader(hass)
+            self.set_hedging(hedged_requests)
+        else:
             _LOGGER.error("Failed to initialize provider: %s", provider)
+        self.set_transportation_types(transportation_types)
 
         # Get secondary key from config entry if available (only for NTA)
         if provider == PROVIDER_NTA_IE and config_entry:
@@ -109,7 +207,56 @@ class VRRDataUpdateCoordinator(DataUpdateCoordinator):
             _LOGGER,
             name=f"{provider.upper()} {place_dm} - {name_dm}",
             update_interval=timedelta(seconds=scan_interval),
+            # Providers return the previous payload object for unchanged responses
+            # (304 Not Modified, same GTFS-RT feed timestamp); listeners are only
+            # notified when the data actually changed.
+            always_update=False,
+        )
+        self.set_polling(scan_interval, adaptive_polling, max_scan_interval)
+
+        # Spread the polls of all coordinators evenly over their interval
+        self.scheduler_key = config_entry.entry_id if config_entry else f"{provider}_{id(self)}"
+        self.poll_scheduler = async_get_poll_scheduler(hass)
+        self.poll_scheduler.register(self.scheduler_key)
+
+    def set_polling(self, scan_interval: int, adaptive_polling: bool, max_scan_interval: int) -> None:
+        """Configure fixed or adaptive polling.
+
+        Args:
+            scan_interval: Polling interval in seconds; the shortest interval in adaptive mode
+            adaptive_polling: Derive the interval from the upcoming departures
+            max_scan_interval: Longest interval in seconds in adaptive mode
+        """
+        self.scan_interval = scan_interval
+        self.adaptive_polling = AdaptivePollingPolicy(scan_interval, max_scan_interval) if adaptive_polling else None
+        self.poll_interval = scan_interval
+        self.update_interval = timedelta(seconds=scan_interval)
+
+    def set_hedging(self, enabled: bool) -> None:
+        """Enable or disable hedged departure requests.
+
+        Only the EFA providers support hedging; the option is ignored for others.
+
+        Args:
+            enabled: Send a second request when the first one is slower than usual
+        """
+        if self.provider_instance:
+            self.provider_instance.hedge_requests = enabled and self.provider in HEDGED_REQUEST_PROVIDERS
+
+    def set_transportation_types(self, transportation_types: Optional[List[str]]) -> None:
+        """Show and request only the given transportation types.
+
+        The board keeps only departures of these types. The EFA providers
+        also leave the other means of transport out of the request.
+
+        Args:
+            transportation_types: Enabled types; None or empty shows and requests all types
+        """
+        self.transportation_types = (
+            list(transportation_types) if transportation_types else list(TRANSPORTATION_TYPES.keys())
         )
+        if self.provider_instance:
+            self.provider_instance.transportation_types = list(transportation_types) if transportation_types else None
 
     async def async_shutdown(self) -> None:
         """Shutdown the coordinator and cleanup resources.
@@ -118,6 +265,7 @@ class VRRDataUpdateCoordinator(DataUpdateCoordinator):
         to ensure proper cleanup of provider resources (e.g., GTFS data).
         """
         _LOGGER.debug("Shutting down coordinator for %s", self.provider)
+        self.poll_scheduler.unregister(self.scheduler_key)
 
         # Cleanup provider resources (including GTFS data reference)
         if self.provider_instance and hasattr(self.provider_instance, "cleanup"):
@@ -127,12 +275,39 @@ class VRRDataUpdateCoordinator(DataUpdateCoordinator):
             except Exception as e:
                 _LOGGER.warning("Error during provider cleanup for %s: %s", self.provider, e)
 
+    async def async_restore_api_calls(self) -> None:
+        """Restore today's API call count stored before a restart or reload."""
+        if self._config_entry is None:
+            return
+
+        self._api_counters = await async_get_api_counters(self.hass)
+        stored = self._api_counters.get(self._config_entry.entry_id)
+        if stored is None:
+            return
+
+        calls, day = stored
+        if day == datetime.now().date():
+            self._api_calls_today = max(self._api_calls_today, calls)
+            self._last_api_reset = day
+            _LOGGER.debug("Restored %d API calls made today for %s", calls, self.name)
+
+    def _record_api_call(self) -> None:
+        """Count an API call and schedule saving the counter."""
+        self._api_calls_today += 1
+        self._save_api_calls()
+
+    def _save_api_calls(self) -> None:
+        """Schedule a batched save of the API call counter."""
+        if self._api_counters is not None and self._config_entry is not None:
+            self._api_counters.async_update(self._config_entry.entry_id, self._api_calls_today, self._last_api_reset)
+
     def _check_rate_limit(self) -> bool:
         """Check if we're within API rate limits."""
         today = datetime.now().date()
         if today > self._last_api_reset:
             self._api_calls_today = 0
             self._last_api_reset = today
+            self._save_api_calls()
             # Clear rate limit repair issue when new day starts
             ir.async_delete_issue(self.hass, DOMAIN, f"rate_limit_{self.provider}")
 
@@ -155,6 +330,22 @@ class VRRDataUpdateCoordinator(DataUpdateCoordinator):
         return True
 
     async def _async_update_data(self) -> Dict[str, Any]:
+        """Fetch data from API and align the next poll with this coordinator's phase."""
+        self.poll_scheduler.record_request()
+        try:
+            board_key = self._board_key
+            data = await self._async_fetch_data()
+            await self.async_update_board(data)
+            if data is self.data and self._board_key != board_key:
+                # Reused data does not notify the listeners (always_update=False),
+                # but the minutes until departure and the departed filtering moved on
+                self.async_update_listeners()
+            return data
+        finally:
+            next_delay = self.poll_scheduler.next_delay(self.scheduler_key, self.poll_interval)
+            self.update_interval = timedelta(seconds=next_delay)
+
+    async def _async_fetch_data(self) -> Dict[str, Any]:
         """Fetch data from API."""
         if not self._check_rate_limit():
             # Return last known data instead of failing
@@ -163,9 +354,28 @@ class VRRDataUpdateCoordinator(DataUpdateCoordinator):
             raise UpdateFailed("API rate limit reached")
 
         try:
-            data = await self._fetch_departures()
+            # Identical requests of other coordinators (or a service call racing a
+            # scheduled poll) share one HTTP request; only the caller sending it
+            # counts against the daily API budget.
+            transport_metrics = self._transport_metrics
+            refresh_start = self.refresh_metrics.start_refresh(transport_metrics)
+            try:
+                data, sent_request = await async_get_single_flight(self.hass).do(
+                    self._request_key, self._fetch_departures
+                )
+            finally:
+                self.refresh_metrics.finish_refresh(refresh_start, transport_metrics, self._breaker_state)
             if data and isinstance(data, dict):
-                self._api_calls_today += 1
+                if sent_request:
+                    self._record_api_call()
+                self._set_stale(False)
+                if data is self.data:
+                    _LOGGER.debug("Departures for %s unchanged, reusing last result", self.name)
+                elif self.snapshot_store is not None:
+                    self.snapshot_store.async_save(data)
+                if self.adaptive_polling:
+                    await self.async_update_board(data)
+                    self.poll_interval = self.adaptive_polling.next_interval(self.board)
                 # Clear API error repair issue on successful fetch
                 ir.async_delete_issue(self.hass, DOMAIN, f"api_error_{self.provider}")
                 return data
@@ -183,6 +393,15 @@ class VRRDataUpdateCoordinator(DataUpdateCoordinator):
                     },
                 )
                 raise UpdateFailed("Invalid or empty API response")
+        except (CircuitOpenError, DeadlineExceededError) as err:
+            # The endpoint is down or too slow: keep showing the last departures
+            if isinstance(err, DeadlineExceededError):
+                self.deadline_misses += 1
+            if self.data:
+                _LOGGER.debug("%s, serving last departures of %s as stale", err, self.name)
+                self._set_stale(True)
+                return self.data
+            raise UpdateFailed(str(err)) from err
         except UpdateFailed:
             raise
         except Exception as err:
@@ -200,530 +419,164 @@ class VRRDataUpdateCoordinator(DataUpdateCoordinator):
             )
             raise UpdateFailed(f"Error fetching data: {err}")
 
+    @property
+    def refresh_budget(self) -> float:
+        """Return the seconds one refresh may take, including retries.
+
+        The budget is a fraction of the polling interval, so a slow API does
+        not delay the next poll.
+        """
+        budget = self.poll_interval * REFRESH_BUDGET_FRACTION
+        return min(REFRESH_BUDGET_MAX, max(REFRESH_BUDGET_MIN, budget))
+
+    def _set_stale(self, stale: bool) -> None:
+        """Mark the current data as stale or fresh and notify the entities of a change.
+
+        The data object itself may be unchanged, which does not notify the
+        listeners (always_update=False), so they are updated here.
+        """
+        if stale == self.stale:
+            return
+        self.stale = stale
+        if self.data:
+            self.async_update_listeners()
+
+    @property
+    def _transport_metrics(self) -> Optional[TransportMetrics]:
+        """Return the counters of the provider's transport, if it has one."""
+        transport = getattr(self.provider_instance, "transport", None)
+        return transport.metrics if isinstance(transport, ResilientTransport) else None
+
+    @property
+    def _breaker_state(self) -> Optional[str]:
+        """Return the state of the provider endpoint's circuit breaker, if it has one."""
+        circuit_breaker = getattr(self.provider_instance, "circuit_breaker", None)
+        return circuit_breaker.state if isinstance(circuit_breaker, CircuitBreaker) else None
+
+    @property
+    def _request_key(self) -> Tuple[Any, ...]:
+        """Return the key identifying identical departure requests."""
+        station = self.station_id or (self.place_dm, self.name_dm)
+        transportation_types = getattr(self.provider_instance, "transportation_types", None)
+        types_key = tuple(sorted(transportation_types)) if transportation_types else None
+        return (self.provider, station, self.departures_limit, types_key)
+
     async def _fetch_departures(self) -> Optional[Dict[str, Any]]:
         """Fetch departure data from the API."""
         if self.provider_instance:
+            # Retries stop once the refresh budget is used up
+            self.provider_instance.deadline = time.monotonic() + self.refresh_budget
             return await self.provider_instance.fetch_departures(
                 self.station_id, self.place_dm, self.name_dm, self.departures_limit
             )
 
-        # Fallback to old implementation if provider not found
-        _LOGGER.warning("Provider instance not found, using fallback for %s", self.provider)
-        if self.provider == PROVIDER_VRR:
-            base_url = API_BASE_URL_VRR
-        elif self.provider == PROVIDER_KVV:
-            base_url = API_BASE_URL_KVV
-        elif self.provider == PROVIDER_HVV:
-            base_url = API_BASE_URL_HVV
-        else:
-            raise ValueError(f"Unsupported provider: {self.provider}")
-
-        if self.station_id:
-            params = (
-                f"outputFormat=RapidJSON&"
-                f"stateless=1&"
-                f"type_dm=any&"
-                f"name_dm={self.station_id}&"
-                f"mode=direct&"
-                f"useRealtime=1&"
-                f"limit={self.departures_limit}"
-            )
-        else:
-            params = (
-                f"outputFormat=RapidJSON&"
-                f"place_dm={self.place_dm}&"
-                f"type_dm=stop&"
-                f"name_dm={self.name_dm}&"
-                f"mode=direct&"
-                f"useRealtime=1&"
-                f"limit={self.departures_limit}"
-            )
-
-        url = f"{base_url}?{params}"
-        session = async_get_clientsession(self.hass)
+        # get_provider only returns None for unknown providers
+        raise UpdateFailed(f"Unsupported provider: {self.provider}")
 
-        headers = {"User-Agent": f"Mozilla/5.0 (compatible; HomeAssistant {self.provider.upper()} Integration)"}
-
-        max_retries = 3
-        for attempt in range(1, max_retries + 1):
-            try:
-                async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status == 200:
-                        try:
-                            json_data = await response.json()
-                            # Validate response structure
-                            if not isinstance(json_data, dict):
-                                _LOGGER.warning(
-                                    "%s API returned non-dict response: %s", self.provider.upper(), type(json_data)
-                                )
-                                return None
-
-                            # Validate that response contains expected data
-                            if "stopEvents" not in json_data:
-                                _LOGGER.debug("%s API response missing 'stopEvents' field", self.provider.upper())
-                                # Return empty structure instead of None to avoid errors
-                                return {"stopEvents": []}
-
-                            return json_data
-                        except (ValueError, aiohttp.ContentTypeError) as e:
-                            _LOGGER.warning("%s API returned invalid JSON: %s", self.provider.upper(), e)
-                            return None
-                        except Exception as e:
-                            _LOGGER.warning("%s API JSON parsing failed: %s", self.provider.upper(), e)
-                            return None
-                    elif response.status == 404:
-                        _LOGGER.warning("%s API endpoint not found (404)", self.provider.upper())
-                        return None
-                    elif response.status >= 500:
-                        _LOGGER.warning("%s API server error (status %s)", self.provider.upper(), response.status)
-                    else:
-                        _LOGGER.warning("%s API returned status %s", self.provider.upper(), response.status)
-
-            except asyncio.TimeoutError:
-                _LOGGER.warning("%s API timeout on attempt %s", self.provider.upper(), attempt)
-            except Exception as e:
-                _LOGGER.warning("Attempt %s failed: %s", attempt, e)
+    @property
+    def board(self) -> DepartureBoard:
+        """Return the departures of the current data, shared by all entities.
 
-            if attempt < max_retries:
-                await asyncio.sleep(2**attempt)
+        The board is parsed by async_update_board during each refresh, so the
+        entities only read it and never parse on the event loop themselves.
+        """
+        if self._board is None:
+            return DepartureBoard.from_departures([])
+        return self._board
+
+    def _board_cache_key(self) -> Tuple[Any, ...]:
+        """Return the options and the minute the current board was parsed for."""
+        return (tuple(self.transportation_types), self.departures_limit, self._board_minute())
+
+    @staticmethod
+    def _board_minute() -> int:
+        """Return the current minute the time-relative departure fields refer to."""
+        return int(dt_util.utcnow().timestamp() // 60)
+
+    async def async_update_board(self, data: Optional[Dict[str, Any]]) -> bool:
+        """Parse the board of new data unless it is still current.
+
+        The board is parsed again when the data object, the transportation
+        types, the departures limit or the current minute changed. Unchanged
+        responses keep the previous data object (see _async_fetch_data), so
+        they are only parsed again once the minutes until departure and the
+        departed filtering move on. Large responses are parsed in the executor
+        (see offload.py), using the number of stop events as the size of the
+        stage.
 
-        return None
+        Args:
+            data: Data returned by a refresh or restored from the warm-start snapshot
 
-    async def _fetch_departures_trafiklab(self) -> Optional[Dict[str, Any]]:
-        """Fetch departure data from Trafiklab API."""
-        if not self.api_key:
-            _LOGGER.error("Trafiklab API key is required")
-            return None
+        Returns:
+            True if a new board was parsed
+        """
+        key = self._board_cache_key()
+        if self._board is not None and data is self._board_data and key == self._board_key:
+            return False
+        stop_events = data.get("stopEvents") if isinstance(data, dict) else None
+        size = len(stop_events) if isinstance(stop_events, list) else 0
+        board, parse_time = await async_get_offloader(self.hass).async_run(
+            STAGE_DEPARTURE_PARSE, size, self._parse_board, data
+        )
+        self._board = board
+        self._board_data = data
+        self._board_key = key
+        if parse_time is not None:
+            self.refresh_metrics.record_parse(parse_time, board.events_in, len(board.departures))
+        return True
 
-        if not self.station_id:
-            _LOGGER.error("Trafiklab requires a station ID")
-            return None
+    def _parse_board(self, data: Optional[Dict[str, Any]]) -> Tuple[DepartureBoard, Optional[float]]:
+        """Parse and aggregate the departures of a response.
 
-        url = f"{API_BASE_URL_TRAFIKLAB}/departures/{self.station_id}"
-        params = {"key": self.api_key}
-        session = async_get_clientsession(self.hass)
+        Filters the departures by the configured transportation types and
+        keeps the earliest departures_limit of them. Does not touch Home
+        Assistant state, so it may run in the executor.
 
-        headers = {"User-Agent": "Mozilla/5.0 (compatible; HomeAssistant Trafiklab Integration)"}
+        Args:
+            data: Raw API response containing stopEvents
 
-        max_retries = 3
-        for attempt in range(1, max_retries + 1):
-            try:
-                async with session.get(
-                    url, params=params, headers=headers, timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    if response.status == 200:
-                        try:
-                            json_data = await response.json()
-                            # Validate response structure
-                            if not isinstance(json_data, dict):
-                                _LOGGER.warning("Trafiklab API returned non-dict response: %s", type(json_data))
-                                return None
-
-                            # Trafiklab API returns "departures" not "stopEvents"
-                            # We'll normalize it to match our expected structure
-                            if "departures" not in json_data:
-                                _LOGGER.debug("Trafiklab API response missing 'departures' field")
-                                return {"stopEvents": []}
-
-                            # Convert Trafiklab format to our expected format
-                            departures = json_data.get("departures", [])
-                            _LOGGER.debug("Trafiklab API returned %d departures", len(departures))
-                            stop_events = []
-
-                            # Get Stockholm timezone offset once (not for each departure)
-                            stockholm_tz = dt_util.get_time_zone("Europe/Stockholm")
-                            offset_formatted = "+01:00"  # Default to CET
-                            if stockholm_tz:
-                                now_stockholm = datetime.now(stockholm_tz)
-                                offset = now_stockholm.strftime("%z")
-                                offset_formatted = f"{offset[:3]}:{offset[3:]}"  # +0100 -> +01:00
-
-                            for dep in departures:
-                                # Skip invalid entries
-                                if not isinstance(dep, dict):
-                                    continue
-
-                                # Map Trafiklab structure to our stopEvents format
-                                # Trafiklab uses: scheduled, realtime, route.designation, route.destination.name
-                                scheduled_time = dep.get("scheduled")
-                                realtime_time = dep.get("realtime")
-                                route = dep.get("route") or {}  # Handle None
-                                platform_data = dep.get("scheduled_platform") or dep.get("realtime_platform") or {}
-                                transport_mode = route.get("transport_mode", "BUS") if route else "BUS"
-
-                                # Get destination safely (handle None)
-                                destination_obj = route.get("destination") if route else None
-                                destination_name = (
-                                    destination_obj.get("name", "Unknown")
-                                    if isinstance(destination_obj, dict)
-                                    else "Unknown"
-                                )
-
-                                # Trafiklab returns time without timezone, it's in local Swedish time
-                                if scheduled_time and "+" not in scheduled_time and "Z" not in scheduled_time:
-                                    scheduled_time = f"{scheduled_time}{offset_formatted}"
-                                if realtime_time and "+" not in realtime_time and "Z" not in realtime_time:
-                                    realtime_time = f"{realtime_time}{offset_formatted}"
-
-                                stop_event = {
-                                    "departureTimePlanned": scheduled_time,
-                                    "departureTimeEstimated": realtime_time or scheduled_time,
-                                    "transportation": {
-                                        "number": route.get("designation", "") if route else "",
-                                        "description": (
-                                            (route.get("name") or route.get("direction", "")) if route else ""
-                                        ),
-                                        "destination": {"name": destination_name},
-                                        "product": {"class": 0},  # Will be mapped from transportMode
-                                    },
-                                    "platform": {"name": platform_data.get("designation", "") if platform_data else ""},
-                                    "realtimeStatus": ["MONITORED"] if dep.get("is_realtime") else [],
-                                    "transportMode": transport_mode,  # Trafiklab specific (TRAIN, BUS, etc.)
-                                }
-                                stop_events.append(stop_event)
-                                _LOGGER.debug(
-                                    "Trafiklab departure: Line %s to %s at %s (mode: %s)",
-                                    route.get("designation") if route else "?",
-                                    destination_name,
-                                    scheduled_time,
-                                    transport_mode,
-                                )
-
-                            return {"stopEvents": stop_events}
-                        except (ValueError, aiohttp.ContentTypeError) as e:
-                            _LOGGER.warning("Trafiklab API returned invalid JSON: %s", e)
-                            return None
-                        except Exception as e:
-                            _LOGGER.warning("Trafiklab API JSON parsing failed: %s", e)
-                            return None
-                    elif response.status == 404:
-                        _LOGGER.warning("Trafiklab API endpoint not found (404)")
-                        return None
-                    elif response.status == 401:
-                        _LOGGER.warning("Trafiklab API authentication failed (401) - check API key")
-                        return None
-                    elif response.status >= 500:
-                        _LOGGER.warning(
-                            "Trafiklab API server error (status %s) on attempt %d/%d",
-                            response.status,
-                            attempt,
-                            max_retries,
-                        )
-                        # Retry on server errors
-                        if attempt < max_retries:
-                            await asyncio.sleep(2**attempt)
-                            continue
-                        _LOGGER.error(
-                            "Trafiklab API server error (status %s) after %d attempts. "
-                            "The Trafiklab service may be temporarily unavailable. Please try again later.",
-                            response.status,
-                            max_retries,
-                        )
-                        return None
-                    else:
-                        _LOGGER.warning(
-                            "Trafiklab API returned status %s on attempt %d/%d", response.status, attempt, max_retries
-                        )
-                        if attempt < max_retries:
-                            await asyncio.sleep(2**attempt)
-                            continue
-
-            except asyncio.TimeoutError:
-                _LOGGER.warning("Trafiklab API timeout on attempt %d/%d", attempt, max_retries)
-                if attempt < max_retries:
-                    await asyncio.sleep(2**attempt)
-                    continue
-                _LOGGER.error("Trafiklab API request timeout after %d attempts", max_retries)
-            except ClientConnectorError as e:
-                _LOGGER.warning("Trafiklab API connection error on attempt %d/%d: %s", attempt, max_retries, e)
-                if attempt < max_retries:
-                    await asyncio.sleep(2**attempt)
-                    continue
-                _LOGGER.error("Trafiklab API connection failed after %d attempts: %s", max_retries, e)
-            except Exception as e:
-                _LOGGER.warning("Attempt %d/%d failed: %s", attempt, max_retries, e)
-                if attempt < max_retries:
-                    await asyncio.sleep(2**attempt)
-                    continue
+        Returns:
+            DepartureBoard of the response (empty if the response is invalid)
+            and the seconds spent parsing it (None if it was invalid)
+        """
+        if not data:
+            return DepartureBoard.from_departures([]), None
 
-        return None
+        # Validate response structure
+        if not isinstance(data, dict):
+            _LOGGER.error("Invalid API response: expected dict, got %s", type(data))
+            return DepartureBoard.from_departures([]), None
 
-    async def _fetch_departures_nta(self) -> Optional[Dict[str, Any]]:
-        """Fetch departure data from NTA GTFS-RT API."""
-        if not self.api_key:
-            _LOGGER.error("NTA API key is required")
-            return None
+        stop_events = data.get("stopEvents", [])
 
-        if not self.station_id:
-            _LOGGER.error("NTA requires a station ID (stop_id)")
-            return None
+        # Validate stopEvents is a list
+        if not isinstance(stop_events, list):
+            _LOGGER.error("Invalid stopEvents in API response: expected list, got %s", type(stop_events))
+            return DepartureBoard.from_departures([]), None
 
-        url = f"{API_BASE_URL_NTA_GTFSR}/v2/TripUpdates"
-        params = {"format": "json"}
-        session = async_get_clientsession(self.hass)
+        started = time.perf_counter()
+        departures: List[UnifiedDeparture] = []
+        if stop_events:
+            departures = self._parse_departures(stop_events)
+        board = DepartureBoard.from_departures(departures, len(stop_events))
+        return board, time.perf_counter() - started
 
-        # Use Primary Key in header (preferred method)
-        # If Primary Key fails, Secondary Key can be used as fallback
-        headers = {
-            "User-Agent": "Mozilla/5.0 (compatible; HomeAssistant NTA Integration)",
-            "x-api-key": self.api_key,
-        }
+    def _parse_departures(self, stop_events: List[Dict[str, Any]]) -> List[UnifiedDeparture]:
+        """Parse the earliest departures of the enabled transportation types.
 
-        max_retries = 3
-        current_api_key = self.api_key
-        for attempt in range(1, max_retries + 1):
-            try:
-                # Update header with current API key (Primary or Secondary as fallback)
-                headers["x-api-key"] = current_api_key
-
-                async with session.get(
-                    url, params=params, headers=headers, timeout=aiohttp.ClientTimeout(total=15)
-                ) as response:
-                    if response.status == 200:
-                        try:
-                            # Stream JSON parsing for large responses (more memory efficient)
-                            json_data = await response.json()
-
-                            # Validate response structure early
-                            if not isinstance(json_data, dict):
-                                _LOGGER.warning("NTA API returned non-dict response: %s", type(json_data))
-                                return None
-
-                            # GTFS-RT structure: {header: {...}, entity: [...]}
-                            entities = json_data.get("entity", [])
-                            if not isinstance(entities, list):
-                                _LOGGER.debug("NTA API response missing or invalid 'entity' field")
-                                return {"stopEvents": []}
-
-                            entity_count = len(entities)
-                            if entity_count == 0:
-                                _LOGGER.debug("NTA API returned empty entities list")
-                                return {"stopEvents": []}
-
-                            _LOGGER.info(
-                                "NTA API returned %d entities (processing for stop %s)", entity_count, self.station_id
-                            )
-
-                            # Filter entities for our stop_id and convert to stopEvents format
-                            stop_events = []
-                            target_stop_id = self.station_id
-                            max_departures = self.departures_limit * 3  # Get more than needed for filtering
-
-                            # Early exit optimization: check if stop_time_updates contain our stop_id
-                            # before processing the entire entity
-                            processed_entities = 0
-                            for entity in entities:
-                                if not isinstance(entity, dict):
-                                    continue
-
-                                trip_update = entity.get("trip_update")
-                                if not isinstance(trip_update, dict):
-                                    continue
-
-                                # Quick check: does this entity have stop_time_updates for our stop?
-                                stop_time_updates = trip_update.get("stop_time_update", [])
-                                if not isinstance(stop_time_updates, list) or len(stop_time_updates) == 0:
-                                    continue
-
-                                # Early filter: check if any stop_time_update matches our stop_id
-                                # before processing trip info (saves CPU)
-                                matching_stop_time = None
-                                for stop_time_update in stop_time_updates:
-                                    if not isinstance(stop_time_update, dict):
-                                        continue
-                                    stop_id = stop_time_update.get("stop_id")
-                                    if stop_id == target_stop_id:
-                                        matching_stop_time = stop_time_update
-                                        break  # Found match, no need to check more
-
-                                # Skip this entity if no matching stop_time_update found
-                                if matching_stop_time is None:
-                                    continue
-
-                                # Only process trip info if we have a matching stop
-                                trip = trip_update.get("trip", {})
-                                if not isinstance(trip, dict):
-                                    continue
-
-                                # Use the matching stop_time_update we already found
-                                stop_time_update = matching_stop_time
-
-                                # Found a departure for our stop
-                                route_id = trip.get("route_id", "")
-                                trip_id = trip.get("trip_id", "")
-                                stop_id = stop_time_update.get(
-                                    "stop_id", target_stop_id
-                                )  # Use stop_id from update if available
-
-                                # Extract route info from route_id (without GTFS Static)
-                                route_short_name = route_id.split("_")[0] if route_id else ""
-                                route_type = 3  # Default to bus
-                                # Try to detect Luas (tram) from route_id
-                                if route_short_name and route_short_name.lower() in ["red", "green", "luas"]:
-                                    route_type = 0  # Tram/Light rail for Luas
-
-                                # Get delay (in seconds)
-                                departure = stop_time_update.get("departure", {})
-                                arrival = stop_time_update.get("arrival", {})
-                                delay_seconds = departure.get("delay") or arrival.get("delay") or 0
-
-                                # Get scheduled time
-                                schedule_relationship = stop_time_update.get("schedule_relationship", "SCHEDULED")
-
-                                # Skip canceled trips
-                                if schedule_relationship in ["CANCELED", "SKIPPED"]:
-                                    continue
-
-                                # Use route_short_name as destination placeholder (without GTFS Static)
-                                destination = route_short_name or "Unknown"
-
-                                # Calculate time from GTFS-RT data
-                                now = dt_util.now()
-
-                                # Get time from departure/arrival if available
-                                departure_time = departure.get("time")
-                                arrival_time = arrival.get("time")
-
-                                if departure_time:
-                                    # POSIX timestamp
-                                    try:
-                                        planned_time = datetime.fromtimestamp(departure_time, tz=now.tzinfo)
-                                        estimated_time = planned_time + timedelta(seconds=delay_seconds)
-                                    except (ValueError, OSError):
-                                        # Fallback to current time + delay
-                                        planned_time = now
-                                        estimated_time = now + timedelta(seconds=delay_seconds)
-                                elif arrival_time:
-                                    try:
-                                        planned_time = datetime.fromtimestamp(arrival_time, tz=now.tzinfo)
-                                        estimated_time = planned_time + timedelta(seconds=delay_seconds)
-                                    except (ValueError, OSError):
-                                        planned_time = now
-                                        estimated_time = now + timedelta(seconds=delay_seconds)
-                                else:
-                                    # No time field, estimate from delay
-                                    planned_time = now
-                                    estimated_time = now + timedelta(seconds=delay_seconds)
-
-                                # Format times
-                                planned_time_str = planned_time.strftime("%Y-%m-%dT%H:%M:%S%z")
-                                estimated_time_str = estimated_time.strftime("%Y-%m-%dT%H:%M:%S%z")
-
-                                # Map route_type to transport type for logging
-                                transport_type_mapped = NTA_TRANSPORTATION_TYPES.get(route_type, "bus")
-                                _LOGGER.debug(
-                                    "NTA Departure: line=%s, destination=%s, route_type=%d -> transport_type=%s",
-                                    route_short_name,
-                                    destination,
-                                    route_type,
-                                    transport_type_mapped,
-                                )
-
-                                # Try to get platform from stop_time_update (GTFS-RT extension)
-                                platform = (
-                                    stop_time_update.get("platform_code") or stop_time_update.get("platform") or ""
-                                )
-
-                                stop_event = {
-                                    "departureTimePlanned": planned_time_str,
-                                    "departureTimeEstimated": estimated_time_str,
-                                    "transportation": {
-                                        "number": route_short_name,
-                                        "description": "",
-                                        "destination": {"name": destination},
-                                        "product": {"class": route_type},
-                                    },
-                                    "platform": {"name": platform},
-                                    "realtimeStatus": ["MONITORED"] if delay_seconds != 0 else [],
-                                    "route_id": route_id,
-                                    "trip_id": trip_id,
-                                    "stop_id": stop_id,
-                                    "delay_seconds": delay_seconds,
-                                }
-                                stop_events.append(stop_event)
-                                processed_entities += 1
-
-                                # Early exit if we have enough departures
-                                if len(stop_events) >= max_departures:
-                                    _LOGGER.debug(
-                                        "NTA: Found %d departures (limit reached), stopping early",
-                                        len(stop_events),
-                                    )
-                                    break
-
-                                # Break outer loop if we have enough
-                                if len(stop_events) >= max_departures:
-                                    break
-
-                            _LOGGER.info(
-                                "NTA: Processed %d/%d entities, found %d departures for stop %s",
-                                processed_entities,
-                                entity_count,
-                                len(stop_events),
-                                target_stop_id,
-                            )
-                            return {"stopEvents": stop_events}
-
-                        except (ValueError, aiohttp.ContentTypeError) as e:
-                            _LOGGER.warning("NTA API returned invalid JSON: %s", e)
-                            return None
-                        except Exception as e:
-                            _LOGGER.warning("NTA API JSON parsing failed: %s", e, exc_info=True)
-                            return None
-                    elif response.status == 404:
-                        _LOGGER.warning("NTA API endpoint not found (404)")
-                        return None
-                    elif response.status == 401:
-                        # Try Secondary Key as fallback if available
-                        if self.api_key_secondary and current_api_key == self.api_key:
-                            _LOGGER.info("NTA Primary API key failed (401), trying Secondary key...")
-                            current_api_key = self.api_key_secondary
-                            continue  # Retry with Secondary key
-                        _LOGGER.warning("NTA API authentication failed (401) - check API key(s)")
-                        return None
-                    elif response.status >= 500:
-                        _LOGGER.warning(
-                            "NTA API server error (status %s) on attempt %d/%d",
-                            response.status,
-                            attempt,
-                            max_retries,
-                        )
-                        if attempt < max_retries:
-                            await asyncio.sleep(2**attempt)
-                            continue
-                        _LOGGER.error(
-                            "NTA API server error (status %s) after %d attempts",
-                            response.status,
-                            max_retries,
-                        )
-                        return None
-                    else:
-                        _LOGGER.warning(
-                            "NTA API returned status %s on attempt %d/%d", response.status, attempt, max_retries
-                        )
-                        if attempt < max_retries:
-                            await asyncio.sleep(2**attempt)
-                            continue
-
-            except asyncio.TimeoutError:
-                _LOGGER.warning("NTA API timeout on attempt %d/%d", attempt, max_retries)
-                if attempt < max_retries:
-                    await asyncio.sleep(2**attempt)
-                    continue
-                _LOGGER.error("NTA API request timeout after %d attempts", max_retries)
-            except ClientConnectorError as e:
-                _LOGGER.warning("NTA API connection error on attempt %d/%d: %s", attempt, max_retries, e)
-                if attempt < max_retries:
-                    await asyncio.sleep(2**attempt)
-                    continue
-                _LOGGER.error("NTA API connection failed after %d attempts: %s", max_retries, e)
-            except Exception as e:
-                _LOGGER.warning("NTA API attempt %d/%d failed: %s", attempt, max_retries, e)
-                if attempt < max_retries:
-                    await asyncio.sleep(2**attempt)
-                    continue
+        Args:
+            stop_events: Stop events of the response
 
-        return None
+        Returns:
+            Up to departures_limit departures sorted by departure time
+        """
+        if not self.provider_instance:
+            return []
+        tz = dt_util.get_time_zone(self.provider_instance.get_timezone())
+        # Filters by type while parsing and keeps only the earliest departures
+        return self.provider_instance.parse_departures(
+            stop_events, tz, dt_util.now(), set(self.transportation_types), self.departures_limit
+        )
 
 
 async def async_setup_entry(
@@ -769,9 +622,13 @@ async def async_setup_entry(
             scan_interval,
             config_entry=config_entry,
             api_key=api_key,
+            transportation_types=config_entry.options.get(
+                CONF_TRANSPORTATION_TYPES, config_entry.data.get(CONF_TRANSPORTATION_TYPES)
+            ),
         )
         hass.data.setdefault(DOMAIN, {})
         hass.data[DOMAIN][coordinator_key] = coordinator
+        await coordinator.async_restore_api_calls()
         await coordinator.async_config_entry_first_refresh()
 
     # Use options if available, otherwise fall back to data
@@ -780,16 +637,16 @@ async def async_setup_entry(
         config_entry.data.get(CONF_TRANSPORTATION_TYPES, list(TRANSPORTATION_TYPES.keys())),
     )
 
-    # Create sensor
-    async_add_entities(
-        [
-            MultiProviderSensor(
-                coordinator,
-                config_entry,
-                transportation_types,
-            )
-        ]
-    )
+    # Create sensor and the (disabled by default) refresh metric sensors
+    entities: List[SensorEntity] = [
+        MultiProviderSensor(
+            coordinator,
+            config_entry,
+            transportation_types,
+        )
+    ]
+    entities.extend(RefreshMetricSensor(coordinator, description) for description in REFRESH_METRIC_SENSORS)
+    async_add_entities(entities)
 
 
 class MultiProviderSensor(CoordinatorEntity, SensorEntity):
@@ -807,6 +664,7 @@ class MultiProviderSensor(CoordinatorEntity, SensorEntity):
         self.transportation_types = transportation_types or list(TRANSPORTATION_TYPES.keys())
         self._state: str | None = None
         self._attributes: dict[str, Any] = {}
+        self._state_writes = StateWriteFilter()
 
         # Get option for provider logo display
         self._use_provider_logo = config_entry.options.get(
@@ -892,8 +750,11 @@ class MultiProviderSensor(CoordinatorEntity, SensorEntity):
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         if self.coordinator.data:
-            self._process_departure_data(self.coordinator.data)
-        self.async_write_ha_state()
+            self._process_departure_board(self.coordinator.board)
+        # Only write when the board, its availability or the picture changed
+        fingerprint = state_fingerprint((self._state, self.entity_picture), self._attributes, self.available)
+        if self._state_writes.should_write(fingerprint):
+            self.async_write_ha_state()
 
     async def _async_update_listener(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
         """Handle options update."""
@@ -917,451 +778,96 @@ class MultiProviderSensor(CoordinatorEntity, SensorEntity):
             CONF_SCAN_INTERVAL, config_entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
         )
 
+        adaptive_polling = config_entry.options.get(CONF_ADAPTIVE_POLLING, False)
+        max_scan_interval = config_entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
+
         # Update coordinator
         self.coordinator.departures_limit = departures
-        self.coordinator.update_interval = timedelta(seconds=scan_interval)
+        self.coordinator.set_transportation_types(self.transportation_types)
+        self.coordinator.set_polling(scan_interval, adaptive_polling, max_scan_interval)
+        self.coordinator.set_hedging(config_entry.options.get(CONF_HEDGED_REQUESTS, False))
 
         # Force refresh
         await self.coordinator.async_request_refresh()
 
-    def _process_departure_data(self, data: Dict[str, Any]) -> None:
-        """Process the departure data from VRR/KVV/HVV API.
-
-        Parses raw API response, filters departures by configured transportation types,
-        calculates statistics, and updates sensor state and attributes.
+    def _process_departure_board(self, board: DepartureBoard) -> None:
+        """Update the sensor state and attributes from the coordinator's departure board.
 
         Args:
-            data: Raw API response containing stopEvents
+            board: Departures parsed and aggregated by the coordinator
         """
-        # Validate response structure
-        if not isinstance(data, dict):
-            _LOGGER.error("Invalid API response: expected dict, got %s", type(data))
-            return
-
-        stop_events = data.get("stopEvents", [])
-
-        # Validate stopEvents is a list
-        if not isinstance(stop_events, list):
-            _LOGGER.error("Invalid stopEvents in API response: expected list, got %s", type(stop_events))
-            return
-
-        # Cache frequently accessed values
-        station_name = f"{self.coordinator.place_dm} - {self.coordinator.name_dm}"
-        station_id = self.coordinator.station_id
-
-        if not stop_events:
-            self._state = "No departures"
-            self._attributes = {
-                "departures": [],
-                "next_3_departures": [],
-                "station_name": station_name,
-                "last_updated": dt_util.utcnow().isoformat(),
-                "next_departure_minutes": None,
-                "station_id": station_id,
-                "total_departures": 0,
-                "delayed_count": 0,
-                "on_time_count": 0,
-                "average_delay": 0,
-                "earliest_departure": None,
-                "latest_departure": None,
-            }
-            return
-
-        departures = []
-        # Use appropriate timezone based on provider
-        provider = self.coordinator.provider
-        if self.coordinator.provider_instance:
-            tz = dt_util.get_time_zone(self.coordinator.provider_instance.get_timezone())
-        elif provider == PROVIDER_TRAFIKLAB_SE:
-            tz = dt_util.get_time_zone("Europe/Stockholm")
-        elif provider == PROVIDER_NTA_IE:
-            tz = dt_util.get_time_zone("Europe/Dublin")
-        elif provider == PROVIDER_HVV:
-            tz = dt_util.get_time_zone("Europe/Berlin")
-        else:
-            tz = dt_util.get_time_zone("Europe/Berlin")
-        now = dt_util.now()
-
-        # Cache transportation_types to avoid repeated lookups
-        transport_types_set = set(self.transportation_types)  # Set lookup is O(1) vs list O(n)
-
-        # Initialize parse_fn with proper type
-        parse_fn: Callable[[dict[str, Any], Any, datetime], UnifiedDeparture | None] | None = None
-
-        # Use provider instance for parsing if available
-        if self.coordinator.provider_instance:
-            provider_instance = self.coordinator.provider_instance
-            tz_provider = dt_util.get_time_zone(provider_instance.get_timezone())
-
-            def _parse_with_provider(
-                stop: dict[str, Any], tz_param: Any, now_param: datetime
-            ) -> UnifiedDeparture | None:
-                return provider_instance.parse_departure(stop, tz_provider, now_param)
-
-            parse_fn = _parse_with_provider
-        else:
-            # Fallback to old implementation
-            if provider == PROVIDER_VRR:
-                parse_fn = self._parse_departure_vrr
-            elif provider == PROVIDER_KVV:
-                parse_fn = self._parse_departure_kvv
-            elif provider == PROVIDER_HVV:
-                parse_fn = self._parse_departure_hvv
-            elif provider == PROVIDER_TRAFIKLAB_SE:
-                parse_fn = self._parse_departure_trafiklab
-            elif provider == PROVIDER_NTA_IE:
-                parse_fn = self._parse_departure_nta
-
-        if parse_fn is not None:
-            for stop in stop_events:
-                dep = parse_fn(stop, tz, now)
-                # Filter by configured transportation types (set lookup is faster)
-                if dep and dep.transportation_type in transport_types_set:
-                    departures.append(dep)
-
-        # Sort by departure time
-        departures.sort(key=lambda x: x.departure_time_obj)
-
-        # Limit to requested number
-        departures_limit = self.coordinator.departures_limit
-        departures = departures[:departures_limit]
-
-        # Set state and attributes
-        if departures:
-            next_departure = departures[0]
+        if board.departures:
+            next_departure = board.departures[0]
             self._state = next_departure.departure_time
             next_minutes = next_departure.minutes_until_departure
         else:
             self._state = "No departures"
             next_minutes = None
 
-        # Calculate statistics and convert to dicts in one pass
-        clean_departures = []
-        departure_times = []
-        delayed_count = 0
-        on_time_count = 0
-        total_delay = 0
-
-        for dep in departures:
-            # Extract departure_time_obj for stats
-            dep_time_obj = dep.departure_time_obj
-            if dep_time_obj:
-                departure_times.append(dep_time_obj)
-
-            # Count delays
-            delay = dep.delay
-            if delay > 0:
-                delayed_count += 1
-                total_delay += delay
-            else:
-                on_time_count += 1
-
-            # Convert UnifiedDeparture to dict for attributes
-            clean_departures.append(dep.to_dict())
-
-        # Next 3 departures (simplified)
-        next_3_departures = clean_departures[:3]
-
-        # Average delay
-        average_delay = round(total_delay / delayed_count, 1) if delayed_count > 0 else 0
-
-        # Earliest and latest departure times
-        earliest_departure = None
-        latest_departure = None
-        if departure_times:
-            earliest_departure = min(departure_times).strftime("%H:%M")
-            latest_departure = max(departure_times).strftime("%H:%M")
-
         self._attributes = {
-            "departures": clean_departures,
-            "next_3_departures": next_3_departures,
-            "station_name": station_name,
+            "departures": board.departure_dicts,
+            "next_3_departures": board.departure_dicts[:3],
+            "station_name": f"{self.coordinator.place_dm} - {self.coordinator.name_dm}",
             "last_updated": dt_util.utcnow().isoformat(),
             "next_departure_minutes": next_minutes,
-            "station_id": station_id,
-            "total_departures": len(clean_departures),
-            "delayed_count": delayed_count,
-            "on_time_count": on_time_count,
-            "average_delay": average_delay,
-            "earliest_departure": earliest_departure,
-            "latest_departure": latest_departure,
+            "station_id": self.coordinator.station_id,
+            "total_departures": len(board.departure_dicts),
+            "delayed_count": board.delayed_count,
+            "on_time_count": board.on_time_count,
+            "average_delay": board.average_delay,
+            "earliest_departure": board.earliest_departure,
+            "latest_departure": board.latest_departure,
+            "stale": self.coordinator.stale,
         }
 
-    def _parse_departure_generic(
-        self,
-        stop: Dict[str, Any],
-        tz: Union[ZoneInfo, Any],
-        now: datetime,
-        get_transport_type_fn: Callable[[Dict[str, Any]], str],
-        get_platform_fn: Callable[[Dict[str, Any]], str],
-        get_realtime_fn: Callable[[Dict[str, Any], Optional[str], Optional[str]], bool],
-    ) -> Optional[UnifiedDeparture]:
-        """Generic parser for departure data - shared logic across all providers.
-
-        Args:
-            stop: Stop event data from API
-            tz: Timezone object (provider-specific)
-            now: Current datetime
-            get_transport_type_fn: Function to determine transportation type
-            get_platform_fn: Function to extract platform information
-            get_realtime_fn: Function to check if realtime data is available
-
-        Returns:
-            UnifiedDeparture object or None if parsing fails
-        """
-        try:
-            # Validate stop data structure
-            if not isinstance(stop, dict):
-                _LOGGER.debug("Invalid stop data: expected dict, got %s", type(stop))
-                return None
-
-            # Get times
-            planned_time_str = stop.get("departureTimePlanned")
-            estimated_time_str = stop.get("departureTimeEstimated")
 
-            if not planned_time_str:
-                _LOGGER.debug("Missing departureTimePlanned in stop data")
-                return None
+class RefreshMetricSensor(SensorEntity):
+    """Diagnostic sensor showing one figure of the coordinator's last refresh."""
 
-            # Validate time strings
-            if not isinstance(planned_time_str, str):
-                _LOGGER.debug("Invalid departureTimePlanned: expected str, got %s", type(planned_time_str))
-                return None
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_should_poll = False
 
-            # Parse times
-            planned_time = dt_util.parse_datetime(planned_time_str)
-            estimated_time = dt_util.parse_datetime(estimated_time_str) if estimated_time_str else planned_time
-
-            if not planned_time:
-                _LOGGER.debug("Failed to parse departureTimePlanned: %s", planned_time_str)
-                return None
-
-            # Convert to local timezone with validation
-            try:
-                planned_local = planned_time.astimezone(tz)
-                estimated_local = estimated_time.astimezone(tz) if estimated_time else planned_local
-            except (ValueError, TypeError) as e:
-                _LOGGER.debug("Failed to convert timezone: %s", e)
-                return None
-
-            # Calculate delay
-            delay_minutes = int((estimated_local - planned_local).total_seconds() / 60)
-
-            # Get transportation info with validation
-            transportation = stop.get("transportation", {})
-            if not isinstance(transportation, dict):
-                _LOGGER.debug("Invalid transportation data: expected dict, got %s", type(transportation))
-                transportation = {}
-
-            destination_obj = transportation.get("destination", {})
-            if not isinstance(destination_obj, dict):
-                destination_obj = {}
-            destination = destination_obj.get("name", "Unknown")
-
-            line_number = str(transportation.get("number", ""))
-            description = str(transportation.get("description", ""))
-            agency = stop.get("agency")  # Agency name from GTFS (NTA)
-
-            # Determine transportation type using provider-specific function
-            transport_type = get_transport_type_fn(transportation)
-
-            # Get platform/track info using provider-specific function
-            platform = get_platform_fn(stop)
-
-            # Calculate minutes until departure
-            time_diff = estimated_local - now
-            minutes_until = max(0, int(time_diff.total_seconds() / 60))
-
-            # Determine if real-time data is available using provider-specific function
-            is_realtime = get_realtime_fn(stop, estimated_time_str, planned_time_str)
-
-            return UnifiedDeparture(
-                line=line_number,
-                destination=destination,
-                departure_time=estimated_local.strftime("%H:%M"),
-                planned_time=planned_local.strftime("%H:%M"),
-                delay=delay_minutes,
-                platform=platform,
-                transportation_type=transport_type,
-                is_realtime=is_realtime,
-                minutes_until_departure=minutes_until,
-                departure_time_obj=estimated_local,
-                description=description if description else None,
-                agency=agency if agency else None,
-            )
-
-        except Exception as e:
-            _LOGGER.debug("Error parsing departure: %s", e)
-            return None
-
-    def _parse_departure_vrr(
-        self, stop: Dict[str, Any], tz: Union[ZoneInfo, Any], now: datetime
-    ) -> Optional[UnifiedDeparture]:
-        """Parse a single departure from VRR API response.
-
-        Args:
-            stop: Stop event data from VRR API
-            tz: Timezone object
-            now: Current datetime
-
-        Returns:
-            UnifiedDeparture object or None if parsing fails
-        """
-        return parse_departure_generic(
-            stop,
-            tz,
-            now,
-            get_transport_type_fn=self._determine_transport_type_vrr,
-            get_platform_fn=lambda s: (s.get("platform", {}).get("name") or s.get("platformName", "")),
-            get_realtime_fn=lambda s, est, plan: "MONITORED" in s.get("realtimeStatus", []),
-        )
-
-    def _parse_departure_kvv(
-        self, stop: Dict[str, Any], tz: Union[ZoneInfo, Any], now: datetime
-    ) -> Optional[UnifiedDeparture]:
-        """Parse a single departure from KVV API response.
-
-        Args:
-            stop: Stop event data from KVV API
-            tz: Timezone object
-            now: Current datetime
-
-        Returns:
-            UnifiedDeparture object or None if parsing fails
-        """
-        return parse_departure_generic(
-            stop,
-            tz,
-            now,
-            get_transport_type_fn=lambda t: KVV_TRANSPORTATION_TYPES.get(
-                t.get("product", {}).get("class", 0), "unknown"
-            ),
-            get_platform_fn=lambda s: (s.get("location", {}).get("disassembledName") or s.get("platformName", "")),
-            get_realtime_fn=lambda s, est, plan: s.get("isRealtimeControlled", False),
-        )
-
-    def _parse_departure_hvv(
-        self, stop: Dict[str, Any], tz: Union[ZoneInfo, Any], now: datetime
-    ) -> Optional[UnifiedDeparture]:
-        """Parse a single departure from HVV API response.
+    def __init__(self, coordinator: VRRDataUpdateCoordinator, description: SensorEntityDescription):
+        """Initialize the sensor.
 
         Args:
-            stop: Stop event data from HVV API
-            tz: Timezone object
-            now: Current datetime
-
-        Returns:
-            UnifiedDeparture object or None if parsing fails
+            coordinator: Coordinator whose refresh metrics are shown
+            description: Metric to show (one of REFRESH_METRIC_SENSORS)
         """
-        return parse_departure_generic(
-            stop,
-            tz,
-            now,
-            get_transport_type_fn=lambda t: HVV_TRANSPORTATION_TYPES.get(
-                t.get("product", {}).get("class", 0), "unknown"
-            ),
-            get_platform_fn=lambda s: (
-                s.get("location", {}).get("properties", {}).get("platform")
-                or s.get("location", {}).get("platformName", "")
-            ),
-            get_realtime_fn=lambda s, est, plan: est != plan if est and plan else False,
-        )
+        self.entity_description = description
+        self._metrics = coordinator.refresh_metrics
 
-    def _parse_departure_trafiklab(
-        self, stop: Dict[str, Any], tz: Union[ZoneInfo, Any], now: datetime
-    ) -> Optional[UnifiedDeparture]:
-        """Parse a single departure from Trafiklab API response.
-
-        Args:
-            stop: Stop event data from Trafiklab API (already normalized)
-            tz: Timezone object (Europe/Stockholm)
-            now: Current datetime
+        provider = coordinator.provider
+        place_dm = coordinator.place_dm
+        name_dm = coordinator.name_dm
+        station_key = coordinator.station_id or f"{place_dm}_{name_dm}".lower().replace(" ", "_")
+        self._attr_unique_id = f"{provider}_{station_key}_{description.key}"
+        self._attr_name = f"{provider.upper()} {place_dm} - {name_dm} {description.name}"
 
-        Returns:
-            UnifiedDeparture object or None if parsing fails
-        """
-        # Map transportMode to our transport type
-        transport_mode = stop.get("transportMode", "BUS")
-        transport_type = TRAFIKLAB_TRANSPORTATION_TYPES.get(transport_mode, "bus")
-
-        return parse_departure_generic(
-            stop,
-            tz,
-            now,
-            get_transport_type_fn=lambda t: transport_type,
-            get_platform_fn=lambda s: (
-                s.get("platform", {}).get("name", "")
-                if isinstance(s.get("platform"), dict)
-                else str(s.get("platform", ""))
-            ),
-            get_realtime_fn=lambda s, est, plan: est != plan if est and plan else False,
+        # Device info - same device as the departure sensor
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{provider}_{station_key}")},
+            suggested_area=place_dm,
         )
 
-    def _parse_departure_nta(
-        self, stop: Dict[str, Any], tz: Union[ZoneInfo, Any], now: datetime
-    ) -> Optional[UnifiedDeparture]:
-        """Parse a single departure from NTA GTFS-RT API response.
-
-        Args:
-            stop: Stop event data from NTA API (already normalized)
-            tz: Timezone object (Europe/Dublin)
-            now: Current datetime
+    async def async_added_to_hass(self) -> None:
+        """Update the state after every refresh."""
+        self.async_on_remove(self._metrics.async_add_listener(self.async_write_ha_state))
 
-        Returns:
-            UnifiedDeparture object or None if parsing fails
-        """
-        # Get route_type from transportation.product.class
-        transportation = stop.get("transportation", {})
-        product = transportation.get("product", {})
-        route_type = product.get("class", 3)  # Default to bus (3)
-
-        # Map GTFS route_type to our transport type
-        transport_type = NTA_TRANSPORTATION_TYPES.get(route_type, "bus")
-
-        return parse_departure_generic(
-            stop,
-            tz,
-            now,
-            get_transport_type_fn=lambda t: transport_type,
-            get_platform_fn=lambda s: (
-                s.get("platform", {}).get("name", "")
-                if isinstance(s.get("platform"), dict)
-                else str(s.get("platform", ""))
-            ),
-            get_realtime_fn=lambda s, est, plan: "MONITORED" in s.get("realtimeStatus", []),
-        )
+    @property
+    def native_value(self) -> Union[float, str, None]:
+        """Return the figure of the last refresh."""
+        if self.entity_description.key == METRIC_BREAKER_STATE:
+            return self._metrics.breaker_state
+        return self._metrics.value(self.entity_description.key)
 
-    def _determine_transport_type_vrr(self, transportation: Dict[str, Any]) -> str:
-        """Determine the transportation type from VRR API data."""
-        product = transportation.get("product", {})
-        product_class = product.get("class", 0)
-
-        # Map VRR product classes to our types
-        type_mapping = {
-            0: "train",  # High-speed trains (ICE, IC, EC)
-            1: "train",  # Regional trains (RE, RB)
-            2: "subway",  # U-Bahn (subway/metro)
-            3: "subway",  # U-Bahn variant
-            4: "tram",  # Tram/Streetcar
-            5: "bus",  # City bus
-            6: "bus",  # Regional bus
-            7: "bus",  # Express bus
-            8: "bus",  # Night bus
-            9: "ferry",  # Ferry/Ship
-            10: "taxi",  # Taxi
-            11: "bus",  # Other/Special transport
-            13: "train",  # Regionalzug (RE)
-            15: "train",  # InterCity (IC)
-            16: "train",  # InterCityExpress (ICE)
+    @property
+    def extra_state_attributes(self) -> Optional[Dict[str, Any]]:
+        """Return the median and 95th percentile of the recent refreshes."""
+        if self.entity_description.key == METRIC_BREAKER_STATE:
+            return None
+        return {
+            "p50": self._metrics.percentile(self.entity_description.key, 50),
+            "p95": self._metrics.percentile(self.entity_description.key, 95),
         }
-
-        transport_type = type_mapping.get(product_class, "unknown")
-
-        if product_class not in type_mapping:
-            _LOGGER.debug(
-                "Unknown transport class %s for line %s, defaulting to unknown",
-                product_class,
-                transportation.get("number", "unknown"),
-            )
-
-        return transport_type
@@ -0,0 +1,89 @@
+"""Single-flight coalescing of identical concurrent requests.
+
+Two config entries watching the same station, or a refresh_departures service
+call landing during a scheduled poll, would otherwise send the same departure
+request twice at the same time. SingleFlight runs only the first call for a
+key; callers arriving while it is in flight await its result instead.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_SINGLE_FLIGHT, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one call."""
+
+    def __init__(self) -> None:
+        """Initialize without calls in flight."""
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of calls currently in flight."""
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[_T]]) -> Tuple[_T, bool]:
+        """Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Identifies identical requests
+            fn: Coroutine function performing the request
+
+        Returns:
+            Tuple of the result and True if this caller performed the request
+            itself, False if it shared the result of a call already in flight
+
+        Raises:
+            Any exception raised by fn, for the caller that ran it and all
+            callers that were waiting for it
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            _LOGGER.debug("Joining request already in flight for %s", key)
+            try:
+                return await asyncio.shield(future), False
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not future.cancelled() or (task is not None and task.cancelling()):
+                    raise
+                # The caller running the request was cancelled, not us: try again
+                return await self.do(key, fn)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as err:
+            future.set_exception(err)
+            # Mark the exception as retrieved in case nobody was waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+        return result, True
+
+
+@callback
+def async_get_single_flight(hass: HomeAssistant) -> SingleFlight:
+    """Return the SingleFlight shared by all config entries, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    single_flight = domain_data.get(DATA_SINGLE_FLIGHT)
+    if single_flight is None:
+        single_flight = domain_data[DATA_SINGLE_FLIGHT] = SingleFlight()
+    return single_flight
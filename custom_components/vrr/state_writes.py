@@ -0,0 +1,83 @@
+"""Skip entity state writes that would not change anything.
+
+Every state write goes through the state machine, the recorder and all
+websocket subscribers. The departure sensor and the delay binary sensor
+compute a fingerprint of their state and attributes after processing new
+data, and a StateWriteFilter lets the write through only if the
+fingerprint differs from the last written one. An unchanged state is still
+written after STATE_WRITE_MAX_AGE seconds, so its last_updated attribute
+does not fall too far behind.
+
+The fingerprint is the hash of the state and attributes converted to
+tuples; volatile attributes such as the last_updated timestamp are left
+out.
+"""
+
+import time
+from typing import Any, Collection, Mapping, Optional
+
+from .const import STATE_WRITE_MAX_AGE
+
+# Attributes that change on every update without changing the content
+VOLATILE_ATTRIBUTES = frozenset({"last_updated"})
+
+
+def _freeze(value: Any) -> Any:
+    """Return a hashable copy of an attribute value."""
+    if isinstance(value, Mapping):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    return value
+
+
+def state_fingerprint(
+    state: Any,
+    attributes: Optional[Mapping[str, Any]],
+    available: bool = True,
+    exclude: Collection[str] = VOLATILE_ATTRIBUTES,
+) -> int:
+    """Return a fingerprint of an entity's state and attributes.
+
+    Args:
+        state: Entity state
+        attributes: Extra state attributes
+        available: Entity availability
+        exclude: Attribute names left out of the fingerprint
+
+    Returns:
+        Hash that changes whenever the written state would change
+    """
+    frozen_attributes = tuple((key, _freeze(value)) for key, value in (attributes or {}).items() if key not in exclude)
+    return hash((state, available, frozen_attributes))
+
+
+class StateWriteFilter:
+    """Decide whether an entity's state has to be written."""
+
+    def __init__(self, max_age: float = STATE_WRITE_MAX_AGE):
+        """Initialize the filter; the first state is always written.
+
+        Args:
+            max_age: Seconds after which an unchanged state is written again
+        """
+        self.max_age = max_age
+        self.skipped_writes = 0
+        self._fingerprint: Optional[int] = None
+        self._written_at = 0.0
+
+    def should_write(self, fingerprint: int) -> bool:
+        """Return True if a state with this fingerprint has to be written, and remember it.
+
+        Args:
+            fingerprint: Result of state_fingerprint() for the new state
+        """
+        now = time.monotonic()
+        if fingerprint == self._fingerprint and now - self._written_at < self.max_age:
+            self.skipped_writes += 1
+            return False
+        self._fingerprint = fingerprint
+        self._written_at = now
+        return True
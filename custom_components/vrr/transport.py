@@ -0,0 +1,590 @@
+"""Resilient HTTP transport shared by all providers.
+
+Every provider sends its requests through one ResilientTransport instead of
+its own retry loop, so timeouts, retries and error handling behave the same
+for all APIs and are tuned in one place (the HTTP_* constants):
+
+* Each attempt first takes a token from the provider's rate limiter.
+* Status codes are classified once: 200 is a success, 304 means the cached
+  response is still valid, 408/425/429 and 5xx are retried, and all other
+  codes (404, 401, 403, ...) are final.
+* Timeouts and connection errors are retried.
+* Retries wait with "full jitter" backoff, a random delay between 0 and
+  min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2**attempt), so entries that
+  failed together do not retry in lockstep. A Retry-After header of a 429
+  or 503 response is honoured up to HTTP_BACKOFF_MAX.
+* A request can carry a deadline (the refresh budget of the coordinator).
+  Attempt timeouts are cut to the remaining budget, and no further attempt
+  is started once the budget cannot fit the backoff plus
+  HTTP_MIN_ATTEMPT_TIME. Waiting for a rate limiter token is bounded the
+  same way; a caller that gives up leaves the queue without taking a
+  token. The request then raises DeadlineExceededError.
+* With hedging enabled, an attempt that takes longer than the endpoint's
+  usual response time (see latency.py) gets a second, identical request;
+  the first response wins.
+* JSON bodies are decoded in the executor when they are large (see
+  offload.py), if the transport has an offloader.
+
+Requests go through the integration's own session (see http_session.py).
+The transport counts requests, retries, failures, response times, received
+bytes and decode time for the diagnostics and the refresh metrics (see
+metrics.py).
+"""
+
+import asyncio
+import copy
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Mapping, Optional, Union
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+from homeassistant.util.json import json_loads
+
+from .circuit_breaker import CircuitOpenError
+from .const import HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX, HTTP_MAX_ATTEMPTS, HTTP_MIN_ATTEMPT_TIME, HTTP_TIMEOUT
+from .http_session import async_get_session
+from .offload import STAGE_JSON_DECODE
+
+if TYPE_CHECKING:
+    from .circuit_breaker import CircuitBreaker
+    from .latency import LatencyTracker
+    from .offload import Offloader
+    from .rate_limiter import RateLimiter
+
+_LOGGER = logging.getLogger(__name__)
+
+RESPONSE_JSON = "json"
+RESPONSE_BYTES = "bytes"
+
+STATUS_OK = "ok"
+STATUS_NOT_MODIFIED = "not_modified"
+STATUS_RETRY = "retry"
+STATUS_FATAL = "fatal"
+
+ERROR_INVALID_RESPONSE = "invalid_response"
+ERROR_DEADLINE = "deadline"
+
+_RETRY_STATUSES = frozenset({408, 425, 429})
+
+# RESPONSE_JSON, RESPONSE_BYTES or a coroutine function decoding the response stream
+ResponseFormat = Union[str, Callable[[aiohttp.StreamReader], Awaitable[Any]]]
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a request could not get a usable response within its deadline."""
+
+
+def classify_status(status: int) -> str:
+    """Return how the transport handles an HTTP status code.
+
+    Returns:
+        STATUS_OK, STATUS_NOT_MODIFIED, STATUS_RETRY or STATUS_FATAL
+    """
+    if status == 200:
+        return STATUS_OK
+    if status == 304:
+        return STATUS_NOT_MODIFIED
+    if status in _RETRY_STATUSES or status >= 500:
+        return STATUS_RETRY
+    return STATUS_FATAL
+
+
+@dataclass
+class TransportResponse:
+    """Outcome of a request sent through the transport."""
+
+    status: Optional[int] = None  # None if no response was received
+    data: Any = None  # Decoded JSON or raw bytes of a successful response
+    headers: Mapping[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    deadline_exceeded: bool = False  # True if the deadline stopped further attempts
+
+    @property
+    def ok(self) -> bool:
+        """Return True for a 200 response with a readable body."""
+        return self.status == 200 and self.error is None
+
+    @property
+    def not_modified(self) -> bool:
+        """Return True if the server confirmed the cached response (304)."""
+        return self.status == 304
+
+    @property
+    def failed(self) -> bool:
+        """Return True if the endpoint gave no usable answer (counted by the circuit breaker).
+
+        Final client errors such as 404 or 401 are answers of a working endpoint.
+        """
+        if self.error == ERROR_DEADLINE:
+            # Nothing was sent, so nothing is known about the endpoint
+            return False
+        if self.status is None or self.error == ERROR_INVALID_RESPONSE:
+            return True
+        return classify_status(self.status) == STATUS_RETRY
+
+
+# Additive TransportMetrics counters (see TransportMetrics.add_since)
+_COUNTERS = (
+    "requests",
+    "attempts",
+    "retries",
+    "failures",
+    "timeouts",
+    "rejected",
+    "deadline_exceeded",
+    "hedges",
+    "hedge_wins",
+    "bytes_received",
+    "decode_time",
+)
+
+
+class TransportMetrics:
+    """Request counters and response times of one transport."""
+
+    def __init__(self) -> None:
+        """Initialize all counters with zero."""
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.deadline_exceeded = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.bytes_received = 0
+        # Seconds spent reading and decoding response bodies
+        self.decode_time = 0.0
+        self.status_counts: Dict[int, int] = {}
+        self.last_latency: Optional[float] = None
+        self._latency_total = 0.0
+        self._latency_count = 0
+
+    def record_response(self, status: int, latency: float) -> None:
+        """Count a received response and its response time in seconds."""
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        self.last_latency = latency
+        self._latency_total += latency
+        self._latency_count += 1
+
+    def copy(self) -> "TransportMetrics":
+        """Return a copy of the current counters."""
+        metrics = copy.copy(self)
+        metrics.status_counts = dict(self.status_counts)
+        return metrics
+
+    def add_since(self, current: "TransportMetrics", start: "TransportMetrics") -> None:
+        """Add what another transport counted between two of its states.
+
+        Used to attribute the requests of a shared transport to the caller
+        that triggered them.
+
+        Args:
+            current: Counters of the other transport now
+            start: Copy of the same counters taken before the requests
+        """
+        for name in _COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(current, name) - getattr(start, name))
+        for status, count in current.status_counts.items():
+            added = count - start.status_counts.get(status, 0)
+            if added:
+                self.status_counts[status] = self.status_counts.get(status, 0) + added
+        latency_count = current._latency_count - start._latency_count
+        if latency_count:
+            self.last_latency = current.last_latency
+            self._latency_total += current._latency_total - start._latency_total
+            self._latency_count += latency_count
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the counters for diagnostics."""
+        average = self._latency_total / self._latency_count if self._latency_count else None
+        return {
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "rejected_by_circuit_breaker": self.rejected,
+            "deadline_exceeded": self.deadline_exceeded,
+            "hedged_requests": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "bytes_received": self.bytes_received,
+            "status_counts": {str(status): count for status, count in sorted(self.status_counts.items())},
+            "last_latency_ms": round(self.last_latency * 1000) if self.last_latency is not None else None,
+            "average_latency_ms": round(average * 1000) if average is not None else None,
+        }
+
+
+class ResilientTransport:
+    """Send GET requests with rate limiting, retries and backoff."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        name: str,
+        timeout: float = HTTP_TIMEOUT,
+        max_attempts: int = HTTP_MAX_ATTEMPTS,
+        backoff_base: float = HTTP_BACKOFF_BASE,
+        backoff_max: float = HTTP_BACKOFF_MAX,
+    ):
+        """Initialize the transport.
+
+        Args:
+            hass: Home Assistant instance
+            name: API name used in log messages (e.g. 'VRR')
+            timeout: Seconds per attempt
+            max_attempts: Attempts per request, including the first one
+            backoff_base: Base of the exponential backoff in seconds
+            backoff_max: Upper bound of a single backoff in seconds
+        """
+        self.hass = hass
+        self.name = name
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.metrics = TransportMetrics()
+        # Shared offloader for decoding JSON bodies, set by the coordinator
+        self.offloader: Optional["Offloader"] = None
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Return the seconds to wait after a failed attempt (full jitter).
+
+        Args:
+            attempt: Number of the failed attempt, starting at 1
+            retry_after: Delay requested by the server, if any
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        if retry_after is not None:
+            delay = max(delay, min(self.backoff_max, retry_after))
+        return delay
+
+    async def request(
+        self,
+        url: str,
+        params: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        response_format: ResponseFormat = RESPONSE_JSON,
+        rate_limiter: Optional["RateLimiter"] = None,
+        circuit_breaker: Optional["CircuitBreaker"] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        latency_tracker: Optional["LatencyTracker"] = None,
+        hedge: bool = False,
+    ) -> TransportResponse:
+        """Send a GET request, retrying transient failures.
+
+        Args:
+            url: Request URL
+            params: Query parameters
+            headers: Request headers
+            response_format: RESPONSE_JSON to decode the body, RESPONSE_BYTES for the raw body, or
+                a coroutine function that decodes the body from the aiohttp.StreamReader while it
+                is downloaded (raising ValueError for an invalid body)
+            rate_limiter: Limiter to acquire a token from before every attempt
+            circuit_breaker: Breaker of the endpoint; the request fails fast while it is open
+            timeout: Seconds per attempt (defaults to the transport timeout)
+            deadline: time.monotonic() by which the request must be finished
+            latency_tracker: Tracker of the endpoint that records every response time
+            hedge: Start a second request when an attempt is slower than the endpoint's
+                usual response time (needs latency_tracker)
+
+        Returns:
+            The final response; check ok / not_modified / status
+
+        Raises:
+            CircuitOpenError: If the circuit breaker does not let the request through
+            DeadlineExceededError: If the deadline ran out before a usable response
+        """
+        if circuit_breaker is None:
+            response = await self._async_send(
+                url, params, headers, response_format, rate_limiter, timeout, deadline, latency_tracker, hedge
+            )
+            return _check_deadline(response, self.name)
+
+        if not circuit_breaker.allow_request():
+            self.metrics.rejected += 1
+            raise CircuitOpenError(f"{self.name} API circuit breaker is open")
+
+        # The half-open probe gets a single attempt
+        max_attempts = 1 if circuit_breaker.probing else self.max_attempts
+        response: Optional[TransportResponse] = None
+        try:
+            response = await self._async_send(
+                url,
+                params,
+                headers,
+                response_format,
+                rate_limiter,
+                timeout,
+                deadline,
+                latency_tracker,
+                hedge,
+                max_attempts,
+            )
+        finally:
+            if response is None:
+                circuit_breaker.release()
+            elif response.failed:
+                circuit_breaker.record_failure()
+            elif response.status is None:
+                # The deadline ran out before an attempt was sent: no outcome
+                circuit_breaker.release()
+            else:
+                circuit_breaker.record_success()
+        return _check_deadline(response, self.name)
+
+    async def _async_send(
+        self,
+        url: str,
+        params: Optional[Dict[str, str]],
+        headers: Optional[Dict[str, str]],
+        response_format: ResponseFormat,
+        rate_limiter: Optional["RateLimiter"],
+        timeout: Optional[float],
+        deadline: Optional[float],
+        latency_tracker: Optional["LatencyTracker"] = None,
+        hedge: bool = False,
+        max_attempts: Optional[int] = None,
+    ) -> TransportResponse:
+        """Send a GET request with up to max_attempts attempts (see request())."""
+        session = async_get_session(self.hass)
+        max_attempts = max_attempts or self.max_attempts
+        self.metrics.requests += 1
+
+        result = TransportResponse(error=ERROR_DEADLINE)
+        for attempt in range(1, max_attempts + 1):
+            if attempt > 1:
+                self.metrics.retries += 1
+            if rate_limiter is not None:
+                if deadline is None:
+                    await rate_limiter.acquire()
+                else:
+                    # Queue for a token only while an attempt still fits into the budget
+                    budget = deadline - time.monotonic() - HTTP_MIN_ATTEMPT_TIME
+                    if budget <= 0:
+                        return self._deadline_exceeded(result, attempt - 1)
+                    try:
+                        await asyncio.wait_for(rate_limiter.acquire(), budget)
+                    except asyncio.TimeoutError:
+                        _LOGGER.debug("%s rate limit wait exceeded the refresh budget", self.name)
+                        return self._deadline_exceeded(result, attempt - 1)
+
+            attempt_timeout = timeout or self.timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining < HTTP_MIN_ATTEMPT_TIME:
+                    return self._deadline_exceeded(result, attempt - 1)
+                attempt_timeout = min(attempt_timeout, remaining)
+
+            self.metrics.attempts += 1
+            retry_after: Optional[float] = None
+            try:
+                if hedge and latency_tracker is not None:
+                    response = await self._async_hedged_fetch(
+                        session, url, params, headers, response_format, attempt_timeout, rate_limiter, latency_tracker
+                    )
+                else:
+                    response = await self._async_fetch(
+                        session, url, params, headers, response_format, attempt_timeout, latency_tracker
+                    )
+                outcome = classify_status(response.status)
+
+                if outcome == STATUS_OK:
+                    if response.error is not None:
+                        self.metrics.failures += 1
+                    return response
+
+                if outcome == STATUS_NOT_MODIFIED:
+                    return response
+
+                status = response.status
+                if outcome == STATUS_FATAL:
+                    if status in (401, 403):
+                        _LOGGER.warning("%s API authentication failed (%s) - check API key", self.name, status)
+                    elif status == 404:
+                        _LOGGER.warning("%s API endpoint not found (404)", self.name)
+                    else:
+                        _LOGGER.warning("%s API returned status %s", self.name, status)
+                    self.metrics.failures += 1
+                    response.error = f"status {status}"
+                    return response
+
+                _LOGGER.warning("%s API returned status %s on attempt %d/%d", self.name, status, attempt, max_attempts)
+                retry_after = _retry_after(response.headers)
+                response.error = f"status {status}"
+                result = response
+            except asyncio.TimeoutError:
+                _LOGGER.warning("%s API timeout on attempt %d/%d", self.name, attempt, max_attempts)
+                self.metrics.timeouts += 1
+                result = TransportResponse(error="timeout")
+            except aiohttp.ClientError as e:
+                _LOGGER.warning("%s API connection error on attempt %d/%d: %s", self.name, attempt, max_attempts, e)
+                result = TransportResponse(error=str(e) or type(e).__name__)
+            except Exception as e:
+                _LOGGER.warning("%s API request failed: %s", self.name, e, exc_info=True)
+                self.metrics.failures += 1
+                return TransportResponse(error=str(e) or type(e).__name__)
+
+            if attempt < max_attempts:
+                delay = self.backoff_delay(attempt, retry_after)
+                if deadline is not None and time.monotonic() + delay + HTTP_MIN_ATTEMPT_TIME > deadline:
+                    return self._deadline_exceeded(result, attempt)
+                await asyncio.sleep(delay)
+
+        self.metrics.failures += 1
+        return result
+
+    async def _async_fetch(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        params: Optional[Dict[str, str]],
+        headers: Optional[Dict[str, str]],
+        response_format: ResponseFormat,
+        timeout: float,
+        latency_tracker: Optional["LatencyTracker"],
+    ) -> TransportResponse:
+        """Send one request and read its body if the status is 200.
+
+        Raises:
+            asyncio.TimeoutError: If no response arrived within timeout seconds
+            aiohttp.ClientError: If the connection failed
+        """
+        started = time.monotonic()
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+        async with session.get(url, params=params, headers=headers, timeout=client_timeout) as response:
+            status = response.status
+            latency = time.monotonic() - started
+            self.metrics.record_response(status, latency)
+            if latency_tracker is not None:
+                latency_tracker.record(latency)
+
+            if status != 200:
+                return TransportResponse(status, headers=response.headers)
+            decode_started = time.perf_counter()
+            try:
+                if callable(response_format):
+                    data = await response_format(response.content)
+                    self.metrics.bytes_received += response.content.total_bytes
+                elif response_format == RESPONSE_BYTES:
+                    data = await response.read()
+                    self.metrics.bytes_received += len(data)
+                elif self.offloader is not None:
+                    # Large bodies are decoded in the executor
+                    body = await response.read()
+                    self.metrics.bytes_received += len(body)
+                    data = await self.offloader.async_run(
+                        STAGE_JSON_DECODE, len(body), _decode_json, body, response.get_encoding()
+                    )
+                else:
+                    data = await response.json()
+            except (ValueError, aiohttp.ContentTypeError) as e:
+                _LOGGER.warning("%s API returned an invalid response: %s", self.name, e)
+                return TransportResponse(status, headers=response.headers, error=ERROR_INVALID_RESPONSE)
+            finally:
+                self.metrics.decode_time += time.perf_counter() - decode_started
+            return TransportResponse(status, data, response.headers)
+
+    async def _async_hedged_fetch(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        params: Optional[Dict[str, str]],
+        headers: Optional[Dict[str, str]],
+        response_format: ResponseFormat,
+        timeout: float,
+        rate_limiter: Optional["RateLimiter"],
+        latency_tracker: "LatencyTracker",
+    ) -> TransportResponse:
+        """Send one request and a hedge if it is slower than the endpoint's usual response time.
+
+        The hedge is an identical request started after latency_tracker.hedge_delay()
+        seconds. It takes a token from the rate limiter and is skipped if none is
+        available right away. The first response wins and the other request is
+        cancelled; if one request fails, the other one is awaited. Both requests end
+        when the attempt's timeout ends.
+
+        Raises:
+            asyncio.TimeoutError: If neither request answered within timeout seconds
+            aiohttp.ClientError: If both requests failed to connect
+        """
+        primary = asyncio.ensure_future(
+            self._async_fetch(session, url, params, headers, response_format, timeout, latency_tracker)
+        )
+        hedge_delay = latency_tracker.hedge_delay()
+        if hedge_delay is None or hedge_delay >= timeout - HTTP_MIN_ATTEMPT_TIME:
+            return await primary
+
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait({primary}, timeout=hedge_delay)
+            if done or (rate_limiter is not None and not rate_limiter.try_acquire()):
+                return await primary
+
+            _LOGGER.debug("%s API has not answered within %.1f s, sending a hedged request", self.name, hedge_delay)
+            self.metrics.hedges += 1
+            hedge = asyncio.ensure_future(
+                self._async_fetch(
+                    session, url, params, headers, response_format, timeout - hedge_delay, latency_tracker
+                )
+            )
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.metrics.hedge_wins += 1
+                        return task.result()
+                    if error is None or task is primary:
+                        error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _deadline_exceeded(self, result: TransportResponse, attempts: int) -> TransportResponse:
+        """Count a request stopped by its deadline and mark its last result."""
+        _LOGGER.warning("%s API request ran out of time after %d attempt(s)", self.name, attempts)
+        self.metrics.deadline_exceeded += 1
+        self.metrics.failures += 1
+        result.deadline_exceeded = True
+        return result
+
+
+def _decode_json(body: bytes, encoding: str) -> Any:
+    """Decode a JSON response body (runs in the executor for large bodies).
+
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    if encoding.lower().replace("_", "-") in ("utf-8", "utf8"):
+        return json_loads(body)
+    try:
+        return json_loads(body.decode(encoding))
+    except LookupError:
+        return json_loads(body)
+
+
+def _check_deadline(response: TransportResponse, name: str) -> TransportResponse:
+    """Return the response, or raise DeadlineExceededError if the deadline stopped it."""
+    if response.deadline_exceeded:
+        raise DeadlineExceededError(f"{name} API request ran out of time")
+    return response
+
+
+def _retry_after(headers: Mapping[str, Any]) -> Optional[float]:
+    """Return the Retry-After delay of a response in seconds, if it is given in seconds."""
+    value = headers.get("Retry-After")
+    if not isinstance(value, str):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
@@ -0,0 +1,129 @@
+"""Warm start from the last departure board stored on disk.
+
+Without a snapshot, setup waits for the first API refresh, which can take
+half a minute with a slow provider and its retries. The coordinator stores a
+compact copy of the last successful stopEvents per config entry in .storage.
+On the next setup the entities come up from that copy immediately. Past
+departures are dropped, and minutes_until_departure is recomputed because
+the coordinator parses the stored stopEvents like a fresh response. The
+network refresh then runs in the background.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, WARM_START_SAVE_DELAY, WARM_START_STORAGE_VERSION
+
+# Top-level stop event fields read by the provider parsers; everything else is dropped
+_STOP_EVENT_KEYS = (
+    "departureTimePlanned",
+    "departureTimeEstimated",
+    "platformName",
+    "realtimeStatus",
+    "isRealtimeControlled",
+    "agency",
+    "transportMode",
+)
+
+
+class DepartureSnapshotStore:
+    """Last successful departure board of one config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        """Initialize the snapshot store.
+
+        Args:
+            hass: Home Assistant instance
+            entry_id: Config entry the snapshot belongs to
+        """
+        self._store: Store = Store(hass, WARM_START_STORAGE_VERSION, f"{DOMAIN}.snapshot.{entry_id}")
+        self._data: Optional[Dict[str, Any]] = None
+
+    async def async_load(self) -> Optional[Dict[str, Any]]:
+        """Load the stored board without departures that already left.
+
+        Returns:
+            Dictionary with 'stopEvents' key, or None if no upcoming departure is stored
+        """
+        stored = await self._store.async_load()
+        if not isinstance(stored, dict) or not isinstance(stored.get("stopEvents"), list):
+            return None
+
+        now = dt_util.utcnow()
+        stop_events = [stop for stop in stored["stopEvents"] if _is_upcoming(stop, now)]
+        if not stop_events:
+            return None
+        return {"stopEvents": stop_events}
+
+    @callback
+    def async_save(self, data: Dict[str, Any]) -> None:
+        """Schedule storing a new board; compaction happens when it is written."""
+        self._data = data
+        self._store.async_delay_save(self._data_to_save, WARM_START_SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Delete the stored snapshot."""
+        await self._store.async_remove()
+
+    def _data_to_save(self) -> Dict[str, Any]:
+        """Return the compact board to store, without departures that already left."""
+        stop_events = (self._data or {}).get("stopEvents")
+        if not isinstance(stop_events, list):
+            stop_events = []
+        now = dt_util.utcnow()
+        return {"stopEvents": [_compact_stop_event(stop) for stop in stop_events if _is_upcoming(stop, now)]}
+
+
+def _compact_stop_event(stop: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a stop event reduced to the fields the parsers read."""
+    compact = {key: stop[key] for key in _STOP_EVENT_KEYS if key in stop}
+
+    transportation = stop.get("transportation")
+    if isinstance(transportation, dict):
+        compact_transportation: Dict[str, Any] = {
+            key: transportation[key] for key in ("number", "description") if key in transportation
+        }
+        destination = transportation.get("destination")
+        if isinstance(destination, dict):
+            compact_transportation["destination"] = {"name": destination.get("name")}
+        product = transportation.get("product")
+        if isinstance(product, dict):
+            compact_transportation["product"] = {key: product[key] for key in ("class", "name") if key in product}
+        compact["transportation"] = compact_transportation
+
+    # KVV and HVV read the platform from the location
+    location = stop.get("location")
+    if isinstance(location, dict):
+        compact_location: Dict[str, Any] = {
+            key: location[key] for key in ("disassembledName", "platformName") if key in location
+        }
+        properties = location.get("properties")
+        if isinstance(properties, dict) and "platform" in properties:
+            compact_location["properties"] = {"platform": properties["platform"]}
+        if compact_location:
+            compact["location"] = compact_location
+
+    platform = stop.get("platform")
+    if isinstance(platform, dict):
+        compact["platform"] = {"name": platform.get("name")}
+    elif platform is not None:
+        compact["platform"] = platform
+
+    return compact
+
+
+def _is_upcoming(stop: Any, now: datetime) -> bool:
+    """Return True if a stored stop event has not departed yet."""
+    if not isinstance(stop, dict):
+        return False
+    departure = stop.get("departureTimeEstimated") or stop.get("departureTimePlanned")
+    if not isinstance(departure, str):
+        return False
+    departure_time = dt_util.parse_datetime(departure)
+    if departure_time is None or departure_time.tzinfo is None:
+        return False
+    return departure_time >= now
@@ -18,6 +18,7 @@ from custom_components.vrr.const import (
     DOMAIN,
     PROVIDER_VRR,
 )
+from custom_components.vrr.sensor import VRRDataUpdateCoordinator
 
 
 @pytest.fixture
@@ -85,10 +86,36 @@ def mock_coordinator(mock_api_response):
     coordinator.name_dm = "Hauptbahnhof"
     coordinator.station_id = None
     coordinator.departures_limit = 10
+    coordinator.stale = False
     # provider_instance will be set in individual tests as needed
     return coordinator
 
 
+@pytest.fixture
+async def create_coordinator(hass: HomeAssistant):
+    """Return a factory of coordinators holding the given departure data."""
+    coordinators = []
+
+    def _create_coordinator(data, transportation_types=None, departures_limit=10):
+        coordinator = VRRDataUpdateCoordinator(
+            hass,
+            provider=PROVIDER_VRR,
+            place_dm="Düsseldorf",
+            name_dm="Hauptbahnhof",
+            station_id=None,
+            departures_limit=departures_limit,
+            scan_interval=60,
+            transportation_types=transportation_types,
+        )
+        coordinator.data = data
+        coordinators.append(coordinator)
+        return coordinator
+
+    yield _create_coordinator
+    for coordinator in coordinators:
+        await coordinator.async_shutdown()
+
+
 @pytest.fixture
 async def hass_with_integration(hass: HomeAssistant):
     """Set up the integration."""
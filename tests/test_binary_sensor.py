@@ -1,44 +1,35 @@
 """Tests for VRR binary sensor platform."""
 
-from unittest.mock import MagicMock
+from unittest.mock import patch
 
 from homeassistant.core import HomeAssistant
 
 from custom_components.vrr.binary_sensor import VRRDelayBinarySensor, async_setup_entry
-from custom_components.vrr.const import DOMAIN, PROVIDER_VRR
+from custom_components.vrr.const import DOMAIN
+from custom_components.vrr.metrics import METRIC_EVENTS_IN
+from custom_components.vrr.sensor import MultiProviderSensor
 
 
-async def test_binary_sensor_no_delays(hass: HomeAssistant, mock_coordinator, mock_config_entry):
+async def test_binary_sensor_no_delays(hass: HomeAssistant, create_coordinator, mock_config_entry):
     """Test binary sensor with no delays."""
     # Create coordinator with on-time departures
-    coordinator = MagicMock()
-    coordinator.data = {
-        "stopEvents": [
-            {
-                "departureTimePlanned": "2025-01-15T10:00:00Z",
-                "departureTimeEstimated": "2025-01-15T10:00:00Z",
-            }
-        ]
-    }
-    coordinator.last_update_success = True
-    coordinator.provider = PROVIDER_VRR
-    coordinator.place_dm = "Düsseldorf"
-    coordinator.name_dm = "Hauptbahnhof"
-    coordinator.station_id = None
-
-    # Test with provider instance
-    from custom_components.vrr.providers import get_provider
-
-    coordinator.provider_instance = get_provider(PROVIDER_VRR, hass)
-
-    binary_sensor = VRRDelayBinarySensor(
-        coordinator,
-        mock_config_entry,
+    coordinator = create_coordinator(
+        {
+            "stopEvents": [
+                {
+                    "departureTimePlanned": "2025-01-15T10:00:00Z",
+                    "departureTimeEstimated": "2025-01-15T10:00:00Z",
+                }
+            ]
+        },
         ["bus", "train", "tram"],
     )
 
+    binary_sensor = VRRDelayBinarySensor(coordinator, mock_config_entry)
+
+    await coordinator.async_update_board(coordinator.data)
     # Call _process_delay_data directly to avoid needing hass
-    binary_sensor._process_delay_data(coordinator.data)
+    binary_sensor._process_delay_data(coordinator.board)
 
     # Should be OFF (no problem) when on time
     assert binary_sensor._attr_is_on is False
@@ -46,40 +37,29 @@ async def test_binary_sensor_no_delays(hass: HomeAssistant, mock_coordinator, mo
     assert binary_sensor._attributes["on_time_departures"] == 1
 
 
-async def test_binary_sensor_with_delays(hass: HomeAssistant, mock_config_entry):
+async def test_binary_sensor_with_delays(hass: HomeAssistant, create_coordinator, mock_config_entry):
     """Test binary sensor with delays."""
-    coordinator = MagicMock()
-    coordinator.data = {
-        "stopEvents": [
-            {
-                "departureTimePlanned": "2025-01-15T10:00:00Z",
-                "departureTimeEstimated": "2025-01-15T10:10:00Z",  # 10 min delay
-            },
-            {
-                "departureTimePlanned": "2025-01-15T10:05:00Z",
-                "departureTimeEstimated": "2025-01-15T10:07:00Z",  # 2 min delay
-            },
-        ]
-    }
-    coordinator.last_update_success = True
-    coordinator.provider = PROVIDER_VRR
-    coordinator.place_dm = "Düsseldorf"
-    coordinator.name_dm = "Hauptbahnhof"
-    coordinator.station_id = None
-
-    # Test with provider instance
-    from custom_components.vrr.providers import get_provider
-
-    coordinator.provider_instance = get_provider(PROVIDER_VRR, hass)
-
-    binary_sensor = VRRDelayBinarySensor(
-        coordinator,
-        mock_config_entry,
+    coordinator = create_coordinator(
+        {
+            "stopEvents": [
+                {
+                    "departureTimePlanned": "2025-01-15T10:00:00Z",
+                    "departureTimeEstimated": "2025-01-15T10:10:00Z",  # 10 min delay
+                },
+                {
+                    "departureTimePlanned": "2025-01-15T10:05:00Z",
+                    "departureTimeEstimated": "2025-01-15T10:07:00Z",  # 2 min delay
+                },
+            ]
+        },
         ["bus", "train", "tram"],
     )
 
+    binary_sensor = VRRDelayBinarySensor(coordinator, mock_config_entry)
+
+    await coordinator.async_update_board(coordinator.data)
     # Call _process_delay_data directly to avoid needing hass
-    binary_sensor._process_delay_data(coordinator.data)
+    binary_sensor._process_delay_data(coordinator.board)
 
     # Should be ON (problem) when delays > 5 minutes
     assert binary_sensor._attr_is_on is True
@@ -88,36 +68,25 @@ async def test_binary_sensor_with_delays(hass: HomeAssistant, mock_config_entry)
     assert binary_sensor._attributes["average_delay"] == 6.0
 
 
-async def test_binary_sensor_delay_threshold(hass: HomeAssistant, mock_config_entry):
+async def test_binary_sensor_delay_threshold(hass: HomeAssistant, create_coordinator, mock_config_entry):
     """Test binary sensor delay threshold (5 minutes)."""
-    coordinator = MagicMock()
-    coordinator.data = {
-        "stopEvents": [
-            {
-                "departureTimePlanned": "2025-01-15T10:00:00Z",
-                "departureTimeEstimated": "2025-01-15T10:04:00Z",  # 4 min delay
-            }
-        ]
-    }
-    coordinator.last_update_success = True
-    coordinator.provider = PROVIDER_VRR
-    coordinator.place_dm = "Düsseldorf"
-    coordinator.name_dm = "Hauptbahnhof"
-    coordinator.station_id = None
-
-    # Test with provider instance
-    from custom_components.vrr.providers import get_provider
-
-    coordinator.provider_instance = get_provider(PROVIDER_VRR, hass)
-
-    binary_sensor = VRRDelayBinarySensor(
-        coordinator,
-        mock_config_entry,
+    coordinator = create_coordinator(
+        {
+            "stopEvents": [
+                {
+                    "departureTimePlanned": "2025-01-15T10:00:00Z",
+                    "departureTimeEstimated": "2025-01-15T10:04:00Z",  # 4 min delay
+                }
+            ]
+        },
         ["bus", "train", "tram"],
     )
 
+    binary_sensor = VRRDelayBinarySensor(coordinator, mock_config_entry)
+
+    await coordinator.async_update_board(coordinator.data)
     # Call _process_delay_data directly to avoid needing hass
-    binary_sensor._process_delay_data(coordinator.data)
+    binary_sensor._process_delay_data(coordinator.board)
 
     # Should be OFF when delay <= 5 minutes
     assert binary_sensor._attr_is_on is False
@@ -126,11 +95,7 @@ async def test_binary_sensor_delay_threshold(hass: HomeAssistant, mock_config_en
 
 async def test_binary_sensor_icon(hass: HomeAssistant, mock_coordinator, mock_config_entry):
     """Test binary sensor icon changes based on state."""
-    binary_sensor = VRRDelayBinarySensor(
-        mock_coordinator,
-        mock_config_entry,
-        ["bus", "train", "tram"],
-    )
+    binary_sensor = VRRDelayBinarySensor(mock_coordinator, mock_config_entry)
 
     # No delay - check icon
     binary_sensor._attr_is_on = False
@@ -141,29 +106,15 @@ async def test_binary_sensor_icon(hass: HomeAssistant, mock_coordinator, mock_co
     assert binary_sensor.icon == "mdi:alert-circle"
 
 
-async def test_binary_sensor_no_departures(hass: HomeAssistant, mock_config_entry):
+async def test_binary_sensor_no_departures(hass: HomeAssistant, create_coordinator, mock_config_entry):
     """Test binary sensor with no departures."""
-    coordinator = MagicMock()
-    coordinator.data = {"stopEvents": []}
-    coordinator.last_update_success = True
-    coordinator.provider = PROVIDER_VRR
-    coordinator.place_dm = "Düsseldorf"
-    coordinator.name_dm = "Hauptbahnhof"
-    coordinator.station_id = None
-
-    # Test with provider instance
-    from custom_components.vrr.providers import get_provider
-
-    coordinator.provider_instance = get_provider(PROVIDER_VRR, hass)
-
-    binary_sensor = VRRDelayBinarySensor(
-        coordinator,
-        mock_config_entry,
-        ["bus", "train", "tram"],
-    )
+    coordinator = create_coordinator({"stopEvents": []}, ["bus", "train", "tram"])
+
+    binary_sensor = VRRDelayBinarySensor(coordinator, mock_config_entry)
 
+    await coordinator.async_update_board(coordinator.data)
     # Call _process_delay_data directly to avoid needing hass
-    binary_sensor._process_delay_data(coordinator.data)
+    binary_sensor._process_delay_data(coordinator.board)
 
     assert binary_sensor._attr_is_on is False
     assert binary_sensor._attributes["total_departures"] == 0
@@ -186,3 +137,34 @@ async def test_async_setup_entry(hass: HomeAssistant, mock_config_entry, mock_co
 
     assert len(entities) == 1
     assert isinstance(entities[0], VRRDelayBinarySensor)
+
+
+async def test_entities_share_board(hass: HomeAssistant, create_coordinator, mock_config_entry, mock_api_response):
+    """Test the coordinator parses a response once for all of its entities."""
+    coordinator = create_coordinator(mock_api_response, ["bus", "train", "tram"])
+    sensor = MultiProviderSensor(coordinator, mock_config_entry, ["bus", "train", "tram"])
+    binary_sensor = VRRDelayBinarySensor(coordinator, mock_config_entry)
+
+    with patch.object(
+        coordinator.provider_instance, "parse_departures", wraps=coordinator.provider_instance.parse_departures
+    ) as parse_departures:
+        await coordinator.async_update_board(coordinator.data)
+        sensor._process_departure_board(coordinator.board)
+        binary_sensor._process_delay_data(coordinator.board)
+        assert parse_departures.call_count == 1
+
+        # The same options and minute reuse the board
+        assert not await coordinator.async_update_board(coordinator.data)
+
+        # Other options parse the same response again
+        coordinator.set_transportation_types(["tram"])
+        assert await coordinator.async_update_board(coordinator.data)
+        binary_sensor._process_delay_data(coordinator.board)
+        assert parse_departures.call_count == 2
+
+    assert sensor._attributes["total_departures"] == 2
+    assert sensor._attributes["delayed_count"] == binary_sensor._attributes["delayed_departures"] == 1
+    assert binary_sensor._attributes["total_departures"] == 1
+    assert coordinator.refresh_metrics.refreshes == 0
+    assert coordinator.refresh_metrics.value(METRIC_EVENTS_IN) == 2
+
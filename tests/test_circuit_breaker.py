@@ -0,0 +1,201 @@
+"""Tests for the circuit breaker."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.vrr.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    async_get_circuit_breaker,
+)
+from custom_components.vrr.const import PROVIDER_VRR
+from custom_components.vrr.sensor import VRRDataUpdateCoordinator
+from custom_components.vrr.transport import DeadlineExceededError, ResilientTransport
+
+
+@pytest.fixture
+def mock_time():
+    """Patch the monotonic clock of the breaker."""
+    with patch("custom_components.vrr.circuit_breaker.time.monotonic", return_value=1000.0) as monotonic:
+        yield monotonic
+
+
+def test_opens_after_consecutive_failures(mock_time):
+    """Test the breaker opens at the failure threshold and a success resets the count."""
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=60)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
+    assert breaker.as_dict()["rejected_count"] == 1
+    assert breaker.as_dict()["probe_in"] == 60
+
+
+def test_half_open_single_probe(mock_time):
+    """Test only one probe is let through after the recovery timeout."""
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+
+    mock_time.return_value = 1060.0
+    assert breaker.allow_request()
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.probing
+    assert not breaker.allow_request()
+
+    # A failed probe opens the breaker again
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
+
+    mock_time.return_value = 1120.0
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request()
+
+
+def test_released_probe(mock_time):
+    """Test a cancelled probe lets the next request probe again."""
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+    mock_time.return_value = 1060.0
+
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.allow_request()
+
+
+async def test_registry(hass: HomeAssistant):
+    """Test breakers are shared per endpoint."""
+    breaker = async_get_circuit_breaker(hass, "vrr")
+    assert async_get_circuit_breaker(hass, "vrr") is breaker
+    assert async_get_circuit_breaker(hass, "kvv") is not breaker
+
+
+async def test_transport_fails_fast(hass: HomeAssistant):
+    """Test the transport opens the breaker and then stops sending requests."""
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=60)
+    transport = ResilientTransport(hass, "Test", max_attempts=2)
+
+    with (
+        patch("custom_components.vrr.transport.async_get_session") as mock_session,
+        patch("custom_components.vrr.transport.asyncio.sleep", new=AsyncMock()),
+    ):
+        mock_session.return_value.get.return_value.__aenter__.side_effect = asyncio.TimeoutError()
+
+        for _ in range(2):
+            response = await transport.request("https://example.com", circuit_breaker=breaker)
+            assert response.failed
+
+        assert breaker.state == STATE_OPEN
+        assert mock_session.return_value.get.call_count == 4
+
+        with pytest.raises(CircuitOpenError):
+            await transport.request("https://example.com", circuit_breaker=breaker)
+
+        assert mock_session.return_value.get.call_count == 4
+        assert transport.metrics.rejected == 1
+
+
+async def test_transport_probe_single_attempt(hass: HomeAssistant):
+    """Test the half-open probe is sent once and closes the breaker on success."""
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0)
+    breaker.record_failure()
+    transport = ResilientTransport(hass, "Test")
+    response = MagicMock()
+    response.status = 404
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        mock_session.return_value.get.return_value.__aenter__.return_value = response
+
+        result = await transport.request("https://example.com", circuit_breaker=breaker)
+
+    # A 404 is an answer of a working endpoint
+    assert result.status == 404
+    assert mock_session.return_value.get.call_count == 1
+    assert breaker.state == STATE_CLOSED
+
+
+async def test_transport_deadline_before_probe(hass: HomeAssistant):
+    """Test a probe stopped by its deadline before sending leaves the half-open breaker as is."""
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=0)
+    breaker.record_failure()
+    breaker.record_failure()
+    transport = ResilientTransport(hass, "Test")
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        with pytest.raises(DeadlineExceededError):
+            await transport.request("https://example.com", circuit_breaker=breaker, deadline=time.monotonic() + 1)
+
+    mock_session.return_value.get.assert_not_called()
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.failures == 2
+    assert not breaker.probing
+
+
+async def test_coordinator_serves_stale_data(hass: HomeAssistant, mock_api_response):
+    """Test the coordinator keeps its last data while the breaker is open."""
+    coordinator = VRRDataUpdateCoordinator(
+        hass,
+        provider=PROVIDER_VRR,
+        place_dm="Düsseldorf",
+        name_dm="Hauptbahnhof",
+        station_id=None,
+        departures_limit=10,
+        scan_interval=60,
+    )
+    assert coordinator.provider_instance.circuit_breaker is async_get_circuit_breaker(hass, PROVIDER_VRR)
+    listener = MagicMock()
+    unsub = coordinator.async_add_listener(listener)
+
+    with patch.object(coordinator, "_fetch_departures", return_value=mock_api_response):
+        await coordinator.async_refresh()
+    assert listener.call_count == 1
+
+    with patch.object(coordinator, "_fetch_departures", side_effect=CircuitOpenError("VRR API circuit breaker is open")):
+        await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.data is mock_api_response
+    assert coordinator.stale
+    assert listener.call_count == 2
+
+    with patch.object(coordinator, "_fetch_departures", return_value=mock_api_response):
+        await coordinator.async_refresh()
+
+    assert not coordinator.stale
+    assert listener.call_count == 3
+    unsub()
+
+
+async def test_coordinator_open_breaker_without_data(hass: HomeAssistant):
+    """Test the update fails while the breaker is open and there is no data yet."""
+    coordinator = VRRDataUpdateCoordinator(
+        hass,
+        provider=PROVIDER_VRR,
+        place_dm="Düsseldorf",
+        name_dm="Hauptbahnhof",
+        station_id=None,
+        departures_limit=10,
+        scan_interval=60,
+    )
+
+    with patch.object(coordinator, "_fetch_departures", side_effect=CircuitOpenError("VRR API circuit breaker is open")):
+        await coordinator.async_refresh()
+
+    assert not coordinator.last_update_success
@@ -8,10 +8,13 @@ from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResultType
 
 from custom_components.vrr.const import (
+    CONF_ADAPTIVE_POLLING,
     CONF_DEPARTURES,
+    CONF_MAX_SCAN_INTERVAL,
     CONF_PROVIDER,
     CONF_SCAN_INTERVAL,
     CONF_TRANSPORTATION_TYPES,
+    DEFAULT_MAX_SCAN_INTERVAL,
     DOMAIN,
     PROVIDER_VRR,
 )
@@ -208,6 +211,8 @@ async def test_options_flow(hass: HomeAssistant, mock_config_entry):
     assert result["type"] == FlowResultType.CREATE_ENTRY
     assert result["data"][CONF_DEPARTURES] == 15
     assert result["data"][CONF_SCAN_INTERVAL] == 120
+    assert result["data"][CONF_ADAPTIVE_POLLING] is False
+    assert result["data"][CONF_MAX_SCAN_INTERVAL] == DEFAULT_MAX_SCAN_INTERVAL
 
 
 def test_parse_stopfinder_response():
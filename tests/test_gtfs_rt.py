@@ -0,0 +1,435 @@
+"""Tests for the shared GTFS-RT feed hub."""
+
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
+
+import pytest
+from google.protobuf import json_format
+from google.transit import gtfs_realtime_pb2
+from homeassistant.core import HomeAssistant
+
+from custom_components.vrr.const import (
+    DATA_NTA_FEED_HUBS,
+    DOMAIN,
+    NTA_FEED_FORMAT_JSON,
+    NTA_FEED_FORMAT_PROTOBUF,
+    NTA_FEED_PROTOBUF_RETRY_AFTER,
+)
+from custom_components.vrr.gtfs_rt import (
+    FeedSnapshot,
+    GTFSRealtimeFeedHub,
+    async_decode_json_feed,
+    async_get_feed_hub,
+    async_release_feed_hub,
+)
+from custom_components.vrr.offload import STAGE_STOP_EVENTS, async_get_offloader
+from custom_components.vrr.providers.nta import NTAProvider
+from custom_components.vrr.transport import TransportMetrics
+
+
+def _entity(trip_id, route_id, stop_times):
+    """Build a TripUpdates entity in GTFS-RT JSON format."""
+    return {
+        "id": trip_id,
+        "trip_update": {
+            "trip": {"trip_id": trip_id, "route_id": route_id},
+            "stop_time_update": [
+                {"stop_id": stop_id, "departure": {"time": departure_time, "delay": delay}}
+                for stop_id, departure_time, delay in stop_times
+            ],
+        },
+    }
+
+
+class _ChunkedStream:
+    """Minimal aiohttp.StreamReader serving a payload in small chunks."""
+
+    def __init__(self, payload: bytes, chunk_size: int = 7):
+        self._payload = payload
+        self._chunk_size = chunk_size
+        self._pos = 0
+        self.total_bytes = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        size = min(size, self._chunk_size) if size > 0 else self._chunk_size
+        chunk = self._payload[self._pos : self._pos + size]
+        self._pos += len(chunk)
+        self.total_bytes += len(chunk)
+        return chunk
+
+
+@pytest.fixture
+def feed_entities():
+    """Return a small TripUpdates feed."""
+    return [
+        _entity("trip1", "46A_1", [("stop_a", 1736935200, 60), ("stop_b", 1736935500, 60)]),
+        _entity("trip2", "Green_2", [("stop_b", 1736935800, 0)]),
+        _entity("trip3", "39_3", [("stop_c", 1736936100, 0)]),
+        {"id": "alert", "alert": {}},
+    ]
+
+
+@pytest.fixture
+def feed_dict(feed_entities):
+    """Return the feed in GTFS-RT JSON format."""
+    return {"header": {"gtfs_realtime_version": "2.0", "timestamp": "1736935000"}, "entity": feed_entities}
+
+
+@pytest.fixture
+def feed_protobuf(feed_dict):
+    """Return the feed as serialized protobuf."""
+    return json_format.ParseDict(feed_dict, gtfs_realtime_pb2.FeedMessage()).SerializeToString()
+
+
+@pytest.fixture
+def mock_feed_response(feed_dict, feed_protobuf):
+    """Return a mocked aiohttp response carrying the feed in both formats."""
+    response = MagicMock()
+    response.status = 200
+    response.read = AsyncMock(return_value=feed_protobuf)
+    # Every download streams the JSON feed from the start
+    type(response).content = PropertyMock(side_effect=lambda: _ChunkedStream(json.dumps(feed_dict).encode()))
+    return response
+
+
+def test_snapshot_stop_events(feed_entities):
+    """Test slicing one stop out of a snapshot."""
+    snapshot = FeedSnapshot.from_entities(feed_entities, time.monotonic())
+
+    events = snapshot.stop_events("stop_b", 10)
+
+    assert len(events) == 2
+    assert {event["trip_id"] for event in events} == {"trip1", "trip2"}
+    luas = next(event for event in events if event["trip_id"] == "trip2")
+    assert luas["transportation"]["number"] == "Green"
+    assert luas["transportation"]["product"]["class"] == 0
+    bus = next(event for event in events if event["trip_id"] == "trip1")
+    assert bus["realtimeStatus"] == ["MONITORED"]
+    assert bus["delay_seconds"] == 60
+
+
+def test_snapshot_stop_events_limit(feed_entities):
+    """Test the maximum number of stop events is respected."""
+    snapshot = FeedSnapshot.from_entities(feed_entities, time.monotonic())
+
+    assert len(snapshot.stop_events("stop_b", 1)) == 1
+    assert snapshot.stop_events("unknown_stop", 10) == []
+
+
+def test_snapshot_stop_index():
+    """Test the stop_id index is built once and keeps the first visit per trip."""
+    entities = [
+        _entity("loop", "46A_1", [("stop_a", 1736935200, 0), ("stop_b", 1736935500, 0), ("stop_a", 1736936100, 0)]),
+        _entity("trip2", "39_2", [("stop_a", 1736935800, 0)]),
+        "invalid",
+        {"id": "no_trip_update"},
+    ]
+    snapshot = FeedSnapshot.from_entities(entities, time.monotonic())
+
+    assert snapshot.entity_count == 4
+    assert snapshot.stop_count == 2
+
+    events = snapshot.stop_events("stop_a", 10)
+    assert [event["trip_id"] for event in events] == ["loop", "trip2"]
+    assert events[0]["departureTimePlanned"] == snapshot.stop_events("stop_a", 1)[0]["departureTimePlanned"]
+
+
+def test_snapshot_protobuf_matches_json(feed_entities, feed_protobuf):
+    """Test a protobuf snapshot yields the same stop events as the JSON one."""
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.ParseFromString(feed_protobuf)
+
+    json_snapshot = FeedSnapshot.from_entities(feed_entities, time.monotonic())
+    protobuf_snapshot = FeedSnapshot.from_feed_message(feed, time.monotonic())
+
+    assert protobuf_snapshot.entity_count == json_snapshot.entity_count
+    assert protobuf_snapshot.stop_count == json_snapshot.stop_count
+    for stop_id in ("stop_a", "stop_b", "stop_c"):
+        assert protobuf_snapshot.stop_events(stop_id, 10) == json_snapshot.stop_events(stop_id, 10)
+
+
+def test_snapshot_protobuf_skips_canceled_stops():
+    """Test canceled stops in a protobuf feed are skipped."""
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = "2.0"
+    entity = feed.entity.add()
+    entity.id = "trip1"
+    entity.trip_update.trip.trip_id = "trip1"
+    stop_time_update = entity.trip_update.stop_time_update.add()
+    stop_time_update.stop_id = "stop_a"
+    stop_time_update.schedule_relationship = gtfs_realtime_pb2.TripUpdate.StopTimeUpdate.SKIPPED
+
+    snapshot = FeedSnapshot.from_feed_message(feed, time.monotonic())
+
+    assert snapshot.stop_events("stop_a", 10) == []
+
+
+async def test_decode_json_feed_matches_full_decode(feed_dict, feed_entities):
+    """Test the streaming decode yields the same snapshot as decoding the whole feed."""
+    feed_dict["entity"][0]["trip_update"]["trip"]["route_id"] = "Dún Laoghaire_1"
+    payload = json.dumps(feed_dict, ensure_ascii=False, indent=1).encode()
+
+    streamed = await async_decode_json_feed(_ChunkedStream(payload))
+    full = FeedSnapshot.from_entities(feed_entities, time.monotonic())
+
+    assert streamed.entity_count == 4
+    assert streamed.feed_timestamp == 1736935000
+    assert streamed.stop_count == full.stop_count
+    assert streamed.covers(["stop_a", "stop_b", "any"])
+    for stop_id in ("stop_a", "stop_b", "stop_c"):
+        assert streamed.stop_events(stop_id, 10) == full.stop_events(stop_id, 10)
+
+
+async def test_decode_json_feed_keeps_watched_stops(feed_dict):
+    """Test the streaming decode only indexes the requested stops."""
+    payload = json.dumps(feed_dict).encode()
+
+    snapshot = await async_decode_json_feed(_ChunkedStream(payload), frozenset({"stop_b"}))
+
+    assert snapshot.entity_count == 4
+    assert snapshot.stop_count == 1
+    assert len(snapshot.stop_events("stop_b", 10)) == 2
+    assert snapshot.stop_events("stop_a", 10) == []
+    assert snapshot.covers(["stop_b"])
+    assert not snapshot.covers(["stop_a", "stop_b"])
+
+
+@pytest.mark.parametrize("payload", [b"", b"[]", b'{"entity": [{"id": "1"}', b'{"entity": [] "header": {}}'])
+async def test_decode_json_feed_invalid(payload):
+    """Test an invalid or truncated feed is rejected."""
+    with pytest.raises(ValueError):
+        await async_decode_json_feed(_ChunkedStream(payload))
+
+
+async def test_hub_downloads_once_for_all_stops(hass: HomeAssistant, mock_feed_response):
+    """Test several stops share a single feed download."""
+    hub = GTFSRealtimeFeedHub(hass, "key")
+    assert hub.feed_format == NTA_FEED_FORMAT_PROTOBUF
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        mock_session.return_value.get.return_value.__aenter__.return_value = mock_feed_response
+
+        for stop_id in ("stop_a", "stop_b", "stop_c"):
+            result = await hub.async_get_stop_events(stop_id, 10)
+            assert result is not None
+            assert len(result["stopEvents"]) >= 1
+
+        assert mock_session.return_value.get.call_count == 1
+        assert hub.download_count == 1
+
+
+async def test_hub_attributes_download_to_caller(hass: HomeAssistant, mock_feed_response):
+    """Test a download is counted by the caller that triggered it only."""
+    hub = GTFSRealtimeFeedHub(hass, "key")
+    first, second = TransportMetrics(), TransportMetrics()
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        mock_session.return_value.get.return_value.__aenter__.return_value = mock_feed_response
+
+        await hub.async_get_stop_events("stop_a", 10, metrics=first)
+        await hub.async_get_stop_events("stop_b", 10, metrics=second)
+
+    assert first.requests == hub.transport.metrics.requests == 1
+    assert first.bytes_received == hub.transport.metrics.bytes_received > 0
+    assert first.status_counts == {200: 1}
+    assert first.last_latency is not None
+    assert second.requests == second.bytes_received == 0
+    assert second.status_counts == {}
+
+
+async def test_hub_builds_stop_events_with_offloader(hass: HomeAssistant, mock_feed_response):
+    """Test the stop events of a stop are built through the offloader once per snapshot."""
+    hub = GTFSRealtimeFeedHub(hass, "key")
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        mock_session.return_value.get.return_value.__aenter__.return_value = mock_feed_response
+
+        payload = await hub.async_get_stop_events("stop_a", 10)
+        assert await hub.async_get_stop_events("stop_a", 10) is payload
+
+    assert async_get_offloader(hass).as_dict()[STAGE_STOP_EVENTS]["inline_runs"] == 1
+
+
+async def test_hub_redownloads_outdated_snapshot(hass: HomeAssistant, mock_feed_response):
+    """Test an outdated snapshot is replaced by a new download."""
+    hub = GTFSRealtimeFeedHub(hass, "key", max_age=0)
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        mock_session.return_value.get.return_value.__aenter__.return_value = mock_feed_response
+
+        await hub.async_get_stop_events("stop_a", 10)
+        await hub.async_get_stop_events("stop_a", 10)
+
+        assert hub.download_count == 2
+
+
+async def test_hub_reuses_snapshot_with_same_feed_timestamp(hass: HomeAssistant, mock_feed_response):
+    """Test a download with an unchanged header.timestamp keeps the snapshot and payloads."""
+    hub = GTFSRealtimeFeedHub(hass, "key", max_age=0)
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        mock_session.return_value.get.return_value.__aenter__.return_value = mock_feed_response
+
+        first = await hub.async_get_stop_events("stop_b", 10)
+        snapshot = hub._snapshot
+        assert snapshot.feed_timestamp == 1736935000
+
+        with patch.object(FeedSnapshot, "from_feed_message") as mock_decode:
+            second = await hub.async_get_stop_events("stop_b", 10)
+            mock_decode.assert_not_called()
+
+        assert hub.download_count == 2
+        assert hub._snapshot is snapshot
+        assert second is first
+
+
+async def test_hub_not_modified(hass: HomeAssistant, mock_feed_response):
+    """Test a 304 response keeps the current snapshot."""
+    mock_feed_response.headers = {"ETag": '"feed-1"'}
+    hub = GTFSRealtimeFeedHub(hass, "key", max_age=0)
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        mock_get = mock_session.return_value.get
+        mock_get.return_value.__aenter__.return_value = mock_feed_response
+
+        first = await hub.async_get_stop_events("stop_a", 10)
+
+        mock_feed_response.status = 304
+        mock_feed_response.read.reset_mock()
+        second = await hub.async_get_stop_events("stop_a", 10)
+
+        assert second is first
+        assert mock_get.call_args.kwargs["headers"]["If-None-Match"] == '"feed-1"'
+        mock_feed_response.read.assert_not_called()
+
+
+async def test_hub_json_format(hass: HomeAssistant, mock_feed_response):
+    """Test the hub can still download the JSON feed."""
+    hub = GTFSRealtimeFeedHub(hass, "key", feed_format=NTA_FEED_FORMAT_JSON)
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        mock_session.return_value.get.return_value.__aenter__.return_value = mock_feed_response
+
+        result = await hub.async_get_stop_events("stop_b", 10)
+
+        assert len(result["stopEvents"]) == 2
+        assert mock_session.return_value.get.call_args.kwargs["params"] == {"format": "json"}
+        mock_feed_response.read.assert_not_called()
+
+
+async def test_hub_json_format_new_stop(hass: HomeAssistant, mock_feed_response):
+    """Test a JSON snapshot is downloaded again for a stop registered after it."""
+    mock_feed_response.headers = {"ETag": '"feed-1"'}
+    hub = GTFSRealtimeFeedHub(hass, "key", feed_format=NTA_FEED_FORMAT_JSON)
+    hub.add_stop("stop_a")
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        mock_get = mock_session.return_value.get
+        mock_get.return_value.__aenter__.return_value = mock_feed_response
+
+        await hub.async_get_stop_events("stop_a", 10)
+        assert hub._snapshot.stop_ids == frozenset({"stop_a"})
+
+        hub.add_stop("stop_b")
+        result = await hub.async_get_stop_events("stop_b", 10)
+
+        assert len(result["stopEvents"]) == 2
+        assert hub.download_count == 2
+        assert "If-None-Match" not in mock_get.call_args.kwargs["headers"]
+        assert hub._snapshot.stop_ids == frozenset({"stop_a", "stop_b"})
+
+        # Stop A is covered by the new snapshot as well
+        await hub.async_get_stop_events("stop_a", 10)
+        assert hub.download_count == 2
+
+
+async def test_hub_protobuf_falls_back_to_json(hass: HomeAssistant, mock_feed_response):
+    """Test an undecodable protobuf payload switches the hub to JSON."""
+    mock_feed_response.read = AsyncMock(return_value=b"not a protobuf feed")
+    hub = GTFSRealtimeFeedHub(hass, "key")
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        mock_session.return_value.get.return_value.__aenter__.return_value = mock_feed_response
+
+        result = await hub.async_get_stop_events("stop_b", 10)
+
+        assert len(result["stopEvents"]) == 2
+        assert hub.feed_format == NTA_FEED_FORMAT_JSON
+
+
+async def test_hub_retries_protobuf_after_fallback(hass: HomeAssistant, mock_feed_response, feed_protobuf):
+    """Test the hub goes back to protobuf once the JSON fallback is old enough."""
+    mock_feed_response.read = AsyncMock(return_value=b"not a protobuf feed")
+    hub = GTFSRealtimeFeedHub(hass, "key", max_age=0)
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        mock_get = mock_session.return_value.get
+        mock_get.return_value.__aenter__.return_value = mock_feed_response
+
+        await hub.async_get_stop_events("stop_b", 10)
+        assert hub.feed_format == NTA_FEED_FORMAT_JSON
+
+        # Still within the cooldown: JSON again
+        await hub.async_get_stop_events("stop_b", 10)
+        assert mock_get.call_args.kwargs["params"] == {"format": "json"}
+
+        mock_feed_response.read = AsyncMock(return_value=feed_protobuf)
+        with patch(
+            "custom_components.vrr.gtfs_rt.time.monotonic", return_value=time.monotonic() + NTA_FEED_PROTOBUF_RETRY_AFTER
+        ):
+            result = await hub.async_get_stop_events("stop_b", 10)
+
+        assert len(result["stopEvents"]) == 2
+        assert mock_get.call_args.kwargs["params"] == {}
+        assert hub.feed_format == NTA_FEED_FORMAT_PROTOBUF
+
+
+async def test_hub_download_error(hass: HomeAssistant):
+    """Test the hub returns None when the feed cannot be downloaded."""
+    hub = GTFSRealtimeFeedHub(hass, "key")
+    response = MagicMock()
+    response.status = 404
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        mock_session.return_value.get.return_value.__aenter__.return_value = response
+
+        assert await hub.async_get_stop_events("stop_a", 10) is None
+
+
+async def test_hub_registry(hass: HomeAssistant):
+    """Test hubs are shared per API key and released with their last stop."""
+    hub = async_get_feed_hub(hass, "key")
+    assert async_get_feed_hub(hass, "key") is hub
+    assert async_get_feed_hub(hass, "other_key") is not hub
+
+    hub.add_stop("stop_a")
+    hub.add_stop("stop_b")
+
+    async_release_feed_hub(hass, hub, "stop_a")
+    assert hass.data[DOMAIN][DATA_NTA_FEED_HUBS]["key"] is hub
+
+    async_release_feed_hub(hass, hub, "stop_b")
+    assert "key" not in hass.data[DOMAIN][DATA_NTA_FEED_HUBS]
+
+
+async def test_nta_providers_share_hub(hass: HomeAssistant, mock_feed_response):
+    """Test NTA providers with the same API key read from one hub."""
+    providers = [NTAProvider(hass, api_key="key") for _ in range(3)]
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        mock_session.return_value.get.return_value.__aenter__.return_value = mock_feed_response
+
+        for provider, stop_id in zip(providers, ("stop_a", "stop_b", "stop_c")):
+            result = await provider.fetch_departures(stop_id, "", "", 10)
+            assert result is not None
+
+        assert mock_session.return_value.get.call_count == 1
+
+    hub = hass.data[DOMAIN][DATA_NTA_FEED_HUBS]["key"]
+    assert sorted(hub.stop_ids) == ["stop_a", "stop_b", "stop_c"]
+
+    for provider in providers:
+        await provider.cleanup()
+
+    assert "key" not in hass.data[DOMAIN][DATA_NTA_FEED_HUBS]
@@ -0,0 +1,63 @@
+"""Tests for the integration-owned HTTP session."""
+
+from unittest.mock import AsyncMock, patch
+
+import aiohttp
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import HomeAssistant
+
+from custom_components.vrr import async_unload_entry
+from custom_components.vrr.const import (
+    DATA_HTTP_SESSION,
+    DOMAIN,
+    HTTP_CONNECTION_LIMIT_PER_HOST,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+)
+from custom_components.vrr.http_session import async_close_session, async_get_session, async_get_transit_session
+
+
+async def test_connector_settings(hass: HomeAssistant):
+    """Test the session is shared and uses the tuned connector."""
+    with patch("custom_components.vrr.http_session.aiohttp.TCPConnector", wraps=aiohttp.TCPConnector) as mock_connector:
+        session = async_get_session(hass)
+        assert async_get_session(hass) is session
+
+    mock_connector.assert_called_once()
+    assert mock_connector.call_args.kwargs["limit_per_host"] == HTTP_CONNECTION_LIMIT_PER_HOST
+    assert mock_connector.call_args.kwargs["ttl_dns_cache"] == HTTP_DNS_CACHE_TTL
+    assert mock_connector.call_args.kwargs["keepalive_timeout"] == HTTP_KEEPALIVE_TIMEOUT
+    assert async_get_transit_session(hass).as_dict()["open_connections"] == 0
+
+    await async_close_session(hass)
+    assert session.closed
+    assert DATA_HTTP_SESSION not in hass.data[DOMAIN]
+
+    # A closed session is replaced on next use
+    assert async_get_session(hass) is not session
+    await async_close_session(hass)
+
+
+async def test_closed_on_stop(hass: HomeAssistant):
+    """Test the session is closed when Home Assistant stops."""
+    session = async_get_session(hass)
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
+    await hass.async_block_till_done()
+
+    assert session.closed
+
+
+async def test_closed_on_last_unload(hass: HomeAssistant, mock_config_entry: ConfigEntry):
+    """Test unloading the last entry closes the session."""
+    session = async_get_session(hass)
+
+    with patch(
+        "homeassistant.config_entries.ConfigEntries.async_unload_platforms",
+        new_callable=AsyncMock,
+        return_value=True,
+    ):
+        assert await async_unload_entry(hass, mock_config_entry) is True
+
+    assert session.closed
@@ -0,0 +1,47 @@
+"""Tests for the per-endpoint latency tracker."""
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.vrr.const import HEDGE_MIN_DELAY, HEDGE_MIN_SAMPLES
+from custom_components.vrr.latency import LatencyTracker, async_get_latency_tracker
+
+
+def test_percentiles():
+    """Test the nearest-rank percentiles of the window."""
+    tracker = LatencyTracker("test", window=100)
+    assert tracker.percentile(90) is None
+
+    for latency in range(1, 101):
+        tracker.record(latency / 100)
+
+    assert tracker.percentile(50) == 0.5
+    assert tracker.percentile(90) == 0.9
+    assert tracker.percentile(99) == 0.99
+    assert tracker.as_dict() == {"samples": 100, "p50_ms": 500, "p90_ms": 900, "p99_ms": 990}
+
+    # The window only keeps the most recent response times
+    for _ in range(100):
+        tracker.record(2.0)
+    assert tracker.percentile(50) == 2.0
+
+
+def test_hedge_delay():
+    """Test hedging waits for enough samples and never starts too early."""
+    tracker = LatencyTracker("test")
+    for _ in range(HEDGE_MIN_SAMPLES - 1):
+        tracker.record(0.01)
+    assert tracker.hedge_delay() is None
+
+    tracker.record(0.01)
+    assert tracker.hedge_delay() == HEDGE_MIN_DELAY
+
+    for _ in range(HEDGE_MIN_SAMPLES * 10):
+        tracker.record(3.0)
+    assert tracker.hedge_delay() == 3.0
+
+
+async def test_registry(hass: HomeAssistant):
+    """Test trackers are shared per endpoint."""
+    tracker = async_get_latency_tracker(hass, "vrr")
+    assert async_get_latency_tracker(hass, "vrr") is tracker
+    assert async_get_latency_tracker(hass, "hvv") is not tracker
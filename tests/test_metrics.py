@@ -0,0 +1,92 @@
+"""Tests for the per-refresh performance metrics."""
+
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.vrr.circuit_breaker import STATE_CLOSED
+from custom_components.vrr.const import DOMAIN, PROVIDER_VRR
+from custom_components.vrr.diagnostics import async_get_config_entry_diagnostics
+from custom_components.vrr.metrics import (
+    METRIC_BYTES_RECEIVED,
+    METRIC_EVENTS_IN,
+    METRIC_EVENTS_OUT,
+    METRIC_PARSE_TIME,
+    METRIC_RETRIES,
+    RefreshMetrics,
+    nearest_rank,
+)
+from custom_components.vrr.sensor import REFRESH_METRIC_SENSORS, RefreshMetricSensor, VRRDataUpdateCoordinator
+from custom_components.vrr.transport import TransportMetrics
+
+
+def test_nearest_rank():
+    """Test the nearest-rank percentile."""
+    assert nearest_rank([], 50) is None
+    assert nearest_rank([3, 1, 2], 50) == 2
+    assert nearest_rank(range(1, 101), 95) == 95
+
+
+def test_refresh_metrics_window():
+    """Test refresh figures are measured against the transport counters."""
+    metrics = RefreshMetrics(window=3)
+    transport_metrics = TransportMetrics()
+    listener = MagicMock()
+    remove_listener = metrics.async_add_listener(listener)
+
+    for size in (100, 200, 300, 400):
+        start = metrics.start_refresh(transport_metrics)
+        transport_metrics.bytes_received += size
+        transport_metrics.retries += 1
+        metrics.finish_refresh(start, transport_metrics, STATE_CLOSED)
+
+    metrics.record_parse(0.002, 10, 4)
+    remove_listener()
+    metrics.record_parse(0.002, 10, 4)
+
+    assert listener.call_count == 5
+    assert metrics.refreshes == 4
+    assert metrics.value(METRIC_BYTES_RECEIVED) == 400
+    # The oldest refresh left the window
+    assert metrics.percentile(METRIC_BYTES_RECEIVED, 50) == 300
+    assert metrics.percentile(METRIC_RETRIES, 95) == 1
+    assert metrics.value(METRIC_PARSE_TIME) == 2.0
+
+    stats = metrics.as_dict()
+    assert stats["breaker_state"] == STATE_CLOSED
+    assert stats["parse_time_ms"] == {"last": 2.0, "p50": 2.0, "p95": 2.0}
+    assert stats[METRIC_EVENTS_IN]["p95"] == 10
+    assert stats[METRIC_EVENTS_OUT]["last"] == 4
+
+
+async def test_coordinator_records_refresh(hass: HomeAssistant, mock_config_entry, mock_coordinator, mock_api_response):
+    """Test the coordinator records every refresh and the diagnostics show it."""
+    coordinator = VRRDataUpdateCoordinator(
+        hass,
+        provider=PROVIDER_VRR,
+        place_dm="Düsseldorf",
+        name_dm="Hauptbahnhof",
+        station_id=None,
+        departures_limit=10,
+        scan_interval=60,
+        config_entry=mock_config_entry,
+    )
+
+    with patch.object(coordinator, "_fetch_departures", return_value=mock_api_response):
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+
+    assert coordinator.refresh_metrics.refreshes == 2
+    assert coordinator.refresh_metrics.breaker_state == STATE_CLOSED
+    assert coordinator.refresh_metrics.value(METRIC_BYTES_RECEIVED) == 0
+
+    sensor = RefreshMetricSensor(coordinator, REFRESH_METRIC_SENSORS[0])
+    assert sensor.native_value is not None
+    assert set(sensor.extra_state_attributes) == {"p50", "p95"}
+
+    mock_coordinator.refresh_metrics = coordinator.refresh_metrics
+    hass.data[DOMAIN] = {f"{mock_config_entry.entry_id}_coordinator": mock_coordinator}
+    diagnostics = await async_get_config_entry_diagnostics(hass, mock_config_entry)
+    assert diagnostics["refresh_metrics"]["refreshes"] == 2
+    assert diagnostics["refresh_metrics"]["request_latency_ms"]["p95"] is not None
+    await coordinator.async_shutdown()
@@ -0,0 +1,102 @@
+"""Tests for running decode stages in the executor."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.vrr.const import OFFLOAD_INLINE_BUDGET, OFFLOAD_MIN_SIZE, PROVIDER_VRR
+from custom_components.vrr.offload import (
+    STAGE_DEPARTURE_PARSE,
+    STAGE_JSON_DECODE,
+    Offloader,
+    OffloadStage,
+    async_get_offloader,
+)
+from custom_components.vrr.sensor import VRRDataUpdateCoordinator
+from custom_components.vrr.transport import ResilientTransport
+
+
+def test_stage_threshold_adapts():
+    """Test the executor threshold follows the measured cost per byte."""
+    stage = OffloadStage("test")
+    assert stage.threshold == OFFLOAD_MIN_SIZE
+    assert not stage.should_offload(OFFLOAD_MIN_SIZE - 1)
+    assert stage.should_offload(OFFLOAD_MIN_SIZE)
+
+    # 1 µs per byte: only payloads beyond the inline budget go to the executor
+    stage.record(1000, 0.001, offloaded=False)
+    assert stage.threshold == int(OFFLOAD_INLINE_BUDGET / 1e-6)
+    assert not stage.should_offload(1000)
+    assert stage.should_offload(10000)
+
+    stats = stage.as_dict()
+    assert stats["inline_runs"] == 1
+    assert stats["executor_runs"] == 0
+    assert stats["last_ms"] == 1.0
+
+
+async def test_small_payload_runs_inline(hass: HomeAssistant):
+    """Test small payloads are processed without the executor."""
+    offloader = Offloader(hass)
+
+    with patch.object(hass, "async_add_executor_job") as mock_executor:
+        assert await offloader.async_run("test", 10, sum, [1, 2, 3]) == 6
+        mock_executor.assert_not_called()
+
+    assert offloader.as_dict()["test"]["inline_runs"] == 1
+
+
+async def test_large_payload_runs_in_executor(hass: HomeAssistant):
+    """Test large payloads are processed in the executor and errors are raised."""
+    offloader = async_get_offloader(hass)
+    assert async_get_offloader(hass) is offloader
+
+    assert await offloader.async_run("test", OFFLOAD_MIN_SIZE, sum, [1, 2, 3]) == 6
+    assert offloader.as_dict()["test"]["executor_runs"] == 1
+
+    with pytest.raises(ValueError):
+        await offloader.async_run("other", OFFLOAD_MIN_SIZE, int, "no number")
+
+
+async def test_transport_decodes_json_with_offloader(hass: HomeAssistant):
+    """Test the transport decodes JSON bodies through the offloader."""
+    response = MagicMock()
+    response.status = 200
+    response.headers = {}
+    response.read = AsyncMock(return_value='{"name": "Düsseldorf"}'.encode("latin-1"))
+    response.get_encoding.return_value = "iso-8859-1"
+    transport = ResilientTransport(hass, "Test")
+    transport.offloader = Offloader(hass)
+
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        mock_session.return_value.get.return_value.__aenter__.return_value = response
+        result = await transport.request("https://example.com")
+
+    assert result.data == {"name": "Düsseldorf"}
+    response.json.assert_not_called()
+    assert transport.offloader.as_dict()[STAGE_JSON_DECODE]["inline_runs"] == 1
+    assert transport.metrics.bytes_received == 22
+
+
+async def test_coordinator_parses_board_with_offloader(hass: HomeAssistant, mock_api_response):
+    """Test a refresh parses the board through the offloader ahead of the entities."""
+    coordinator = VRRDataUpdateCoordinator(
+        hass,
+        provider=PROVIDER_VRR,
+        place_dm="Düsseldorf",
+        name_dm="Hauptbahnhof",
+        station_id=None,
+        departures_limit=10,
+        scan_interval=60,
+    )
+
+    with patch.object(coordinator, "_fetch_departures", return_value=mock_api_response):
+        await coordinator.async_refresh()
+
+    assert async_get_offloader(hass).as_dict()[STAGE_DEPARTURE_PARSE]["inline_runs"] == 1
+    with patch.object(coordinator.provider_instance, "parse_departures") as parse_departures:
+        assert coordinator.board.departures
+        parse_departures.assert_not_called()
+    await coordinator.async_shutdown()
+
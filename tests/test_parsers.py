@@ -1,8 +1,18 @@
 """Tests for parser utilities."""
 
+from dataclasses import FrozenInstanceError
+
+import pytest
 from homeassistant.util import dt as dt_util
 
-from custom_components.vrr.parsers import parse_departure_generic
+from custom_components.vrr.parsers import (
+    DepartureParser,
+    parse_departure_generic,
+    parse_local_time,
+    platform_name,
+    product_class_type,
+    realtime_estimate_differs,
+)
 
 
 def test_parse_departure_generic_success():
@@ -174,3 +184,131 @@ def test_parse_departure_generic_past_departure():
 
     assert departure is not None
     assert departure.minutes_until_departure == 0  # Should be 0 for past departures
+
+
+def test_parse_local_time_formats():
+    """Test the API timestamp formats are converted to local time."""
+    tz = dt_util.get_time_zone("Europe/Berlin")
+
+    utc = parse_local_time("2025-01-15T09:00:00Z", tz)
+    offset = parse_local_time("2025-01-15T10:00:00+01:00", tz)
+    assert utc == offset
+    assert utc.tzinfo is tz
+    assert utc.strftime("%H:%M") == "10:00"
+
+    # Formats fromisoformat does not read fall back to Home Assistant's parser
+    assert parse_local_time("2025-01-15T09:00:00.123456789Z", tz).strftime("%H:%M") == "10:00"
+    assert parse_local_time("not a time", tz) is None
+
+
+def test_parse_local_time_memoized():
+    """Test repeated timestamps are served from the cache."""
+    tz = dt_util.get_time_zone("Europe/Berlin")
+    parse_local_time.cache_clear()
+
+    first = parse_local_time("2025-01-15T10:00:00+01:00", tz)
+    second = parse_local_time("2025-01-15T10:00:00+01:00", tz)
+
+    assert second is first
+    assert parse_local_time.cache_info().hits == 1
+    # Each timezone gets its own conversion
+    assert parse_local_time("2025-01-15T10:00:00+01:00", dt_util.get_time_zone("Europe/Dublin")).hour == 9
+
+
+def test_departure_parser_extractors():
+    """Test a prebuilt parser uses its mapping and extractor functions."""
+    parser = DepartureParser(
+        product_class_type({3: "bus", 0: "tram"}, default_class=3, default_type="bus"),
+        platform_name,
+        realtime_estimate_differs,
+    )
+    tz = dt_util.get_time_zone("Europe/Dublin")
+    now = dt_util.parse_datetime("2025-01-15T09:55:00+00:00")
+    stop = {
+        "departureTimePlanned": "2025-01-15T10:00:00Z",
+        "departureTimeEstimated": "2025-01-15T10:02:00Z",
+        "transportation": {"number": "46A", "destination": {"name": "Phoenix Park"}},
+        "platform": 2,
+    }
+
+    departure = parser.parse(stop, tz, now)
+
+    assert departure.transportation_type == "bus"
+    assert departure.platform == "2"
+    assert departure.is_realtime is True
+    assert departure.delay == 2
+
+    stop["transportation"]["product"] = {"class": 7}
+    stop["platform"] = {"name": "B"}
+    departure = parser.parse(stop, tz, now)
+    assert departure.transportation_type == "bus"
+    assert departure.platform == "B"
+    assert parser.parse({"departureTimePlanned": "2025-01-15T10:00:00Z", "platform": {"id": 1}}, tz, now).platform == ""
+
+
+def test_parse_many_keeps_earliest_of_types():
+    """Test batch parsing returns the same departures as parsing, filtering, sorting and slicing."""
+    parser = DepartureParser(
+        product_class_type({4: "tram", 5: "bus"}),
+        platform_name,
+        realtime_estimate_differs,
+    )
+    tz = dt_util.get_time_zone("Europe/Berlin")
+    now = dt_util.parse_datetime("2025-01-15T09:00:00+01:00")
+    minutes = [30, 5, 17, 5, 42, 8, 1, 23, 5, 12, 60, 3]
+    stop_events = [
+        {
+            "departureTimePlanned": f"2025-01-15T{10 + minute // 60:02d}:{minute % 60:02d}:00+01:00",
+            "transportation": {"number": str(position), "product": {"class": 4 + position % 3}},
+        }
+        for position, minute in enumerate(minutes)
+    ]
+    stop_events.insert(4, {"departureTimePlanned": None})
+
+    expected = [parser.parse(stop, tz, now) for stop in stop_events]
+    expected = [departure for departure in expected if departure and departure.transportation_type in {"tram", "bus"}]
+    expected.sort(key=lambda departure: departure.departure_time_obj)
+
+    for limit in (0, 1, 3, 5, 20):
+        departures = parser.parse_many(stop_events, tz, now, {"tram", "bus"}, limit)
+        assert [departure.line for departure in departures] == [departure.line for departure in expected[:limit]]
+
+    assert len(parser.parse_many(stop_events, tz, now, None, 20)) == len(minutes)
+
+
+def test_departure_compact_and_serialized_once():
+    """Test departures share interned strings, format their times lazily and serialize once."""
+    parser = DepartureParser(product_class_type({4: "tram"}), platform_name, realtime_estimate_differs)
+    tz = dt_util.get_time_zone("Europe/Berlin")
+    now = dt_util.parse_datetime("2025-01-15T09:55:00+01:00")
+    # Strings built at runtime, as json.loads returns them, are not interned by Python
+    stop_events = [
+        {
+            "departureTimePlanned": f"2025-01-15T09:{minute}:00Z",
+            "departureTimeEstimated": f"2025-01-15T09:{minute + 2}:00Z",
+            "transportation": {"number": "".join(["U", "79"]), "destination": {"name": "".join(["Duis", "burg"])}},
+            "platform": {"name": "".join(["1", "2"])},
+        }
+        for minute in (10, 20)
+    ]
+
+    first, second = (parser.parse(stop, tz, now) for stop in stop_events)
+
+    assert first.line is second.line
+    assert first.destination is second.destination
+    assert first.platform is second.platform
+    assert not hasattr(first, "__dict__")
+    with pytest.raises(FrozenInstanceError):
+        first.delay = 0
+
+    assert first.departure_time == "10:12"
+    assert first.planned_time == "10:10"
+    assert first.departure_time_obj == dt_util.parse_datetime("2025-01-15T10:12:00+01:00")
+    assert first.departure_time_obj.tzinfo is tz
+    assert first.delay == 2
+
+    serialized = first.to_dict()
+    assert first.to_dict() is serialized
+    assert serialized["departure_time"] == "10:12"
+    assert first == parser.parse(stop_events[0], tz, now)
+
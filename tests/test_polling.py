@@ -0,0 +1,95 @@
+"""Tests for adaptive polling."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.vrr.const import PROVIDER_VRR
+from custom_components.vrr.data_models import DepartureBoard, UnifiedDeparture
+from custom_components.vrr.polling import AdaptivePollingPolicy
+from custom_components.vrr.sensor import VRRDataUpdateCoordinator
+
+NOW = dt_util.parse_datetime("2025-01-15T10:00:00+00:00")
+
+
+def _departure(minutes, delay=0):
+    """Return a departure leaving in the given number of minutes."""
+    planned = NOW + timedelta(minutes=minutes)
+    return UnifiedDeparture.from_local_times(
+        "U79", "Duisburg Hbf", planned + timedelta(minutes=delay), planned, delay, "2", "tram", True, minutes + delay
+    )
+
+
+def _board(*departures):
+    """Return a departure board of the given departures."""
+    return DepartureBoard.from_departures(list(departures))
+
+
+def test_imminent_departure_polls_at_floor():
+    """Test a departure within the next minutes keeps the shortest interval."""
+    policy = AdaptivePollingPolicy(60, 900)
+    board = _board(_departure(5), _departure(25))
+
+    assert policy.next_interval(board, NOW.timestamp()) == 60
+    assert policy.next_interval(board, NOW.timestamp()) == 60
+
+
+def test_static_board_backs_off_until_next_departure():
+    """Test an unchanged board doubles the interval but keeps polling before the next departure."""
+    policy = AdaptivePollingPolicy(60, 900)
+    board = _board(_departure(30))
+
+    assert [policy.next_interval(board, NOW.timestamp()) for _ in range(4)] == [120, 240, 480, 600]
+
+
+def test_changed_board_resets_interval():
+    """Test changed realtime times fall back to the shortest interval."""
+    policy = AdaptivePollingPolicy(60, 900)
+    policy.next_interval(_board(_departure(60)), NOW.timestamp())
+    policy.next_interval(_board(_departure(60)), NOW.timestamp())
+    assert policy.interval == 240
+
+    assert policy.next_interval(_board(_departure(60, delay=3)), NOW.timestamp()) == 60
+
+
+def test_empty_board_backs_off_to_ceiling():
+    """Test an empty board backs off up to the maximum interval."""
+    policy = AdaptivePollingPolicy(60, 300)
+
+    assert [policy.next_interval(_board(), NOW.timestamp()) for _ in range(4)] == [120, 240, 300, 300]
+
+
+async def test_coordinator_adaptive_interval(hass: HomeAssistant):
+    """Test the coordinator derives its polling interval from the board in adaptive mode."""
+    coordinator = VRRDataUpdateCoordinator(
+        hass,
+        provider=PROVIDER_VRR,
+        place_dm="Düsseldorf",
+        name_dm="Hauptbahnhof",
+        station_id=None,
+        departures_limit=10,
+        scan_interval=60,
+        adaptive_polling=True,
+        max_scan_interval=600,
+    )
+
+    with patch.object(coordinator, "_fetch_departures", return_value={"stopEvents": []}):
+        await coordinator.async_refresh()
+        assert coordinator.poll_interval == 120
+
+        await coordinator.async_refresh()
+        assert coordinator.poll_interval == 240
+        # The next poll is aligned to the coordinator's phase within the interval
+        assert 120 <= coordinator.update_interval.total_seconds() <= 360
+
+    # New options start again from the shortest interval
+    coordinator.set_polling(60, True, 600)
+    assert coordinator.adaptive_polling.interval == 60
+    assert coordinator.poll_interval == 60
+
+    coordinator.set_polling(60, False, 600)
+    assert coordinator.adaptive_polling is None
+    assert coordinator.poll_interval == 60
+    assert coordinator.update_interval == timedelta(seconds=60)
@@ -99,7 +99,7 @@ class TestVRRProvider:
         """Test successful departure fetch."""
         mock_response = {"stopEvents": [{"departureTimePlanned": "2025-01-15T10:00:00Z"}]}
 
-        with patch("custom_components.vrr.providers.vrr.async_get_clientsession") as mock_session:
+        with patch("custom_components.vrr.transport.async_get_session") as mock_session:
             mock_response_obj = MagicMock()
             mock_response_obj.status = 200
             mock_response_obj.json = AsyncMock(return_value=mock_response)
@@ -113,7 +113,7 @@ class TestVRRProvider:
     @pytest.mark.asyncio
     async def test_fetch_departures_error(self, provider, mock_hass):
         """Test departure fetch with error."""
-        with patch("custom_components.vrr.providers.vrr.async_get_clientsession") as mock_session:
+        with patch("custom_components.vrr.transport.async_get_session") as mock_session:
             mock_response_obj = MagicMock()
             mock_response_obj.status = 500
 
@@ -123,6 +123,78 @@ class TestVRRProvider:
 
             assert result is None
 
+    @pytest.mark.asyncio
+    async def test_fetch_departures_not_modified(self, provider, mock_hass):
+        """Test a 304 response reuses the last payload without decoding."""
+        mock_response = {"stopEvents": [{"departureTimePlanned": "2025-01-15T10:00:00Z"}]}
+
+        with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+            mock_response_obj = MagicMock()
+            mock_response_obj.status = 200
+            mock_response_obj.headers = {"ETag": '"abc"', "Last-Modified": "Wed, 15 Jan 2025 09:00:00 GMT"}
+            mock_response_obj.json = AsyncMock(return_value=mock_response)
+            mock_get = mock_session.return_value.get
+            mock_get.return_value.__aenter__.return_value = mock_response_obj
+
+            first = await provider.fetch_departures("station123", "Düsseldorf", "Hauptbahnhof", 10)
+            assert "If-None-Match" not in mock_get.call_args.kwargs["headers"]
+
+            mock_response_obj.status = 304
+            mock_response_obj.json.reset_mock()
+            second = await provider.fetch_departures("station123", "Düsseldorf", "Hauptbahnhof", 10)
+
+            assert second is first
+            assert mock_get.call_args.kwargs["headers"]["If-None-Match"] == '"abc"'
+            assert mock_get.call_args.kwargs["headers"]["If-Modified-Since"] == "Wed, 15 Jan 2025 09:00:00 GMT"
+            mock_response_obj.json.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_fetch_departures_excludes_disabled_types(self, provider, mock_hass):
+        """Test means of transport the sensor does not show are excluded from the request."""
+        with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+            mock_response_obj = MagicMock()
+            mock_response_obj.status = 200
+            mock_response_obj.json = AsyncMock(return_value={"stopEvents": []})
+            mock_get = mock_session.return_value.get
+            mock_get.return_value.__aenter__.return_value = mock_response_obj
+
+            await provider.fetch_departures("station123", "Düsseldorf", "Hauptbahnhof", 10)
+            assert "excludedMeans" not in mock_get.call_args.args[0]
+
+            provider.transportation_types = ["bus"]
+            await provider.fetch_departures("station123", "Düsseldorf", "Hauptbahnhof", 10)
+
+        url = mock_get.call_args.args[0]
+        assert "&excludedMeans=checkbox" in url
+        for bus_class in (5, 6, 7, 8, 11):
+            assert f"exclMOT_{bus_class}=" not in url
+        for other_class in (0, 1, 2, 4, 9, 10, 12, 19):
+            assert f"&exclMOT_{other_class}=1" in url
+
+    def test_parse_departures_without_prebuilt_parser(self, provider):
+        """Test the batch API falls back to parse_departure for providers without a prebuilt parser."""
+        tz = dt_util.get_time_zone("Europe/Berlin")
+        now = dt_util.parse_datetime("2025-01-15T09:55:00+01:00")
+        stop_events = [
+            {
+                "departureTimePlanned": f"2025-01-15T10:{minute:02d}:00+01:00",
+                "transportation": {"number": str(minute), "product": {"class": product_class}},
+            }
+            for minute, product_class in ((20, 5), (10, 4), (30, 5), (5, 0))
+        ]
+
+        with patch.object(VRRProvider, "departure_parser", None):
+            fallback = provider.parse_departures(stop_events, tz, now, {"bus", "tram"}, 2)
+        prebuilt = provider.parse_departures(stop_events, tz, now, {"bus", "tram"}, 2)
+
+        assert [departure.line for departure in fallback] == ["10", "20"]
+        assert fallback == prebuilt
+
+    def test_no_exclusion_without_matching_class(self, provider):
+        """Test a request is never limited to no means of transport at all."""
+        provider.transportation_types = ["on_demand"]
+        assert provider._excluded_means_params() == ""
+
     def test_parse_departure(self, provider):
         """Test departure parsing."""
         stop = {
@@ -154,7 +226,7 @@ class TestVRRProvider:
             "locations": [{"id": "stop123", "name": "Hauptbahnhof", "disassembledName": "Hauptbahnhof, Düsseldorf"}]
         }
 
-        with patch("custom_components.vrr.providers.vrr.async_get_clientsession") as mock_session:
+        with patch("custom_components.vrr.transport.async_get_session") as mock_session:
             mock_response_obj = MagicMock()
             mock_response_obj.status = 200
             mock_response_obj.json = AsyncMock(return_value=mock_response)
@@ -198,7 +270,7 @@ class TestTrafiklabProvider:
             ]
         }
 
-        with patch("custom_components.vrr.providers.trafiklab.async_get_clientsession") as mock_session:
+        with patch("custom_components.vrr.transport.async_get_session") as mock_session:
             mock_response_obj = MagicMock()
             mock_response_obj.status = 200
             mock_response_obj.json = AsyncMock(return_value=mock_response)
@@ -218,7 +290,7 @@ class TestTrafiklabProvider:
             "stop_groups": [{"id": "stop123", "name": "Stockholm Central", "stops": [{"name": "Stockholm Central"}]}]
         }
 
-        with patch("custom_components.vrr.providers.trafiklab.async_get_clientsession") as mock_session:
+        with patch("custom_components.vrr.transport.async_get_session") as mock_session:
             mock_response_obj = MagicMock()
             mock_response_obj.status = 200
             mock_response_obj.json = AsyncMock(return_value=mock_response)
@@ -252,7 +324,7 @@ class TestKVVProvider:
         """Test successful departure fetch."""
         mock_response = {"stopEvents": [{"departureTimePlanned": "2025-01-15T10:00:00Z"}]}
 
-        with patch("custom_components.vrr.providers.kvv.async_get_clientsession") as mock_session:
+        with patch("custom_components.vrr.transport.async_get_session") as mock_session:
             mock_response_obj = MagicMock()
             mock_response_obj.status = 200
             mock_response_obj.json = AsyncMock(return_value=mock_response)
@@ -285,7 +357,7 @@ class TestHVVProvider:
         """Test successful departure fetch."""
         mock_response = {"stopEvents": [{"departureTimePlanned": "2025-01-15T10:00:00Z"}]}
 
-        with patch("custom_components.vrr.providers.hvv.async_get_clientsession") as mock_session:
+        with patch("custom_components.vrr.transport.async_get_session") as mock_session:
             mock_response_obj = MagicMock()
             mock_response_obj.status = 200
             mock_response_obj.json = AsyncMock(return_value=mock_response)
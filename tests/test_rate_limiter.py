@@ -0,0 +1,128 @@
+"""Tests for the shared token-bucket rate limiter."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.vrr.const import PROVIDER_TRAFIKLAB_SE, PROVIDER_VRR
+from custom_components.vrr.rate_limiter import RateLimiter, TokenBucket, async_get_rate_limiter
+from custom_components.vrr.sensor import VRRDataUpdateCoordinator
+
+
+def test_token_bucket_refill():
+    """Test a bucket runs empty and reports the wait for the next token."""
+    with patch("custom_components.vrr.rate_limiter.time.monotonic", return_value=1000.0) as mock_time:
+        bucket = TokenBucket(2, 60)
+        bucket.consume()
+        bucket.consume()
+        assert bucket.delay() == 30
+
+        mock_time.return_value = 1030.0
+        assert bucket.delay() == 0
+
+
+async def test_rate_limiter_waits_for_token():
+    """Test callers wait instead of exceeding the per-minute limit."""
+    limiter = RateLimiter(PROVIDER_VRR, per_minute=2, per_hour=100)
+
+    with patch("custom_components.vrr.rate_limiter.asyncio.sleep", new=AsyncMock()) as mock_sleep:
+        await limiter.acquire()
+        await limiter.acquire()
+        mock_sleep.assert_not_called()
+
+        # Refill the bucket while "sleeping"
+        async def refill(delay):
+            limiter._buckets[0].tokens = 1
+
+        mock_sleep.side_effect = refill
+        await limiter.acquire()
+
+    mock_sleep.assert_called_once()
+    assert 0 < mock_sleep.call_args.args[0] <= 30
+    assert limiter.throttled_count == 1
+
+
+async def test_rate_limiter_serves_callers_in_order():
+    """Test queued callers get their tokens in arrival order."""
+    limiter = RateLimiter(PROVIDER_VRR, per_minute=1, per_hour=100)
+    await limiter.acquire()
+    order = []
+    real_sleep = asyncio.sleep
+
+    async def caller(index):
+        await limiter.acquire()
+        order.append(index)
+
+    async def fast_sleep(delay):
+        limiter._buckets[0].tokens = 1
+        await real_sleep(0)
+
+    with patch("custom_components.vrr.rate_limiter.asyncio.sleep", side_effect=fast_sleep):
+        await asyncio.gather(*(caller(index) for index in range(3)))
+
+    assert order == [0, 1, 2]
+    assert limiter.waiting == 0
+
+
+def test_try_acquire_does_not_wait():
+    """Test an optional request only gets a token that is available right away."""
+    with patch("custom_components.vrr.rate_limiter.time.monotonic", return_value=1000.0):
+        limiter = RateLimiter(PROVIDER_VRR, per_minute=1, per_hour=100)
+
+        assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+        assert limiter.as_dict()["tokens_minute"] == 0
+
+
+async def test_limiter_shared_per_provider_and_key(hass: HomeAssistant):
+    """Test coordinators share one limiter per provider and API key."""
+    coordinators = [
+        VRRDataUpdateCoordinator(
+            hass,
+            provider=PROVIDER_TRAFIKLAB_SE,
+            place_dm="Stockholm",
+            name_dm=f"Stop {index}",
+            station_id=str(index),
+            departures_limit=10,
+            scan_interval=60,
+            api_key="key",
+        )
+        for index in range(2)
+    ]
+
+    limiter = async_get_rate_limiter(hass, PROVIDER_TRAFIKLAB_SE, "key")
+    assert all(coordinator.provider_instance.rate_limiter is limiter for coordinator in coordinators)
+    assert async_get_rate_limiter(hass, PROVIDER_TRAFIKLAB_SE, "other_key") is not limiter
+
+    limiter.acquire = AsyncMock()
+    with patch("custom_components.vrr.transport.async_get_session") as mock_session:
+        response = MagicMock()
+        response.status = 200
+        response.json = AsyncMock(return_value={"departures": []})
+        mock_session.return_value.get.return_value.__aenter__.return_value = response
+
+        await coordinators[0].provider_instance.fetch_departures("1", "", "", 10)
+
+    limiter.acquire.assert_awaited_once()
+
+
+async def test_limiter_per_entry_without_key(hass: HomeAssistant, mock_config_entry):
+    """Test entries of a provider without API key do not share one limiter."""
+    coordinator = VRRDataUpdateCoordinator(
+        hass,
+        provider=PROVIDER_VRR,
+        place_dm="Düsseldorf",
+        name_dm="Hauptbahnhof",
+        station_id=None,
+        departures_limit=10,
+        scan_interval=60,
+        config_entry=mock_config_entry,
+    )
+
+    limiter = coordinator.provider_instance.rate_limiter
+    assert limiter is async_get_rate_limiter(hass, PROVIDER_VRR, entry_id=mock_config_entry.entry_id)
+    assert async_get_rate_limiter(hass, PROVIDER_VRR, entry_id="other_entry") is not limiter
+    assert async_get_rate_limiter(hass, PROVIDER_VRR) is not limiter
+    await coordinator.async_shutdown()
+
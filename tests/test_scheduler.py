@@ -0,0 +1,87 @@
+"""Tests for the central poll scheduler."""
+
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.vrr.const import DOMAIN, PROVIDER_VRR
+from custom_components.vrr.scheduler import PollScheduler, async_get_poll_scheduler
+from custom_components.vrr.sensor import VRRDataUpdateCoordinator
+
+
+def _set_time(scheduler, seconds):
+    """Return a patch moving the scheduler's clock to epoch + seconds."""
+    return patch.object(scheduler.hass.loop, "time", return_value=scheduler._epoch + seconds)
+
+
+async def test_phases_are_spread_evenly(hass: HomeAssistant):
+    """Test coordinators get evenly spaced phases and keep their order on unregister."""
+    scheduler = PollScheduler(hass)
+    for key in ("a", "b", "c", "d"):
+        scheduler.register(key)
+
+    assert [scheduler.phase(key) for key in ("a", "b", "c", "d")] == [0, 0.25, 0.5, 0.75]
+    assert scheduler.first_refresh_delay("c", 60) == 30
+
+    scheduler.unregister("b")
+    assert [scheduler.phase(key) for key in ("a", "c", "d")] == [0, 1 / 3, 2 / 3]
+
+
+async def test_next_delay_follows_phase_grid(hass: HomeAssistant):
+    """Test the next poll lands on the coordinator's phase grid."""
+    scheduler = PollScheduler(hass)
+    scheduler.register("a")
+    scheduler.register("b")
+
+    with _set_time(scheduler, 0):
+        assert scheduler.next_delay("a", 60) == 60
+        assert scheduler.next_delay("b", 60) == 30
+
+    # A slow update finishing 7 s after its slot is pulled back onto the grid
+    with _set_time(scheduler, 37):
+        assert scheduler.next_delay("b", 60) == 53
+
+
+async def test_request_rate_statistics(hass: HomeAssistant):
+    """Test the smoothness statistics of recorded requests."""
+    scheduler = PollScheduler(hass)
+
+    for seconds in (0, 10, 20, 30, 30, 30):
+        with _set_time(scheduler, seconds):
+            scheduler.record_request()
+
+    with _set_time(scheduler, 39):
+        stats = scheduler.as_dict()
+
+    assert stats["requests"] == 6
+    assert stats["requests_per_bucket_mean"] == 1.5
+    assert stats["requests_per_bucket_peak"] == 3
+    assert stats["coefficient_of_variation"] > 0
+
+
+async def test_coordinators_register_with_scheduler(hass: HomeAssistant, mock_api_response):
+    """Test coordinators register on creation, record updates and unregister on shutdown."""
+    coordinators = [
+        VRRDataUpdateCoordinator(
+            hass,
+            provider=PROVIDER_VRR,
+            place_dm="Düsseldorf",
+            name_dm=f"Stop {index}",
+            station_id=str(index),
+            departures_limit=10,
+            scan_interval=60,
+        )
+        for index in range(2)
+    ]
+    scheduler = async_get_poll_scheduler(hass)
+    assert hass.data[DOMAIN]["poll_scheduler"] is scheduler
+    assert scheduler.slot_count == 2
+
+    with patch.object(coordinators[1], "_fetch_departures", return_value=mock_api_response):
+        await coordinators[1].async_refresh()
+
+    assert scheduler.as_dict()["requests"] == 1
+    assert 30 <= coordinators[1].update_interval.total_seconds() <= 90
+
+    await coordinators[0].async_shutdown()
+    assert scheduler.slot_count == 1
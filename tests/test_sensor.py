@@ -8,7 +8,14 @@ from homeassistant.helpers.update_coordinator import UpdateFailed
 from homeassistant.util import dt as dt_util
 
 from custom_components.vrr.const import API_RATE_LIMIT_PER_DAY, DOMAIN, PROVIDER_VRR
-from custom_components.vrr.sensor import MultiProviderSensor, VRRDataUpdateCoordinator, async_setup_entry
+from custom_components.vrr.sensor import (
+    REFRESH_METRIC_SENSORS,
+    MultiProviderSensor,
+    RefreshMetricSensor,
+    VRRDataUpdateCoordinator,
+    async_setup_entry,
+)
+from custom_components.vrr.transport import DeadlineExceededError
 
 
 async def test_coordinator_update(hass: HomeAssistant, mock_api_response):
@@ -30,6 +37,80 @@ async def test_coordinator_update(hass: HomeAssistant, mock_api_response):
         assert coordinator.last_update_success is True
 
 
+async def test_coordinator_unchanged_data(hass: HomeAssistant, mock_api_response):
+    """Test listeners are not notified when the provider returns the previous payload."""
+    coordinator = VRRDataUpdateCoordinator(
+        hass,
+        provider=PROVIDER_VRR,
+        place_dm="Düsseldorf",
+        name_dm="Hauptbahnhof",
+        station_id=None,
+        departures_limit=10,
+        scan_interval=60,
+    )
+    listener = MagicMock()
+    unsub = coordinator.async_add_listener(listener)
+
+    with patch.object(coordinator, "_fetch_departures", return_value=mock_api_response):
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+
+    assert coordinator.data is mock_api_response
+    assert listener.call_count == 1
+    unsub()
+
+
+async def test_coordinator_unchanged_data_next_minute(hass: HomeAssistant, mock_api_response):
+    """Test unchanged data is parsed again and notifies the listeners once the minute changes."""
+    coordinator = VRRDataUpdateCoordinator(
+        hass,
+        provider=PROVIDER_VRR,
+        place_dm="Düsseldorf",
+        name_dm="Hauptbahnhof",
+        station_id=None,
+        departures_limit=10,
+        scan_interval=60,
+    )
+    listener = MagicMock()
+    unsub = coordinator.async_add_listener(listener)
+
+    with patch.object(coordinator, "_fetch_departures", return_value=mock_api_response):
+        with patch.object(coordinator, "_board_minute", return_value=1000):
+            await coordinator.async_refresh()
+            board = coordinator.board
+            await coordinator.async_refresh()
+            assert coordinator.board is board
+            assert listener.call_count == 1
+
+        with patch.object(coordinator, "_board_minute", return_value=1001):
+            await coordinator.async_refresh()
+            assert listener.call_count == 2
+            assert coordinator.board is not board
+            board = coordinator.board
+
+        # Between refreshes the entities read the stored board without parsing
+        with patch.object(coordinator, "_board_minute", return_value=1002):
+            assert coordinator.board is board
+
+    unsub()
+
+
+async def test_coordinator_unsupported_provider(hass: HomeAssistant):
+    """Test a coordinator without provider implementation fails its refresh."""
+    coordinator = VRRDataUpdateCoordinator(
+        hass,
+        provider="invalid_provider",
+        place_dm="Düsseldorf",
+        name_dm="Hauptbahnhof",
+        station_id=None,
+        departures_limit=10,
+        scan_interval=60,
+    )
+
+    with pytest.raises(UpdateFailed, match="Unsupported provider"):
+        await coordinator._async_fetch_data()
+
+
 async def test_coordinator_rate_limit(hass: HomeAssistant):
     """Test rate limiting in coordinator."""
     coordinator = VRRDataUpdateCoordinator(
@@ -73,14 +154,11 @@ async def test_coordinator_api_error(hass: HomeAssistant):
             await coordinator._async_update_data()
 
 
-async def test_sensor_state(hass: HomeAssistant, mock_coordinator, mock_config_entry):
+async def test_sensor_state(hass: HomeAssistant, create_coordinator, mock_config_entry, mock_api_response):
     """Test sensor state updates."""
-    # Test with provider instance
-    from custom_components.vrr.providers import get_provider
-
-    mock_coordinator.provider_instance = get_provider(PROVIDER_VRR, hass)
+    coordinator = create_coordinator(mock_api_response, ["bus", "train", "tram"])
     sensor = MultiProviderSensor(
-        mock_coordinator,
+        coordinator,
         mock_config_entry,
         ["bus", "train", "tram"],
     )
@@ -89,9 +167,10 @@ async def test_sensor_state(hass: HomeAssistant, mock_coordinator, mock_config_e
     with patch("custom_components.vrr.sensor.dt_util.now") as mock_now:
         mock_now.return_value = dt_util.parse_datetime("2025-01-15T09:55:00Z")
 
-        # Call _process_departure_data directly instead of _handle_coordinator_update
+        await coordinator.async_update_board(coordinator.data)
+        # Call _process_departure_board directly instead of _handle_coordinator_update
         # to avoid needing hass to be set
-        sensor._process_departure_data(mock_coordinator.data)
+        sensor._process_departure_board(coordinator.board)
 
         # Verify state is set to next departure time
         assert sensor._state is not None
@@ -126,21 +205,9 @@ async def test_sensor_icon(hass: HomeAssistant, mock_coordinator, mock_config_en
     assert icon == "mdi:train"
 
 
-async def test_sensor_no_departures(hass: HomeAssistant, mock_config_entry):
+async def test_sensor_no_departures(hass: HomeAssistant, create_coordinator, mock_config_entry):
     """Test sensor with no departures."""
-    coordinator = MagicMock()
-    coordinator.data = {"stopEvents": []}
-    coordinator.last_update_success = True
-    coordinator.provider = PROVIDER_VRR
-    coordinator.place_dm = "Düsseldorf"
-    coordinator.name_dm = "Hauptbahnhof"
-    coordinator.station_id = None
-    coordinator.departures_limit = 10
-
-    # Test with provider instance
-    from custom_components.vrr.providers import get_provider
-
-    coordinator.provider_instance = get_provider(PROVIDER_VRR, hass)
+    coordinator = create_coordinator({"stopEvents": []}, ["bus", "train", "tram"])
 
     sensor = MultiProviderSensor(
         coordinator,
@@ -148,8 +215,9 @@ async def test_sensor_no_departures(hass: HomeAssistant, mock_config_entry):
         ["bus", "train", "tram"],
     )
 
-    # Call _process_departure_data directly to avoid needing hass
-    sensor._process_departure_data(coordinator.data)
+    await coordinator.async_update_board(coordinator.data)
+    # Call _process_departure_board directly to avoid needing hass
+    sensor._process_departure_board(coordinator.board)
 
     assert sensor._state == "No departures"
     assert sensor._attributes["total_departures"] == 0
@@ -180,14 +248,15 @@ async def test_async_setup_entry(hass: HomeAssistant, mock_config_entry, mock_ap
 
         await async_setup_entry(hass, mock_config_entry, mock_add_entities)
 
-        assert len(entities) == 1
+        assert len(entities) == 1 + len(REFRESH_METRIC_SENSORS)
         assert isinstance(entities[0], MultiProviderSensor)
+        assert all(isinstance(entity, RefreshMetricSensor) for entity in entities[1:])
+        assert not entities[1].entity_registry_enabled_default
 
 
-async def test_sensor_transportation_type_filtering(hass: HomeAssistant, mock_config_entry):
+async def test_sensor_transportation_type_filtering(hass: HomeAssistant, create_coordinator, mock_config_entry):
     """Test filtering departures by transportation type."""
-    coordinator = MagicMock()
-    coordinator.data = {
+    data = {
         "stopEvents": [
             {
                 "departureTimePlanned": "2025-01-15T10:00:00Z",
@@ -215,27 +284,85 @@ async def test_sensor_transportation_type_filtering(hass: HomeAssistant, mock_co
             },
         ]
     }
-    coordinator.last_update_success = True
-    coordinator.provider = PROVIDER_VRR
-    coordinator.place_dm = "Düsseldorf"
-    coordinator.name_dm = "Hauptbahnhof"
-    coordinator.station_id = None
-    coordinator.departures_limit = 10
-
-    # Test with provider instance
-    from custom_components.vrr.providers import get_provider
-
-    coordinator.provider_instance = get_provider(PROVIDER_VRR, hass)
-
     # Only allow trams
+    coordinator = create_coordinator(data, ["tram"])
     sensor = MultiProviderSensor(coordinator, mock_config_entry, ["tram"])
 
     with patch("custom_components.vrr.sensor.dt_util.now") as mock_now:
         mock_now.return_value = dt_util.parse_datetime("2025-01-15T09:55:00Z")
-        # Call _process_departure_data directly to avoid needing hass
-        sensor._process_departure_data(coordinator.data)
+        await coordinator.async_update_board(coordinator.data)
+        # Call _process_departure_board directly to avoid needing hass
+        sensor._process_departure_board(coordinator.board)
 
     # Should only have tram departures
     departures = sensor._attributes.get("departures", [])
     assert len(departures) == 1
     assert departures[0]["transportation_type"] == "tram"
+
+
+async def test_coordinator_api_calls_persist(hass: HomeAssistant, mock_config_entry, mock_api_response, hass_storage):
+    """Test the daily API call counter survives a coordinator restart."""
+
+    def create_coordinator():
+        return VRRDataUpdateCoordinator(
+            hass,
+            provider=PROVIDER_VRR,
+            place_dm="Düsseldorf",
+            name_dm="Hauptbahnhof",
+            station_id=None,
+            departures_limit=10,
+            scan_interval=60,
+            config_entry=mock_config_entry,
+        )
+
+    coordinator = create_coordinator()
+    await coordinator.async_restore_api_calls()
+    with patch.object(coordinator, "_fetch_departures", return_value=mock_api_response):
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+    assert coordinator._api_calls_today == 2
+
+    # Flush the batched save and simulate a restart
+    counters = hass.data[DOMAIN].pop("api_counters")
+    await counters._store.async_save(counters._data_to_save())
+    stored = hass_storage["vrr.api_counters"]["data"]["counters"]
+    assert stored[mock_config_entry.entry_id]["calls"] == 2
+
+    restarted = create_coordinator()
+    await restarted.async_restore_api_calls()
+    assert restarted._api_calls_today == 2
+
+
+async def test_coordinator_deadline_miss(hass: HomeAssistant, mock_api_response):
+    """Test a refresh that runs out of its budget keeps the last data and is counted."""
+    coordinator = VRRDataUpdateCoordinator(
+        hass,
+        provider=PROVIDER_VRR,
+        place_dm="Düsseldorf",
+        name_dm="Hauptbahnhof",
+        station_id=None,
+        departures_limit=10,
+        scan_interval=60,
+    )
+    assert coordinator.refresh_budget == 30
+
+    with patch.object(coordinator.provider_instance, "fetch_departures", return_value=mock_api_response) as mock_fetch:
+        await coordinator.async_refresh()
+
+    assert coordinator.provider_instance.deadline is not None
+    mock_fetch.assert_called_once()
+
+    with patch.object(
+        coordinator.provider_instance,
+        "fetch_departures",
+        side_effect=DeadlineExceededError("VRR API request ran out of time"),
+    ):
+        await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.data is mock_api_response
+    assert coordinator.stale
+    assert coordinator.deadline_misses == 1
+
+    coordinator.set_polling(3600, False, 3600)
+    assert coordinator.refresh_budget == 45
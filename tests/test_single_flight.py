@@ -0,0 +1,131 @@
+"""Tests for single-flight request coalescing."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.vrr.const import PROVIDER_VRR
+from custom_components.vrr.sensor import VRRDataUpdateCoordinator
+from custom_components.vrr.single_flight import SingleFlight, async_get_single_flight
+
+
+async def test_concurrent_calls_share_one_request():
+    """Test concurrent callers with the same key await a single call."""
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"stopEvents": []}
+
+    tasks = [asyncio.create_task(single_flight.do("key", fetch)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert single_flight.in_flight == 1
+
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert calls == 1
+    assert [sent for _, sent in results] == [True, False, False]
+    assert all(result is results[0][0] for result, _ in results)
+    assert single_flight.in_flight == 0
+
+
+async def test_different_keys_run_separately():
+    """Test calls with different keys are not coalesced."""
+    single_flight = SingleFlight()
+    calls = []
+
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0)
+        return key
+
+    results = await asyncio.gather(
+        single_flight.do("a", lambda: fetch("a")),
+        single_flight.do("b", lambda: fetch("b")),
+    )
+
+    assert sorted(calls) == ["a", "b"]
+    assert results == [("a", True), ("b", True)]
+
+
+async def test_exception_is_shared():
+    """Test waiting callers receive the exception of the shared call."""
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        raise ValueError("API Error")
+
+    tasks = [asyncio.create_task(single_flight.do("key", fetch)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+
+    for task in tasks:
+        with pytest.raises(ValueError):
+            await task
+    assert single_flight.in_flight == 0
+
+
+async def test_leader_cancellation_retries_waiting_caller():
+    """Test a waiting caller runs the request itself if the first caller is cancelled."""
+    single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "data"
+
+    leader = asyncio.create_task(single_flight.do("key", fetch))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(single_flight.do("key", fetch))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == ("data", True)
+    assert leader.cancelled()
+
+
+async def test_coordinators_share_request(hass: HomeAssistant, mock_api_response):
+    """Test two coordinators for the same station send one request and count it once."""
+    coordinators = [
+        VRRDataUpdateCoordinator(
+            hass,
+            provider=PROVIDER_VRR,
+            place_dm="Düsseldorf",
+            name_dm="Hauptbahnhof",
+            station_id="20018235",
+            departures_limit=10,
+            scan_interval=60,
+        )
+        for _ in range(2)
+    ]
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return mock_api_response
+
+    with (
+        patch.object(coordinators[0], "_fetch_departures", side_effect=fetch) as first_fetch,
+        patch.object(coordinators[1], "_fetch_departures", side_effect=fetch) as second_fetch,
+    ):
+        refreshes = asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+        await asyncio.sleep(0)
+        release.set()
+        await refreshes
+
+    assert first_fetch.call_count + second_fetch.call_count == 1
+    assert all(coordinator.data is mock_api_response for coordinator in coordinators)
+    assert sorted(coordinator._api_calls_today for coordinator in coordinators) == [0, 1]
+    assert async_get_single_flight(hass).in_flight == 0
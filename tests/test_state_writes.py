@@ -0,0 +1,54 @@
+"""Tests for skipping unchanged entity state writes."""
+
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.vrr.sensor import MultiProviderSensor
+from custom_components.vrr.state_writes import StateWriteFilter, state_fingerprint
+
+
+def test_fingerprint_ignores_volatile_attributes():
+    """Test the fingerprint only changes with the content."""
+    attributes = {"departures": [{"line": "U79", "delay": 0}], "last_updated": "2025-01-15T09:00:00"}
+    fingerprint = state_fingerprint("10:00", attributes)
+
+    assert state_fingerprint("10:00", {**attributes, "last_updated": "2025-01-15T09:01:00"}) == fingerprint
+    assert state_fingerprint("10:00", {**attributes, "departures": [{"line": "U79", "delay": 2}]}) != fingerprint
+    assert state_fingerprint("10:05", attributes) != fingerprint
+    assert state_fingerprint("10:00", attributes, available=False) != fingerprint
+
+
+def test_filter_writes_unchanged_state_after_max_age():
+    """Test an unchanged state is skipped until it is max_age old."""
+    state_writes = StateWriteFilter(max_age=300)
+
+    with patch("custom_components.vrr.state_writes.time.monotonic", return_value=1000.0):
+        assert state_writes.should_write(1)
+        assert not state_writes.should_write(1)
+        assert state_writes.should_write(2)
+
+    with patch("custom_components.vrr.state_writes.time.monotonic", return_value=1300.0):
+        assert state_writes.should_write(2)
+
+    assert state_writes.skipped_writes == 1
+
+
+async def test_sensor_skips_identical_board(
+    hass: HomeAssistant, create_coordinator, mock_config_entry, mock_api_response
+):
+    """Test the departure sensor writes an identical board only once."""
+    coordinator = create_coordinator(mock_api_response, ["bus", "train", "tram", "subway"])
+    coordinator.last_update_success = True
+
+    sensor = MultiProviderSensor(coordinator, mock_config_entry, ["bus", "train", "tram", "subway"])
+    await coordinator.async_update_board(coordinator.data)
+
+    with patch.object(sensor, "async_write_ha_state") as mock_write:
+        sensor._handle_coordinator_update()
+        sensor._handle_coordinator_update()
+        assert mock_write.call_count == 1
+
+        coordinator.stale = True
+        sensor._handle_coordinator_update()
+        assert mock_write.call_count == 2
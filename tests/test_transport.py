@@ -0,0 +1,308 @@
+"""Tests for the resilient HTTP transport."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.vrr.circuit_breaker import STATE_CLOSED, CircuitBreaker
+from custom_components.vrr.const import HTTP_MIN_ATTEMPT_TIME
+from custom_components.vrr.latency import LatencyTracker
+from custom_components.vrr.rate_limiter import RateLimiter
+from custom_components.vrr.transport import (
+    RESPONSE_BYTES,
+    STATUS_FATAL,
+    STATUS_NOT_MODIFIED,
+    STATUS_OK,
+    STATUS_RETRY,
+    DeadlineExceededError,
+    ResilientTransport,
+    classify_status,
+)
+
+
+def _response(status: int, data=None, headers=None) -> MagicMock:
+    """Return a mocked aiohttp response."""
+    response = MagicMock()
+    response.status = status
+    response.json = AsyncMock(return_value=data)
+    response.read = AsyncMock(return_value=data)
+    response.headers = headers or {}
+    return response
+
+
+@pytest.fixture
+def mock_session():
+    """Patch the client session used by the transport."""
+    with patch("custom_components.vrr.transport.async_get_session") as session:
+        yield session.return_value
+
+
+@pytest.fixture
+def mock_sleep():
+    """Patch the backoff sleep of the transport."""
+    with patch("custom_components.vrr.transport.asyncio.sleep", new=AsyncMock()) as sleep:
+        yield sleep
+
+
+def _respond_with(session: MagicMock, *responses) -> None:
+    """Let the session answer consecutive requests with the given responses."""
+    contexts = []
+    for response in responses:
+        context = MagicMock()
+        if isinstance(response, Exception):
+            context.__aenter__ = AsyncMock(side_effect=response)
+        else:
+            context.__aenter__ = AsyncMock(return_value=response)
+        context.__aexit__ = AsyncMock(return_value=False)
+        contexts.append(context)
+    session.get.side_effect = contexts
+
+
+@pytest.mark.parametrize(
+    ("status", "outcome"),
+    [
+        (200, STATUS_OK),
+        (304, STATUS_NOT_MODIFIED),
+        (404, STATUS_FATAL),
+        (401, STATUS_FATAL),
+        (403, STATUS_FATAL),
+        (429, STATUS_RETRY),
+        (500, STATUS_RETRY),
+        (503, STATUS_RETRY),
+    ],
+)
+def test_classify_status(status, outcome):
+    """Test the status code classification."""
+    assert classify_status(status) == outcome
+
+
+def test_backoff_full_jitter(hass: HomeAssistant):
+    """Test backoff delays stay between 0 and the capped exponential bound."""
+    transport = ResilientTransport(hass, "Test", backoff_base=1.0, backoff_max=5.0)
+
+    with patch("custom_components.vrr.transport.random.uniform", side_effect=lambda low, high: high) as uniform:
+        assert transport.backoff_delay(1) == 2.0
+        assert transport.backoff_delay(2) == 4.0
+        assert transport.backoff_delay(3) == 5.0
+        assert transport.backoff_delay(1, retry_after=30) == 5.0
+        assert all(call.args[0] == 0 for call in uniform.call_args_list)
+
+
+async def test_retries_transient_errors(hass: HomeAssistant, mock_session, mock_sleep):
+    """Test server errors and timeouts are retried until a response succeeds."""
+    _respond_with(mock_session, _response(503), asyncio.TimeoutError(), _response(200, {"ok": True}))
+    transport = ResilientTransport(hass, "Test")
+
+    response = await transport.request("https://example.com")
+
+    assert response.ok
+    assert response.data == {"ok": True}
+    assert mock_session.get.call_count == 3
+    assert mock_sleep.await_count == 2
+    metrics = transport.metrics.as_dict()
+    assert metrics["requests"] == 1
+    assert metrics["attempts"] == 3
+    assert metrics["retries"] == 2
+    assert metrics["timeouts"] == 1
+    assert metrics["failures"] == 0
+    assert metrics["status_counts"] == {"200": 1, "503": 1}
+
+
+async def test_fatal_status_not_retried(hass: HomeAssistant, mock_session, mock_sleep):
+    """Test a 404 response ends the request without retries."""
+    _respond_with(mock_session, _response(404))
+    transport = ResilientTransport(hass, "Test")
+
+    response = await transport.request("https://example.com")
+
+    assert not response.ok
+    assert response.status == 404
+    assert mock_session.get.call_count == 1
+    mock_sleep.assert_not_awaited()
+    assert transport.metrics.failures == 1
+
+
+async def test_gives_up_after_max_attempts(hass: HomeAssistant, mock_session, mock_sleep):
+    """Test the last error is returned once all attempts failed."""
+    _respond_with(mock_session, _response(500), _response(502))
+    transport = ResilientTransport(hass, "Test", max_attempts=2)
+
+    response = await transport.request("https://example.com")
+
+    assert response.status == 502
+    assert not response.ok
+    assert mock_sleep.await_count == 1
+    assert transport.metrics.failures == 1
+
+
+async def test_retry_after_honoured(hass: HomeAssistant, mock_session, mock_sleep):
+    """Test a 429 response waits at least as long as the server asks."""
+    _respond_with(mock_session, _response(429, headers={"Retry-After": "3"}), _response(200, b"data"))
+    transport = ResilientTransport(hass, "Test")
+
+    response = await transport.request("https://example.com", response_format=RESPONSE_BYTES)
+
+    assert response.data == b"data"
+    assert mock_sleep.await_args.args[0] >= 3
+
+
+async def test_invalid_json(hass: HomeAssistant, mock_session, mock_sleep):
+    """Test an undecodable body is reported instead of raised."""
+    response = _response(200)
+    response.json = AsyncMock(side_effect=ValueError("no json"))
+    _respond_with(mock_session, response)
+    transport = ResilientTransport(hass, "Test")
+
+    result = await transport.request("https://example.com")
+
+    assert not result.ok
+    assert result.error == "invalid_response"
+    mock_sleep.assert_not_awaited()
+
+
+async def test_rate_limiter_acquired_per_attempt(hass: HomeAssistant, mock_session, mock_sleep):
+    """Test every attempt takes a token from the rate limiter."""
+    _respond_with(mock_session, _response(500), _response(200, {}))
+    limiter = MagicMock()
+    limiter.acquire = AsyncMock()
+    transport = ResilientTransport(hass, "Test")
+
+    await transport.request("https://example.com", rate_limiter=limiter)
+
+    assert limiter.acquire.await_count == 2
+
+
+async def test_deadline_limits_attempt_timeout(hass: HomeAssistant, mock_session, mock_sleep):
+    """Test an attempt never waits longer than the remaining deadline."""
+    _respond_with(mock_session, _response(200, {}))
+    transport = ResilientTransport(hass, "Test", timeout=10)
+
+    with patch("custom_components.vrr.transport.time.monotonic", return_value=100.0):
+        await transport.request("https://example.com", deadline=104.0)
+
+    assert mock_session.get.call_args.kwargs["timeout"].total == 4.0
+
+
+async def test_deadline_stops_retries(hass: HomeAssistant, mock_session, mock_sleep):
+    """Test no retry is started when the backoff does not fit into the deadline."""
+    _respond_with(mock_session, _response(503), _response(200, {}))
+    transport = ResilientTransport(hass, "Test")
+
+    with (
+        patch("custom_components.vrr.transport.time.monotonic", return_value=100.0),
+        patch.object(transport, "backoff_delay", return_value=2.0),
+        pytest.raises(DeadlineExceededError),
+    ):
+        await transport.request("https://example.com", deadline=103.0)
+
+    assert mock_session.get.call_count == 1
+    mock_sleep.assert_not_awaited()
+    assert transport.metrics.deadline_exceeded == 1
+
+
+async def test_deadline_passed_before_first_attempt(hass: HomeAssistant, mock_session, mock_sleep):
+    """Test an exhausted budget sends nothing and does not count against the circuit breaker."""
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    transport = ResilientTransport(hass, "Test")
+
+    with (
+        patch("custom_components.vrr.transport.time.monotonic", return_value=100.0),
+        pytest.raises(DeadlineExceededError),
+    ):
+        await transport.request("https://example.com", circuit_breaker=breaker, deadline=100.5)
+
+    mock_session.get.assert_not_called()
+    assert breaker.state == STATE_CLOSED
+
+
+async def test_deadline_bounds_rate_limit_wait(hass: HomeAssistant, mock_session):
+    """Test a request queued behind an empty rate limiter gives up at its deadline without a token."""
+    limiter = RateLimiter("test", per_minute=1, per_hour=100)
+    await limiter.acquire()
+    transport = ResilientTransport(hass, "Test")
+
+    with pytest.raises(DeadlineExceededError):
+        await transport.request(
+            "https://example.com", rate_limiter=limiter, deadline=time.monotonic() + HTTP_MIN_ATTEMPT_TIME + 0.05
+        )
+
+    mock_session.get.assert_not_called()
+    assert transport.metrics.deadline_exceeded == 1
+    assert limiter.waiting == 0
+    assert limiter.as_dict()["tokens_minute"] < 1
+
+
+def _hanging_response(cancelled: list) -> MagicMock:
+    """Return a request context whose response never arrives."""
+
+    async def _hang():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(side_effect=_hang)
+    context.__aexit__ = AsyncMock(return_value=False)
+    return context
+
+
+async def test_hedged_request_wins(hass: HomeAssistant, mock_session):
+    """Test a slow request gets a hedge whose response is used."""
+    cancelled = []
+    answer = MagicMock()
+    answer.__aenter__ = AsyncMock(return_value=_response(200, {"hedge": True}))
+    answer.__aexit__ = AsyncMock(return_value=False)
+    mock_session.get.side_effect = [_hanging_response(cancelled), answer]
+    limiter = MagicMock()
+    limiter.acquire = AsyncMock()
+    limiter.try_acquire.return_value = True
+    tracker = LatencyTracker("test")
+    transport = ResilientTransport(hass, "Test")
+
+    with patch.object(tracker, "hedge_delay", return_value=0.01):
+        response = await transport.request(
+            "https://example.com", rate_limiter=limiter, latency_tracker=tracker, hedge=True
+        )
+
+    assert response.data == {"hedge": True}
+    assert mock_session.get.call_count == 2
+    assert limiter.acquire.await_count == 1
+    assert limiter.try_acquire.call_count == 1
+    # The slower request is cancelled
+    await asyncio.sleep(0)
+    assert cancelled == [True]
+    assert transport.metrics.hedges == 1
+    assert transport.metrics.hedge_wins == 1
+    assert tracker.count == 1
+
+
+async def test_hedge_skipped_without_token(hass: HomeAssistant, mock_session):
+    """Test no hedge is sent when the rate limiter has no token to spare."""
+
+    async def _slow_response():
+        await asyncio.sleep(0.05)
+        return _response(200, {"primary": True})
+
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(side_effect=_slow_response)
+    context.__aexit__ = AsyncMock(return_value=False)
+    mock_session.get.side_effect = [context]
+    limiter = MagicMock()
+    limiter.acquire = AsyncMock()
+    limiter.try_acquire.return_value = False
+    tracker = LatencyTracker("test")
+    transport = ResilientTransport(hass, "Test")
+
+    with patch.object(tracker, "hedge_delay", return_value=0.01):
+        response = await transport.request(
+            "https://example.com", rate_limiter=limiter, latency_tracker=tracker, hedge=True
+        )
+
+    assert response.data == {"primary": True}
+    assert mock_session.get.call_count == 1
+    assert transport.metrics.hedges == 0
@@ -0,0 +1,118 @@
+"""Tests for the warm-start departure snapshot."""
+
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.vrr import async_setup_entry
+from custom_components.vrr.const import DOMAIN
+from custom_components.vrr.providers.hvv import HVVProvider
+from custom_components.vrr.providers.kvv import KVVProvider
+from custom_components.vrr.warm_start import DepartureSnapshotStore
+
+
+def _stop_event(minutes):
+    """Return a VRR stop event departing in the given number of minutes."""
+    departure = (dt_util.utcnow() + timedelta(minutes=minutes)).replace(microsecond=0).isoformat()
+    return {
+        "departureTimePlanned": departure,
+        "departureTimeEstimated": departure,
+        "transportation": {
+            "number": "U79",
+            "destination": {"name": "Duisburg Hbf", "id": "20000001", "type": "stop"},
+            "product": {"class": 4, "name": "Tram", "iconId": 4},
+            "operator": {"name": "Rheinbahn"},
+        },
+        "platform": {"name": "2", "id": "de:05111:18235:1:2"},
+        "realtimeStatus": ["MONITORED"],
+        "location": {"id": "20018235", "coord": [51.2, 6.8]},
+        "hints": [{"content": "Barrier-free"}],
+    }
+
+
+async def test_snapshot_is_compacted(hass: HomeAssistant, hass_storage):
+    """Test the stored board keeps only upcoming departures and the fields the parsers read."""
+    store = DepartureSnapshotStore(hass, "entry")
+    store.async_save({"stopEvents": [_stop_event(-5), _stop_event(10)]})
+
+    stored = store._data_to_save()
+
+    assert len(stored["stopEvents"]) == 1
+    stop = stored["stopEvents"][0]
+    assert "location" not in stop
+    assert "hints" not in stop
+    assert stop["transportation"] == {
+        "number": "U79",
+        "destination": {"name": "Duisburg Hbf"},
+        "product": {"class": 4, "name": "Tram"},
+    }
+    assert stop["platform"] == {"name": "2"}
+
+
+@pytest.mark.parametrize(
+    ("provider_class", "location", "platform"),
+    [
+        (KVVProvider, {"id": "de:08212:1", "disassembledName": "Gleis 3", "coord": [49.0, 8.4]}, "Gleis 3"),
+        (HVVProvider, {"id": "de:02000:10950", "properties": {"platform": "4", "stopId": "10950"}}, "4"),
+    ],
+)
+async def test_snapshot_keeps_location_platform(hass: HomeAssistant, hass_storage, provider_class, location, platform):
+    """Test the platforms KVV and HVV read from the location survive a save and load."""
+    stop_event = _stop_event(10)
+    del stop_event["platform"]
+    stop_event["location"] = location
+
+    store = DepartureSnapshotStore(hass, "entry")
+    store.async_save({"stopEvents": [stop_event]})
+    await store._store.async_save(store._data_to_save())
+
+    snapshot = await DepartureSnapshotStore(hass, "entry").async_load()
+    provider = provider_class(hass)
+    departure = provider.parse_departure(
+        snapshot["stopEvents"][0], dt_util.get_time_zone(provider.get_timezone()), dt_util.now()
+    )
+    assert departure.platform == platform
+
+
+async def test_snapshot_load_drops_departed(hass: HomeAssistant, hass_storage):
+    """Test departures that left while Home Assistant was down are not restored."""
+    hass_storage[f"{DOMAIN}.snapshot.entry"] = {
+        "version": 1,
+        "key": f"{DOMAIN}.snapshot.entry",
+        "data": {"stopEvents": [_stop_event(-5), _stop_event(10)]},
+    }
+
+    snapshot = await DepartureSnapshotStore(hass, "entry").async_load()
+    assert len(snapshot["stopEvents"]) == 1
+
+    hass_storage[f"{DOMAIN}.snapshot.entry"]["data"] = {"stopEvents": [_stop_event(-5)]}
+    assert await DepartureSnapshotStore(hass, "entry").async_load() is None
+
+
+async def test_setup_entry_warm_start(hass: HomeAssistant, mock_config_entry: ConfigEntry, hass_storage):
+    """Test setup restores the stored board and refreshes in the background."""
+    key = f"{DOMAIN}.snapshot.{mock_config_entry.entry_id}"
+    hass_storage[key] = {"version": 1, "key": key, "data": {"stopEvents": [_stop_event(10)]}}
+
+    with (
+        patch(
+            "custom_components.vrr.VRRDataUpdateCoordinator.async_config_entry_first_refresh",
+            new_callable=AsyncMock,
+        ) as mock_first_refresh,
+        patch("custom_components.vrr.VRRDataUpdateCoordinator.async_refresh", new_callable=AsyncMock) as mock_refresh,
+        patch("homeassistant.config_entries.ConfigEntries.async_forward_entry_setups", new_callable=AsyncMock),
+    ):
+        assert await async_setup_entry(hass, mock_config_entry) is True
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+        await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][f"{mock_config_entry.entry_id}_coordinator"]
+    assert coordinator.data["stopEvents"][0]["transportation"]["number"] == "U79"
+    assert coordinator.last_update_success is True
+    mock_first_refresh.assert_not_called()
+    mock_refresh.assert_awaited_once()